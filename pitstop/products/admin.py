@@ -1,7 +1,22 @@
-from django.contrib import admin
-from .models import Product
-
-@admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ("name", "brand", "model", "price", "stock")
-    search_fields = ("name", "brand", "model")
+from django.contrib import admin
+from .models import InstallerSchedule, Product, SellerStats
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ("name", "brand", "model", "price", "stock")
+    search_fields = ("name", "brand", "model")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.sync_fitments()
+
+
+@admin.register(SellerStats)
+class SellerStatsAdmin(admin.ModelAdmin):
+    list_display = ("seller", "lifetime_revenue", "units_sold", "order_count", "badge_level")
+    list_filter = ("badge_level",)
+
+
+@admin.register(InstallerSchedule)
+class InstallerScheduleAdmin(admin.ModelAdmin):
+    list_display = ("installer", "work_start", "work_end", "work_days", "slot_minutes", "capacity")
@@ -1,16 +1,30 @@
 from django.urls import path
 from .api_views import (
     ProductListAPIView,
+    ProductChangesAPIView,
     OrderListCreateAPIView,
     BookingListCreateAPIView,
     ProfileAPIView,
     AdminSummaryAPIView,
+    SellerDailySalesAPIView,
+    InstallerAvailabilityAPIView,
+    InstallerSearchAPIView,
+    BookingBulkStatusAPIView,
 )
 
 urlpatterns = [
     path("products/", ProductListAPIView.as_view(), name="api-products"),
+    path("products/changes/", ProductChangesAPIView.as_view(), name="api-product-changes"),
     path("orders/", OrderListCreateAPIView.as_view(), name="api-orders"),
     path("bookings/", BookingListCreateAPIView.as_view(), name="api-bookings"),
+    path("bookings/bulk-status/", BookingBulkStatusAPIView.as_view(), name="api-bookings-bulk-status"),
     path("profile/", ProfileAPIView.as_view(), name="api-profile"),
     path("admin/summary/", AdminSummaryAPIView.as_view(), name="api-admin-summary"),
+    path("installers/", InstallerSearchAPIView.as_view(), name="api-installer-search"),
+    path(
+        "installers/<int:pk>/availability/",
+        InstallerAvailabilityAPIView.as_view(),
+        name="api-installer-availability",
+    ),
+    path("seller/sales/daily/", SellerDailySalesAPIView.as_view(), name="api-seller-daily-sales"),
 ]
@@ -1,36 +1,133 @@
-from rest_framework import generics, permissions
+import sys
+from datetime import datetime, timedelta
+
+from rest_framework import generics, permissions, serializers, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Sum
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
-from .models import Product, Order, Booking, Profile
+from . import catalog, delivery, loyalty, scheduling
+from .models import Product, Order, OrderItem, Booking, InstallerSchedule, Profile, SellerDailySales
+from .pagination import InstallerKeysetPagination, ProductKeysetPagination
 from .serializers import (
     ProductSerializer,
     OrderSerializer,
     BookingSerializer,
     ProfileSerializer,
+    InstallerLookupSerializer,
+    BookingDecisionSerializer,
+    parse_expand,
+    parse_fields,
 )
 
 
-class ProductListAPIView(generics.ListAPIView):
+class SparseFieldsViewMixin:
+    """
+    ?fields=id,name,price: the serializer keeps only those fields and the
+    query loads only the columns behind them (plus the pk and pagination
+    key). Nested serializers pull in their related table's columns.
+    """
+
+    def get_sparse_fields(self):
+        if not hasattr(self, "_sparse_fields"):
+            allowed = list(self.get_serializer_class()().fields)
+            self._sparse_fields = parse_fields(self.request.query_params.get("fields"), allowed)
+        return self._sparse_fields
+
+    def narrow(self, queryset):
+        fields = self.get_sparse_fields()
+        if not fields:
+            return queryset
+        declared = self.get_serializer_class()().fields
+        columns, joins = {"id"}, []
+        key = getattr(self.pagination_class, "key", None)
+        if key:
+            columns.add(key)
+        for name in fields:
+            field = declared[name]
+            if isinstance(field, serializers.BaseSerializer):
+                joins.append(name)
+                columns.update(f"{name}__{sub}" for sub in field.fields)
+            else:
+                columns.add(field.source)
+        queryset = queryset.select_related(None)
+        if joins:  # select_related() with no names would follow every relation
+            queryset = queryset.select_related(*joins)
+        return queryset.only(*columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.get_sparse_fields()
+        return context
+
+
+class ProductListAPIView(SparseFieldsViewMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related("seller")
     permission_classes = [permissions.AllowAny]
+    pagination_class = ProductKeysetPagination
+
+    @method_decorator(condition(etag_func=catalog.api_products_etag))
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        qs = super().get_queryset()
+        qs = self.narrow(super().get_queryset())
         brand = self.request.query_params.get("brand")
         model = self.request.query_params.get("model")
         year = self.request.query_params.get("year")
 
-        if brand:
-            qs = qs.filter(brand__iexact=brand)
-        if model:
-            qs = qs.filter(model__iexact=model)
-        if year:
-            qs = qs.filter(compatible_years__icontains=year)
+        return qs.for_vehicle(brand, model, year)
+
 
-        return qs
+class ProductChangesAPIView(APIView):
+    """
+    Change feed for partners mirroring the catalog. GET with no cursor
+    starts from the beginning; keep calling ``next`` until ``has_more`` is
+    false, store ``cursor``, and poll from it later. Each change is the
+    product as /api/products/ shows it, or a tombstone
+    ({"deleted": true, "product": null}) for a deleted one.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", ""))
+        except ValueError:
+            limit = settings.CATALOG_CHANGES_PAGE_SIZE
+        limit = max(1, min(limit, settings.CATALOG_CHANGES_MAX_PAGE_SIZE))
+
+        try:
+            batch = catalog.changes_since(request.query_params.get("cursor"), limit)
+        except ValueError:
+            raise NotFound("Invalid cursor")
+
+        context = self.get_renderer_context()
+        changes = []
+        for product, tombstone in batch.changes:
+            if tombstone is not None:
+                changes.append({"id": tombstone.product_id, "seq": tombstone.change_seq, "deleted": True, "product": None})
+            else:
+                data = ProductSerializer(product, context=context).data
+                changes.append({"id": product.id, "seq": product.change_seq, "deleted": False, "product": data})
+
+        url = replace_query_param(request.build_absolute_uri(), "cursor", batch.cursor)
+        return Response({
+            "changes": changes,
+            "cursor": batch.cursor,
+            "has_more": batch.has_more,
+            "next": url if batch.has_more else None,
+        })
 
 
 class ProfileAPIView(generics.RetrieveAPIView):
@@ -38,36 +135,217 @@ class ProfileAPIView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return Profile.objects.get(user=self.request.user)
+        # balances come from the loyalty ledger; refresh a stale snapshot first
+        loyalty.refresh_snapshot(self.request.user)
+        return self.request.user.profile
 
 
-class OrderListCreateAPIView(generics.ListCreateAPIView):
+class ExpandMixin:
+    """
+    Reads ?expand= once per request and hands it to the serializer, so
+    querysets can join exactly what the response is going to show.
+    """
+
+    def get_expand(self):
+        if not hasattr(self, "_expand"):
+            self._expand = parse_expand(self.request.query_params.get("expand"))
+        return self._expand
+
+    def product_path(self, prefix=""):
+        # the product join every row needs, plus its seller when expanded
+        return prefix + ("product__seller" if "product.seller" in self.get_expand() else "product")
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["expand"] = self.get_expand()
+        return context
+
+
+class OrderListCreateAPIView(ExpandMixin, generics.ListCreateAPIView):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        # one query for the orders, one for every line item + product
+        items = OrderItem.objects.select_related(self.product_path())
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related("user")
+            .prefetch_related(Prefetch("items", queryset=items))
+        )
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+    def filter_queryset(self, queryset):
+        # ?delivery_status=with_courier etc. (stored column, indexed)
+        stage = self.request.query_params.get("delivery_status")
+        if stage:
+            queryset = queryset.filter(delivery_status=stage)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        """
+        Honour an optional Idempotency-Key header: a retried POST with a
+        key we've already seen returns the original order (200) instead
+        of creating another one.
+        """
+        key = request.headers.get("Idempotency-Key", "").strip() or None
+        if key is not None and len(key) > 64:
+            raise ValidationError({"Idempotency-Key": "Must be at most 64 characters."})
+
+        if key is not None:
+            existing = self.get_queryset().filter(idempotency_key=key).first()
+            if existing is not None:
+                return self.replay(existing)
 
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    user=request.user,
+                    idempotency_key=key,
+                    **delivery.schedule(serializer.validated_data.get("delivery_days")),
+                )
+        except IntegrityError:
+            if key is None:
+                raise
+            # a concurrent request with the same key got there first
+            return self.replay(self.get_queryset().get(idempotency_key=key))
 
-class BookingListCreateAPIView(generics.ListCreateAPIView):
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def replay(self, order):
+        response = Response(self.get_serializer(order).data, status=status.HTTP_200_OK)
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+
+class BookingListCreateAPIView(ExpandMixin, generics.ListCreateAPIView):
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
+        bookings = Booking.objects.select_related("customer", "installer", self.product_path())
 
         if hasattr(user, "profile") and user.profile.account_type == "installer":
-            return Booking.objects.filter(installer=user)
+            return bookings.filter(installer=user)
 
-        return Booking.objects.filter(customer=user)
+        return bookings.filter(customer=user)
 
     def perform_create(self, serializer):
         serializer.save(customer=self.request.user)
 
 
+class BookingBulkStatusAPIView(APIView):
+    """
+    POST {"action": "accept"|"reject", "ids": [...]} as the installer.
+    Pending bookings move in one UPDATE; the response has a result per id
+    ("accepted"/"rejected", "skipped" with the current status, or "not_found").
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        profile = getattr(request.user, "profile", None)
+        if not profile or profile.account_type != "installer":
+            raise PermissionDenied("Installer accounts only.")
+
+        serializer = BookingDecisionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action = serializer.validated_data["action"]
+        results = scheduling.decide(request.user, serializer.validated_data["ids"], action)
+        return Response({"action": action, "results": results})
+
+
+class InstallerSearchAPIView(generics.ListAPIView):
+    """
+    Installer picker for the booking page: ?q=<prefix> (case-insensitive)
+    matched as a range scan on Profile(account_type, search_name), keyset
+    paginated. First pages of short prefixes are cached briefly since
+    every customer types the same first letters.
+    """
+    serializer_class = InstallerLookupSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = InstallerKeysetPagination
+
+    def get_prefix(self):
+        return self.request.query_params.get("q", "").strip().lower()[:150]
+
+    def get_queryset(self):
+        installers = Profile.objects.filter(account_type="installer").select_related("user")
+        prefix = self.get_prefix()
+        if prefix and prefix[-1] == chr(sys.maxunicode):
+            installers = installers.filter(search_name__startswith=prefix)  # no next character
+        elif prefix:
+            # "abc" <= name < "abd": index-friendly on any backend, unlike LIKE 'abc%'
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            installers = installers.filter(search_name__gte=prefix, search_name__lt=upper)
+        return installers
+
+    def list(self, request, *args, **kwargs):
+        prefix = self.get_prefix()
+        cacheable = (
+            len(prefix) <= settings.INSTALLER_SEARCH_CACHED_PREFIX
+            and set(request.query_params) <= {"q"}
+        )
+        cache_key = f"installer-search:{prefix}"
+        if cacheable:
+            data = cache.get(cache_key)
+            if data is not None:
+                return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if cacheable:
+            cache.set(cache_key, response.data, settings.INSTALLER_SEARCH_CACHE_SECONDS)
+        return response
+
+
+class InstallerAvailabilityAPIView(APIView):
+    """
+    Free slots for one installer, for the booking page's time picker.
+
+    ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: the next 7 days, at most
+    MAX_RANGE_DAYS). Full and past slots are left out.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    DEFAULT_DAYS = 7
+    MAX_RANGE_DAYS = 31
+
+    def get_range(self, request):
+        today = timezone.localdate()
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            start_day = datetime.strptime(start, "%Y-%m-%d").date() if start else today
+            end_day = (
+                datetime.strptime(end, "%Y-%m-%d").date() if end
+                else start_day + timedelta(days=self.DEFAULT_DAYS - 1)
+            )
+        except ValueError:
+            raise ValidationError({"detail": "Dates must be YYYY-MM-DD."})
+        if start_day > end_day or (end_day - start_day).days >= self.MAX_RANGE_DAYS:
+            raise ValidationError({"detail": f"Range must be 1–{self.MAX_RANGE_DAYS} days."})
+        return start_day, end_day
+
+    def get(self, request, pk):
+        installer = get_object_or_404(User, pk=pk, profile__account_type="installer")
+        start_day, end_day = self.get_range(request)
+        schedule = InstallerSchedule.for_installer(installer)
+        days = scheduling.free_slots(installer, start_day, end_day, schedule)
+        return Response({
+            "installer": installer.id,
+            "slot_minutes": schedule.slot_minutes,
+            "capacity": schedule.capacity,
+            "days": [
+                {
+                    "date": day.isoformat(),
+                    "slots": [{"start": t.strftime("%H:%M"), "available": left} for t, left in slots],
+                }
+                for day, slots in days
+            ],
+        })
+
+
 class AdminSummaryAPIView(APIView):
     permission_classes = [permissions.IsAdminUser]
 
@@ -82,4 +360,86 @@ class AdminSummaryAPIView(APIView):
             "total_bookings": total_bookings,
             "total_products": total_products,
             "total_users": total_users,
+            # this process's product-list table cache
+            "product_list_cache": catalog.tables.stats(),
+        })
+
+
+class SellerDailySalesAPIView(APIView):
+    """
+    Daily units/revenue/orders for the logged-in seller, read only from
+    the SellerDailySales rollup (≤ one row per product per day).
+
+    ?days=7|30|90|365 (default 30), or ?start=YYYY-MM-DD&end=YYYY-MM-DD,
+    optionally narrowed with ?product=<id>. Days without sales are zero-filled.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    ALLOWED_DAYS = (7, 30, 90, 365)
+    MAX_RANGE_DAYS = 366
+
+    def get_range(self, request):
+        start = request.query_params.get("start")
+        end = request.query_params.get("end")
+        if start or end:
+            try:
+                end_day = datetime.strptime(end, "%Y-%m-%d").date() if end else timezone.localdate()
+                start_day = datetime.strptime(start, "%Y-%m-%d").date() if start else end_day
+            except ValueError:
+                raise ValidationError({"detail": "Dates must be YYYY-MM-DD."})
+            if start_day > end_day or (end_day - start_day).days >= self.MAX_RANGE_DAYS:
+                raise ValidationError({"detail": f"Range must be 1–{self.MAX_RANGE_DAYS} days."})
+            return start_day, end_day
+
+        try:
+            days = int(request.query_params.get("days", 30))
+        except ValueError:
+            days = 0
+        if days not in self.ALLOWED_DAYS:
+            raise ValidationError({"days": f"Choose one of {list(self.ALLOWED_DAYS)}."})
+        end_day = timezone.localdate()
+        return end_day - timedelta(days=days - 1), end_day
+
+    def get(self, request):
+        profile = getattr(request.user, "profile", None)
+        if not profile or profile.account_type != "seller":
+            raise PermissionDenied("Seller accounts only.")
+
+        start_day, end_day = self.get_range(request)
+
+        rollups = SellerDailySales.objects.filter(
+            seller=request.user,
+            day__gte=start_day,
+            day__lte=end_day,
+        )
+        product_id = request.query_params.get("product")
+        if product_id:
+            if not product_id.isdigit():
+                raise ValidationError({"product": "Must be a product id."})
+            rollups = rollups.filter(product_id=int(product_id))
+
+        by_day = {
+            row["day"]: row
+            for row in (
+                rollups.values("day")
+                .annotate(units=Sum("units"), revenue=Sum("revenue"), orders=Sum("orders"))
+                .order_by("day")
+            )
+        }
+
+        series = []
+        day = start_day
+        while day <= end_day:
+            row = by_day.get(day)
+            series.append({
+                "day": day.isoformat(),
+                "units": row["units"] if row else 0,
+                "revenue": f"{row['revenue']:.2f}" if row else "0.00",
+                "orders": row["orders"] if row else 0,
+            })
+            day += timedelta(days=1)
+
+        return Response({
+            "start": start_day.isoformat(),
+            "end": end_day.isoformat(),
+            "series": series,
         })
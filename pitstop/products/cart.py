@@ -0,0 +1,115 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Cart, CartLine, StockReservation
+
+
+def get_cart(request, create=False):
+    """
+    The cart for this request: the user's own cart, or the anonymous
+    one whose id is in the session. The first time a user is seen after
+    logging in, their anonymous cart is merged into their own.
+    Returns None when there is no cart and `create` is False.
+    """
+    anon_id = request.session.get("cart_id")
+
+    if request.user.is_authenticated:
+        cart = Cart.objects.filter(user=request.user).first()
+        if anon_id:
+            anon = Cart.objects.filter(id=anon_id, user__isnull=True).first()
+            if anon is not None:
+                if cart is None:
+                    anon.user = request.user
+                    anon.save(update_fields=["user", "updated_at"])
+                    cart = anon
+                else:
+                    merge_carts(anon, cart)
+            del request.session["cart_id"]
+        if cart is None and create:
+            cart, _ = Cart.objects.get_or_create(user=request.user)
+        return cart
+
+    if anon_id:
+        cart = Cart.objects.filter(id=anon_id, user__isnull=True).first()
+        if cart is not None:
+            return cart
+    if create:
+        cart = Cart.objects.create()
+        request.session["cart_id"] = cart.id
+        return cart
+    return None
+
+
+def merge_carts(source, target):
+    """Move every line of `source` into `target` (adding quantities), then drop `source`."""
+    with transaction.atomic():
+        existing = {line.product_id: line for line in target.lines.all()}
+        bumped, moved = [], []
+        for line in source.lines.all():
+            if line.product_id in existing:
+                existing[line.product_id].quantity += line.quantity
+                bumped.append(existing[line.product_id])
+            else:
+                line.cart = target
+                moved.append(line)
+        CartLine.objects.bulk_update(bumped, ["quantity"])
+        CartLine.objects.bulk_update(moved, ["cart"])
+        source.delete()
+
+
+def add_line(cart, product, qty):
+    bumped = CartLine.objects.filter(cart=cart, product=product).update(quantity=F("quantity") + qty)
+    if bumped:
+        return
+    try:
+        with transaction.atomic():
+            CartLine.objects.create(cart=cart, product=product, quantity=qty, unit_price=product.price)
+    except IntegrityError:
+        CartLine.objects.filter(cart=cart, product=product).update(quantity=F("quantity") + qty)
+
+
+def revalidate(cart, user=None):
+    """
+    Load every line with its product in one query, refresh prices and
+    work out what's available (stock minus other customers' live holds,
+    one more grouped query). Returns (lines, notices).
+
+    Lines get `.subtotal` and `.available` attributes. Price changes
+    since the customer last saw the cart are reported once and then saved.
+    """
+    lines = list(cart.lines.select_related("product")) if cart else []
+    held = StockReservation.held_quantities([line.product_id for line in lines], exclude_user=user)
+
+    notices = []
+    repriced = []
+    for line in lines:
+        product = line.product
+        if line.unit_price != product.price:
+            notices.append(
+                f"Price of {product.name} changed from ₱{line.unit_price} to ₱{product.price}."
+            )
+            line.unit_price = product.price
+            repriced.append(line)
+
+        line.available = max(product.stock - held.get(product.id, 0), 0)
+        if line.quantity > line.available:
+            notices.append(f"Only {line.available} pcs available for {product.name}.")
+        line.subtotal = line.unit_price * line.quantity
+
+    if repriced:
+        CartLine.objects.bulk_update(repriced, ["unit_price"])
+    return lines, notices
+
+
+def checkout_snapshot(lines):
+    """The {product_id: {...}} snapshot place_order/reserve_cart work from."""
+    return {
+        str(line.product_id): {
+            "name": line.product.name,
+            "brand": line.product.brand,
+            "model": line.product.model,
+            "price": float(line.unit_price),
+            "quantity": line.quantity,
+        }
+        for line in lines
+    }
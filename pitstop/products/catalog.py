@@ -0,0 +1,299 @@
+"""
+Catalog version, conditional GET and the change feed.
+
+Anything that changes what a catalog page shows -- a product created,
+edited, deleted, restocked or sold -- bumps ``CatalogVersion`` once its
+transaction commits: ``Product.save()`` does it, deletes do it from
+signals.py, and checkout's bulk stock write and other bulk paths call
+``changed()``.
+
+Each product write is also logged in ``ProductChange``, whose id is
+stamped on the row as ``change_seq``; deletes log a tombstone there.
+
+ETags hash that version with whatever else the response depends on, so a
+revalidation reads one counter row and answers 304 without touching the
+product table. The product list's pages and rendered tables are cached
+under the same state (``product_table``); stock holds don't move the
+version and are folded into the table's key and the list's ETag instead. ``changes_since`` walks (change_seq, id)
+for partners mirroring the catalog, so a sync costs what changed, not
+the catalog.
+"""
+import hashlib
+import heapq
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+
+from .models import CatalogVersion, Product, ProductChange, StockReservation, normalize_fitment
+from .pagination import decode_cursor, encode_cursor, paginate_keyset
+
+
+def changed():
+    """Bump the catalog version when the current transaction commits (right away outside one)."""
+    transaction.on_commit(CatalogVersion.bump)
+
+
+def current(request):
+    """The CatalogVersion row, read once per request."""
+    if not hasattr(request, "_catalog_version"):
+        request._catalog_version = CatalogVersion.current()
+    return request._catalog_version
+
+
+def _etag(*parts):
+    return hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+def product_list_etag(request):
+    """
+    The HTML list also shows the visitor's saved car and the page's stock
+    net of other customers' live holds. Holds don't move the catalog
+    version, so the page's availability is part of the tag.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return None
+    user = request.user
+    saved_car = ()
+    if user.is_authenticated:
+        profile = getattr(user, "profile", None)
+        if profile:
+            saved_car = (profile.saved_car_brand, profile.saved_car_model, profile.saved_car_year)
+    return _etag(
+        "list",
+        product_page(request).key,
+        user.pk,
+        saved_car,
+        request.get_full_path(),
+        sorted(availability(request).items()),
+    )
+
+
+def product_detail_etag(request, pk):
+    return _etag("detail", current(request).version, pk)
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return current(request).updated_at
+
+
+def api_products_etag(request, *args, **kwargs):
+    # per filter/page/fields and per representation; the browsable API shows the user
+    return _etag(
+        "api",
+        current(request).version,
+        request.user.pk,
+        request.get_host(),
+        request.get_full_path(),
+        request.headers.get("Accept", ""),
+    )
+
+
+def list_queryset(brand, model, year):
+    """The product list's rows for a vehicle filter, with each seller's badge (one join)."""
+    return Product.objects.for_vehicle(brand, model, year).select_related("seller").annotate(
+        badge_level=Coalesce("seller__seller_stats__badge_level", Value("none"))
+    )
+
+
+def _list_params(request):
+    params = request.GET
+    return (
+        params.get("car_brand", "").strip(),
+        params.get("car_model", "").strip(),
+        params.get("car_year", "").strip(),
+        params.get("cursor"),
+    )
+
+
+class TableCache:
+    """
+    Product-list pages and their rendered tables.
+
+    A page (the rows and pager cursors for one filter/cursor) is keyed by
+    the normalized filters, cursor and catalog version, so every write the
+    rows reflect moves the key. A rendered table is keyed by its page plus
+    the availability shown for each row: stock holds come and go without
+    touching the version, and visitors who see the same numbers share one
+    render. Stale entries are never asked for again and age out of the
+    cache. Hit/miss counters are per process and count rendered tables.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.PRODUCT_LIST_CACHE]
+
+    def page_key(self, request, brand, model, year, cursor):
+        version = current(request)
+        try:
+            position = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            position = None  # the view falls back to the first page
+        return "product-page:" + _etag(
+            version.version,
+            version.updated_at.isoformat(),
+            normalize_fitment(brand),
+            normalize_fitment(model),
+            (year or "").strip(),
+            sorted(position.items()) if position else "",
+        )
+
+    def table_key(self, page, available):
+        return "product-table:" + _etag(page.key, sorted(available.items()))
+
+    def get_or_set(self, key, build):
+        """The cached value for key, or build() stored under it."""
+        value = self.cache.get(key)
+        if value is None:
+            value = build()
+            self.cache.set(key, value, settings.PRODUCT_LIST_CACHE_SECONDS)
+        return value
+
+    def get_or_render(self, key, render):
+        """A rendered table from the cache, or from render() and stored; counted."""
+        html = self.cache.get(key)
+        if html is not None:
+            self.hits += 1
+            return html
+        self.misses += 1
+        html = render()
+        self.cache.set(key, html, settings.PRODUCT_LIST_CACHE_SECONDS)
+        return html
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+tables = TableCache()
+
+
+class ListPage:
+    def __init__(self, key, products, next_cursor, previous_cursor):
+        self.key = key
+        self.products = products
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def product_page(request):
+    """
+    The product list page for the request's filters and cursor, read once
+    per request and shared between visitors through the cache.
+    """
+    if not hasattr(request, "_product_page"):
+        brand, model, year, cursor = _list_params(request)
+        key = tables.page_key(request, brand, model, year, cursor)
+
+        def build():
+            queryset = list_queryset(brand, model, year)
+            try:
+                page = paginate_keyset(queryset, cursor)
+            except ValueError:
+                page = paginate_keyset(queryset)
+            return ListPage(key, page.items, page.next_cursor, page.previous_cursor)
+
+        request._product_page = tables.get_or_set(key, build)
+    return request._product_page
+
+
+def availability(request):
+    """
+    {product id: stock minus other customers' live holds} for the page's
+    rows, read once per request with one grouped query on the holds.
+    A visitor's own holds count as available to them.
+    """
+    if not hasattr(request, "_availability"):
+        products = product_page(request).products
+        held = StockReservation.held_quantities(
+            [p.id for p in products],
+            exclude_user=request.user if request.user.is_authenticated else None,
+        )
+        request._availability = {p.id: max(p.stock - held.get(p.id, 0), 0) for p in products}
+    return request._availability
+
+
+def product_table(request):
+    """The product list's table fragment and pager cursors: (html, next_cursor, previous_cursor)."""
+    page = product_page(request)
+    available = availability(request)
+
+    def render():
+        for p in page.products:
+            p.available = available[p.id]
+        return render_to_string("products/product_table.html", {"products": page.products})
+
+    html = tables.get_or_render(tables.table_key(page, available), render)
+    return html, page.next_cursor, page.previous_cursor
+
+
+class ChangeBatch:
+    def __init__(self, changes, cursor, has_more):
+        self.changes = changes  # [(product or None, tombstone or None), ...]
+        self.cursor = cursor
+        self.has_more = has_more
+
+
+def changes_since(cursor=None, limit=None):
+    """
+    Up to ``limit`` products and tombstones written after ``cursor``, in
+    (change_seq, product id) order, read with one seek query per table.
+
+    Sequence numbers are handed out when a write starts, not when it
+    commits, so a later number can become visible first. The feed only
+    goes up to ``ProductChange.horizon()``: numbers allocated at least
+    CATALOG_CHANGES_LAG_SECONDS ago, by which time any write holding a
+    lower one has committed. Recent changes simply show up a poll later.
+
+    The returned cursor always points at the last row handed out (or
+    stays put when caught up), so a partner can keep polling from it.
+    A product edited again since appears once, at its latest position.
+    Raises ValueError for a malformed cursor.
+    """
+    limit = limit or settings.CATALOG_CHANGES_PAGE_SIZE
+    seq, last_id = 0, 0
+    if cursor:
+        position = decode_cursor(cursor)
+        seq, last_id = int(position["n"]), position["i"]
+    horizon = ProductChange.horizon(settings.CATALOG_CHANGES_LAG_SECONDS)
+
+    products = (
+        Product.objects.select_related("seller")
+        .filter(Q(change_seq__gt=seq) | Q(change_seq=seq, id__gt=last_id), change_seq__lte=horizon)
+        .order_by("change_seq", "id")[: limit + 1]
+    )
+    tombstones = (
+        ProductChange.objects
+        .filter(deleted=True, id__gt=seq, id__lte=horizon)
+        .order_by("id")[: limit + 1]
+    )
+    merged = list(heapq.merge(
+        ((p.change_seq, p.id, p, None) for p in products),
+        ((t.change_seq, t.product_id, None, t) for t in tombstones),
+        key=lambda row: row[:2],
+    ))
+    has_more = len(merged) > limit
+    rows = merged[:limit]
+    if rows:
+        seq, last_id = rows[-1][:2]
+    return ChangeBatch(
+        [(product, tombstone) for _, _, product, tombstone in rows],
+        _encode_position(seq, last_id),
+        has_more,
+    )
+
+
+def _encode_position(seq, product_id):
+    return encode_cursor(SimpleNamespace(change_seq=seq, id=product_id), key="change_seq")
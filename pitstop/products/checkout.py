@@ -0,0 +1,145 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import catalog
+from .models import (
+    Order,
+    OrderItem,
+    Product,
+    ProductChange,
+    SellerDailySales,
+    SellerStats,
+    StockReservation,
+)
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product, requested, available):
+        self.product = product
+        self.requested = requested
+        self.available = available
+        super().__init__(
+            f"Only {available} pcs available for {product.name} "
+            f"(you asked for {requested})."
+        )
+
+
+def _check_available(user, products, quantities):
+    """Raise InsufficientStock unless every line fits in stock minus other people's holds."""
+    held = StockReservation.held_quantities(list(products), exclude_user=user)
+    for product_id, qty in quantities.items():
+        product = products.get(product_id)
+        if product is None:
+            continue
+        available = max(product.stock - held.get(product_id, 0), 0)
+        if available < qty:
+            raise InsufficientStock(product, qty, available)
+
+
+def reserve_cart(user, cart):
+    """
+    Put a TTL hold on every cart line when checkout starts, replacing
+    any holds this user already had. Raises InsufficientStock if a line
+    can't be held.
+    """
+    expires_at = timezone.now() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES)
+    quantities = {int(product_id): item["quantity"] for product_id, item in cart.items()}
+
+    with transaction.atomic():
+        products = Product.objects.select_for_update().in_bulk(list(quantities))
+        _check_available(user, products, quantities)
+
+        StockReservation.objects.filter(user=user).delete()
+        StockReservation.objects.bulk_create(
+            StockReservation(user=user, product_id=product_id, quantity=qty, expires_at=expires_at)
+            for product_id, qty in quantities.items()
+            if product_id in products
+        )
+    return expires_at
+
+
+def release_reservations(user):
+    StockReservation.objects.filter(user=user).delete()
+
+
+def place_order(user, cart, **order_fields):
+    """
+    Commit a checkout: the Order, its items, stock decrements and seller
+    stats/rollups all happen in one transaction.
+
+    Cart lines are fetched with one locked IN query and stock is written
+    back with one bulk UPDATE. The user's own holds count towards what
+    they may buy; other customers' live holds don't. If any line asks
+    for more than that, InsufficientStock is raised and nothing is written.
+    An ``idempotency_key`` already used by this user raises IntegrityError;
+    callers replay the existing order.
+    Lines whose product has since been deleted are still recorded,
+    just without a product link.
+    """
+    with transaction.atomic():
+        # inserted first: a retry with the same idempotency_key waits here on the
+        # unique index and gets IntegrityError once the original commits, instead
+        # of queueing for the stock locks and finding the stock already gone
+        order = Order.objects.create(user=user, **order_fields)
+        day = timezone.localdate(order.created_at)
+
+        quantities = {int(product_id): item["quantity"] for product_id, item in cart.items()}
+        products = Product.objects.select_for_update().in_bulk(list(quantities))
+
+        _check_available(user, products, quantities)
+
+        items = []
+        # one rollup upsert per (seller, product, day) and one stats upsert
+        # per seller, however many lines point at them
+        sales_by_product = defaultdict(lambda: [Decimal("0"), 0])
+
+        for product_id, item in cart.items():
+            product = products.get(int(product_id))
+            unit_price = Decimal(str(item["price"]))
+            qty = item["quantity"]
+
+            items.append(OrderItem(
+                order=order,
+                product=product,
+                seller_id=product.seller_id if product is not None else None,
+                product_name=item["name"],
+                brand=item.get("brand", ""),
+                model=item.get("model", ""),
+                unit_price=unit_price,
+                quantity=qty,
+            ))
+
+            if product is not None:
+                product.stock -= qty
+                sales_by_product[product.id][0] += unit_price * qty
+                sales_by_product[product.id][1] += qty
+
+        # bulk_update skips Product.save(), so log and stamp the change here
+        now, seqs = timezone.now(), ProductChange.record(list(products))
+        for product in products.values():
+            product.updated_at = now
+            product.change_seq = seqs[product.id]
+        Product.objects.bulk_update(list(products.values()), ["stock", "updated_at", "change_seq"])
+        OrderItem.objects.bulk_create(items)
+        catalog.changed()
+
+        # the holds are now real decrements
+        release_reservations(user)
+
+        # ----- keep daily rollups and per-seller badge stats in step -----
+        # (in key order, so concurrent checkouts lock the rows in the same order)
+        sales_by_seller = defaultdict(lambda: [Decimal("0"), 0])
+        for product_id, (revenue, units) in sorted(sales_by_product.items()):
+            product = products[product_id]
+            SellerDailySales.record_sale(product, day, revenue, units)
+            sales_by_seller[product.seller_id][0] += revenue
+            sales_by_seller[product.seller_id][1] += units
+        for seller_id, (revenue, units) in sorted(sales_by_seller.items()):
+            SellerStats.record_sale(seller_id, revenue, units)
+
+    return order
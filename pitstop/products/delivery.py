@@ -0,0 +1,77 @@
+"""
+Delivery stage scheduling.
+
+The stage of an order used to be derived from ``created_at`` and
+``delivery_days`` on every render.  It is now stored on the order
+(``Order.delivery_status``) so it can be filtered and counted in SQL;
+``schedule`` fills in the planned dates when an order is placed and
+``advance_due`` moves every order whose next stage is due with one
+UPDATE per stage.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Order
+
+
+def schedule(delivery_days, today=None):
+    """
+    Order fields for a delivery window of ``delivery_days``: packed on
+    the day it's placed, with the courier from the next day, out for
+    delivery the day before the ETA and delivered on the ETA.
+    """
+    if not delivery_days:
+        return {"delivery_days": 0, "delivery_eta": None, "delivery_status": Order.AWAITING}
+    today = today or timezone.now().date()
+    return {
+        "delivery_days": delivery_days,
+        "delivery_eta": today + timedelta(days=delivery_days),
+        "out_for_delivery_on": today + timedelta(days=max(delivery_days - 1, 1)),
+        "delivery_status": Order.PACKING,
+        "delivery_updated_at": timezone.now(),
+    }
+
+
+def advance_due(now=None):
+    """
+    Move every due order forward.  Stages are applied latest-first, so an
+    order that was missed for a few days jumps straight to where it
+    should be; timestamps of the stages it skipped are filled in too.
+    Returns {status: rows updated}.
+    """
+    now = now or timezone.now()
+    today = now.date()
+    start_of_today = datetime.combine(today, time.min, tzinfo=now.tzinfo)
+
+    moved = {}
+    moved[Order.DELIVERED] = Order.objects.filter(
+        delivery_status__in=[Order.PACKING, Order.WITH_COURIER, Order.OUT_FOR_DELIVERY],
+        delivery_eta__lte=today,
+    ).update(
+        delivery_status=Order.DELIVERED,
+        shipped_at=Coalesce(F("shipped_at"), now),
+        out_for_delivery_at=Coalesce(F("out_for_delivery_at"), now),
+        delivered_at=now,
+        delivery_updated_at=now,
+    )
+    moved[Order.OUT_FOR_DELIVERY] = Order.objects.filter(
+        delivery_status__in=[Order.PACKING, Order.WITH_COURIER],
+        out_for_delivery_on__lte=today,
+    ).update(
+        delivery_status=Order.OUT_FOR_DELIVERY,
+        shipped_at=Coalesce(F("shipped_at"), now),
+        out_for_delivery_at=now,
+        delivery_updated_at=now,
+    )
+    moved[Order.WITH_COURIER] = Order.objects.filter(
+        delivery_status=Order.PACKING,
+        created_at__lt=start_of_today,
+    ).update(
+        delivery_status=Order.WITH_COURIER,
+        shipped_at=now,
+        delivery_updated_at=now,
+    )
+    return moved
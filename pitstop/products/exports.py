@@ -0,0 +1,114 @@
+"""
+Streaming order-history exports (CSV / NDJSON).
+
+Rows come from one ``values_list`` query read with ``.iterator()``, are
+formatted a batch at a time and handed to ``StreamingHttpResponse``, so
+memory stays flat however many line items an account has.
+"""
+import csv
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import OrderItem, line_total
+
+CENT = Decimal("0.01")
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNS = [
+    ("order_id", "order_id"),
+    ("placed_at", "order__created_at"),
+    ("payment_method", "order__payment_method"),
+    ("voucher_code", "order__voucher_code"),
+    ("delivery_status", "order__delivery_status"),
+    ("product", "product_name"),
+    ("brand", "brand"),
+    ("model", "model"),
+    ("unit_price", "unit_price"),
+    ("quantity", "quantity"),
+    ("line_total", "line_total"),
+]
+HEADER = [name for name, _ in COLUMNS]
+
+# lines per chunk written to the response
+BATCH_ROWS = 500
+
+
+def parse_range(start, end):
+    """
+    (from, to) aware datetimes for inclusive YYYY-MM-DD bounds, either of
+    which may be blank. Raises ValueError for malformed or reversed dates.
+    """
+    tz = timezone.get_current_timezone()
+    start_day = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+    end_day = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+    if start_day and end_day and start_day > end_day:
+        raise ValueError("start is after end")
+    return (
+        datetime.combine(start_day, time.min, tzinfo=tz) if start_day else None,
+        datetime.combine(end_day + timedelta(days=1), time.min, tzinfo=tz) if end_day else None,
+    )
+
+
+def line_items(since=None, until=None, **filters):
+    """Flat line-item rows (tuples in COLUMNS order), oldest order first."""
+    items = OrderItem.objects.filter(**filters)
+    if since:
+        items = items.filter(order__created_at__gte=since)
+    if until:
+        items = items.filter(order__created_at__lt=until)
+    rows = (
+        items.annotate(line_total=line_total())
+        .order_by("order__created_at", "order_id", "id")
+        .values_list(*[field for _, field in COLUMNS])
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    # SQLite hands computed decimals back unscaled (500 rather than 500.00)
+    return (row[:-1] + (row[-1].quantize(CENT),) for row in rows)
+
+
+class _Echo:
+    """File-like object for csv.writer that hands back the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _batched(lines):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= BATCH_ROWS:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(HEADER)
+        for row in rows:
+            yield writer.writerow(row)
+
+    return _batched(lines())
+
+
+def stream_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    return _batched(encoder.encode(dict(zip(HEADER, row))) + "\n" for row in rows)
+
+
+STREAMERS = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+}
@@ -1,63 +1,168 @@
-from django import forms
-from .models import Product, Booking
-from django.contrib.auth.forms import UserCreationForm
-from django.contrib.auth.models import User
-
-from .models import Product
-
-
-class SignUpForm(UserCreationForm):
-    ACCOUNT_CHOICES = (
-        ("customer", "Customer"),
-        ("seller", "Seller"),
-        ("installer", "Installer / Service Provider"),
-    )
-
-    account_type = forms.ChoiceField(
-        choices=ACCOUNT_CHOICES,
-        widget=forms.RadioSelect,
-        label="I am signing up as",
-    )
-
-    class Meta:
-        model = User
-        fields = ("username", "password1", "password2", "account_type")
-
-
-class SellerProductForm(forms.ModelForm):
-    class Meta:
-        model = Product
-        fields = ["name", "brand", "model", "compatible_years", "price", "stock", "image"]
-
-class BookingForm(forms.ModelForm):
-    class Meta:
-        model = Booking
-        fields = [
-            "installer",
-            "car_brand",
-            "car_model",
-            "car_year",
-            "scheduled_date",
-            "scheduled_time",
-        ]
-        widgets = {
-            "scheduled_date": forms.DateInput(
-                attrs={
-                    "type": "date",      # 👈 this makes the calendar appear
-                }
-            ),
-            "scheduled_time": forms.TimeInput(
-                attrs={
-                    "type": "time",      # 👈 this gives a time picker
-                }
-            ),
-        }
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields["installer"].queryset = User.objects.filter(
-            profile__account_type="installer"
-        )
-
-
-
+import calendar
+
+from django import forms
+from .models import (
+    FITMENT_MAX_RANGE,
+    Product,
+    Booking,
+    InstallerSchedule,
+    fitment_year_window,
+    out_of_range_years,
+    parse_years,
+)
+from .scheduling import check_slot
+from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from .models import Product
+
+
+class SignUpForm(UserCreationForm):
+    ACCOUNT_CHOICES = (
+        ("customer", "Customer"),
+        ("seller", "Seller"),
+        ("installer", "Installer / Service Provider"),
+    )
+
+    account_type = forms.ChoiceField(
+        choices=ACCOUNT_CHOICES,
+        widget=forms.RadioSelect,
+        label="I am signing up as",
+    )
+
+    class Meta:
+        model = User
+        fields = ("username", "password1", "password2", "account_type")
+
+
+class SellerProductForm(forms.ModelForm):
+    class Meta:
+        model = Product
+        fields = ["name", "brand", "model", "compatible_years", "price", "stock", "image"]
+        help_texts = {
+            "compatible_years": "Comma-separated years or ranges, e.g. 2016, 2018-2020",
+        }
+
+    def clean_compatible_years(self):
+        raw = self.cleaned_data.get("compatible_years", "")
+        bad = out_of_range_years(raw)
+        if bad:
+            first, last = fitment_year_window()
+            raise forms.ValidationError(
+                f"Years must be between {first} and {last}, with ranges of at most "
+                f"{FITMENT_MAX_RANGE} years (check {', '.join(bad)})."
+            )
+        if raw.strip() and not parse_years(raw):
+            raise forms.ValidationError("Enter years like 2018 or ranges like 2016-2020.")
+        return raw
+
+class InstallerPicker(forms.Widget):
+    """
+    Hidden installer id plus a search box that fills it from
+    /api/installers/?q= (script in book_installation.html), instead of a
+    <select> listing every installer.
+    """
+    template_name = "products/widgets/installer_picker.html"
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        label = ""
+        if value not in (None, "") and str(value).isdigit():
+            label = (
+                User.objects.filter(pk=value, profile__account_type="installer")
+                .values_list("username", flat=True)
+                .first()
+            ) or ""
+        context["widget"]["selected_label"] = label
+        context["widget"]["lookup_url"] = reverse("api-installer-search")
+        return context
+
+    def id_for_label(self, id_):
+        return f"{id_}_search" if id_ else id_
+
+
+class BookingForm(forms.ModelForm):
+    class Meta:
+        model = Booking
+        fields = [
+            "installer",
+            "car_brand",
+            "car_model",
+            "car_year",
+            "scheduled_date",
+            "scheduled_time",
+        ]
+        widgets = {
+            "installer": InstallerPicker(),
+            "scheduled_date": forms.DateInput(
+                attrs={
+                    "type": "date",      # 👈 this makes the calendar appear
+                }
+            ),
+            "scheduled_time": forms.TimeInput(
+                attrs={
+                    "type": "time",      # 👈 this gives a time picker
+                }
+            ),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # only used to validate the submitted id (one lookup), never rendered as choices
+        self.fields["installer"].queryset = User.objects.filter(
+            profile__account_type="installer"
+        )
+
+    def clean(self):
+        cleaned = super().clean()
+        installer = cleaned.get("installer")
+        day = cleaned.get("scheduled_date")
+        t = cleaned.get("scheduled_time")
+        if installer and day and t:
+            # capacity itself is enforced when the booking is claimed (products.scheduling.claim)
+            self.schedule = InstallerSchedule.for_installer(installer)
+            problem = check_slot(self.schedule, day, t)
+            if problem:
+                self.add_error("scheduled_time", problem)
+        return cleaned
+
+
+class InstallerScheduleForm(forms.ModelForm):
+    work_days = forms.MultipleChoiceField(
+        choices=[(str(i), name) for i, name in enumerate(calendar.day_abbr)],
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    class Meta:
+        model = InstallerSchedule
+        fields = ["work_start", "work_end", "work_days", "slot_minutes", "capacity"]
+        widgets = {
+            "work_start": forms.TimeInput(attrs={"type": "time"}),
+            "work_end": forms.TimeInput(attrs={"type": "time"}),
+        }
+        help_texts = {
+            "slot_minutes": "Length of one installation slot.",
+            "capacity": "How many jobs you can take in the same slot.",
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial["work_days"] = list(self.instance.work_days)
+
+    def clean_work_days(self):
+        return "".join(sorted(self.cleaned_data["work_days"]))
+
+    def clean(self):
+        cleaned = super().clean()
+        start, end, length = cleaned.get("work_start"), cleaned.get("work_end"), cleaned.get("slot_minutes")
+        if length is not None and not 15 <= length <= 480:
+            self.add_error("slot_minutes", "Use a slot between 15 and 480 minutes.")
+        elif start and end and length and (end.hour * 60 + end.minute) - (start.hour * 60 + start.minute) < length:
+            self.add_error("work_end", "Working hours must fit at least one slot.")
+        if cleaned.get("capacity") == 0:
+            self.add_error("capacity", "Capacity must be at least 1.")
+        return cleaned
+
+
+
@@ -0,0 +1,150 @@
+"""
+Push delivery-stage changes to open tracking pages.
+
+One ``DeliveryNotifier`` per process owns a single poller thread.  While
+anyone is subscribed it asks the database every
+``LIVE_TRACKING_POLL_SECONDS`` for orders whose ``delivery_updated_at``
+moved, and fans the changes out to the subscribers of those orders'
+owners.  Connections themselves never touch the database while idle, so
+the cost is one indexed query per interval per process no matter how
+many pages are open.
+
+Subscribers live on an asyncio loop (the SSE stream or a long-poll
+request); the poller hands events over with ``call_soon_threadsafe``, so
+this works under ASGI and under runserver's per-request loops alike.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# re-read this far behind the cursor so a transaction that committed late
+# is still picked up; (order, status) pairs already sent are skipped
+LOOKBACK = timedelta(seconds=5)
+
+# past this many subscribed users, filter in Python instead of a huge IN ()
+MAX_USER_FILTER = 500
+
+
+def order_event(order_id, status, changed_at=None):
+    return {
+        "order": order_id,
+        "status": status,
+        "label": dict(Order.DELIVERY_STATUS_CHOICES).get(status, status),
+        "changed_at": changed_at.isoformat() if changed_at else None,
+    }
+
+
+class Subscription:
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def push(self, event):
+        # called from the poller thread
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+    async def next(self, timeout):
+        """The next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class DeliveryNotifier:
+    def __init__(self, interval=None):
+        self.interval = interval
+        self.polls = 0
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._thread = None
+        self._cursor = None
+        self._sent = {}
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, user_id):
+        sub = Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers[user_id].add(sub)
+            if self._thread is None:
+                self._cursor = timezone.now()
+                self._thread = threading.Thread(target=self._run, name="delivery-notifier", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, ()))
+        for sub in targets:
+            sub.push(event)
+
+    def poll_once(self):
+        """Fetch status changes since the cursor and fan them out. Returns the count sent."""
+        with self._lock:
+            user_ids = list(self._subscribers)
+        if not user_ids:
+            return 0
+
+        changed = Order.objects.filter(delivery_updated_at__gt=self._cursor - LOOKBACK)
+        if len(user_ids) <= MAX_USER_FILTER:
+            changed = changed.filter(user_id__in=user_ids)
+        rows = changed.values_list("id", "user_id", "delivery_status", "delivery_updated_at")
+        self.polls += 1
+
+        watching = set(user_ids)
+        sent = 0
+        for order_id, user_id, status, changed_at in rows:
+            self._cursor = max(self._cursor, changed_at)
+            if user_id not in watching or self._sent.get(order_id) == (status, changed_at):
+                continue
+            self._sent[order_id] = (status, changed_at)
+            self.publish(user_id, order_event(order_id, status, changed_at))
+            sent += 1
+
+        horizon = self._cursor - LOOKBACK
+        self._sent = {k: v for k, v in self._sent.items() if v[1] >= horizon}
+        return sent
+
+    def _run(self):
+        interval = self.interval or settings.LIVE_TRACKING_POLL_SECONDS
+        try:
+            while True:
+                time.sleep(interval)
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                close_old_connections()
+                try:
+                    self.poll_once()
+                except Exception:
+                    # a failed poll (DB restart etc.) is retried next interval
+                    logger.exception("delivery notifier poll failed")
+        finally:
+            connection.close()
+
+
+notifier = DeliveryNotifier()
@@ -0,0 +1,175 @@
+"""
+Loyalty balances backed by the LoyaltyEntry ledger.
+
+Checkout appends SPEND / REDEEM / GRANT rows; nothing does a
+read-modify-write on Profile. A user's balances are one aggregate query
+over their ledger (current_state), and refresh_snapshot() copies them
+onto Profile for code and templates that read the profile directly.
+`manage.py verify_loyalty` re-aggregates the whole ledger to check (and
+optionally fix) every snapshot.
+"""
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import LoyaltyEntry
+from .pricing import EXTRA_VOUCHER_BLOCK, EXTRA_VOUCHER_THRESHOLD, VOUCHER_RULES
+
+EXTRA_VOUCHER_CODE = "P250"
+ONE_TIME_FLAGS = {
+    code: rule.used_flag for code, rule in VOUCHER_RULES.items() if rule.used_flag
+}
+SNAPSHOT_FIELDS = [
+    "total_spent",
+    "voucher_5_used",
+    "voucher_10_used",
+    "voucher_20_used",
+    "extra_voucher_balance",
+    "extra_vouchers_earned",
+]
+
+
+class VoucherUnavailable(Exception):
+    pass
+
+
+@dataclass
+class LoyaltyState:
+    """Same attribute names as Profile, so pricing rules work on either."""
+    user_id: int
+    total_spent: Decimal = Decimal("0")
+    voucher_5_used: bool = False
+    voucher_10_used: bool = False
+    voucher_20_used: bool = False
+    extra_vouchers_earned: int = 0
+    extra_vouchers_redeemed: int = 0
+
+    @property
+    def extra_voucher_balance(self):
+        return max(self.extra_vouchers_earned - self.extra_vouchers_redeemed, 0)
+
+    def blocks_earned(self):
+        if self.total_spent <= EXTRA_VOUCHER_THRESHOLD:
+            return 0
+        return int((self.total_spent - EXTRA_VOUCHER_THRESHOLD) // EXTRA_VOUCHER_BLOCK)
+
+    def differs_from(self, profile):
+        return any(getattr(profile, field) != getattr(self, field) for field in SNAPSHOT_FIELDS)
+
+
+def ledger_totals(prefix=""):
+    """
+    Aggregate expressions for one ledger's balances; ``prefix`` is the
+    path to LoyaltyEntry when aggregating from another model (e.g.
+    "user__loyalty_entries__" from Profile). Read with state_from_totals().
+    """
+    def path(lookup):
+        return prefix + lookup
+
+    redeemed = Q(**{path("kind"): LoyaltyEntry.REDEEM})
+    return {
+        "spent": Coalesce(Sum(path("amount"), filter=Q(**{path("kind"): LoyaltyEntry.SPEND})), Decimal("0")),
+        "granted": Count(path("id"), filter=Q(**{path("kind"): LoyaltyEntry.GRANT})),
+        "redeemed_extra": Count(path("id"), filter=redeemed & Q(**{path("voucher_code"): EXTRA_VOUCHER_CODE})),
+        **{
+            f"used_{code}": Count(path("id"), filter=redeemed & Q(**{path("voucher_code"): code}))
+            for code in ONE_TIME_FLAGS
+        },
+    }
+
+
+def state_from_totals(user_id, totals):
+    state = LoyaltyState(
+        user_id=user_id,
+        total_spent=totals["spent"],
+        extra_vouchers_earned=totals["granted"],
+        extra_vouchers_redeemed=totals["redeemed_extra"],
+    )
+    for code, flag in ONE_TIME_FLAGS.items():
+        setattr(state, flag, totals[f"used_{code}"] > 0)
+    return state
+
+
+def current_state(user):
+    """Balances straight from the ledger, in one aggregate query."""
+    return state_from_totals(user.pk, LoyaltyEntry.objects.filter(user=user).aggregate(**ledger_totals()))
+
+
+def grant_due(user, state):
+    """Insert any ₱250 voucher grants `state` has earned but the ledger doesn't show yet."""
+    due = range(state.extra_vouchers_earned + 1, state.blocks_earned() + 1)
+    if not due:
+        return
+    LoyaltyEntry.objects.bulk_create(
+        [
+            LoyaltyEntry(user=user, kind=LoyaltyEntry.GRANT, voucher_code=EXTRA_VOUCHER_CODE, slot=slot)
+            for slot in due
+        ],
+        ignore_conflicts=True,  # a concurrent order may have granted the same slot
+    )
+    state.extra_vouchers_earned = state.blocks_earned()
+
+
+def record_spend(user, amount, order=None):
+    """Append a spend entry and any voucher grants it unlocks. Call inside the checkout transaction."""
+    LoyaltyEntry.objects.create(user=user, kind=LoyaltyEntry.SPEND, amount=amount, order=order)
+    grant_due(user, current_state(user))
+
+
+def redeem(user, code, order=None):
+    """
+    Append a redemption for `code`. Raises VoucherUnavailable if the
+    voucher isn't (or is no longer) available, including when a
+    concurrent checkout redeemed it first.
+    """
+    rule = VOUCHER_RULES.get(code)
+    if rule is None:
+        return
+    state = current_state(user)
+    if not rule.is_available(state):
+        raise VoucherUnavailable(code)
+
+    slot = None
+    if code == EXTRA_VOUCHER_CODE:
+        taken = set(
+            LoyaltyEntry.objects
+            .filter(user=user, kind=LoyaltyEntry.REDEEM, voucher_code=code)
+            .values_list("slot", flat=True)
+        )
+        # empty if a concurrent checkout took the last one since current_state()
+        slot = min(set(range(1, state.extra_vouchers_earned + 1)) - taken, default=None)
+        if slot is None:
+            raise VoucherUnavailable(code)
+
+    try:
+        with transaction.atomic():
+            LoyaltyEntry.objects.create(
+                user=user, kind=LoyaltyEntry.REDEEM, voucher_code=code, slot=slot, order=order,
+            )
+    except IntegrityError:
+        raise VoucherUnavailable(code)
+
+
+def write_snapshot(profile, state):
+    for field in SNAPSHOT_FIELDS:
+        setattr(profile, field, getattr(state, field))
+    profile.loyalty_synced_at = timezone.now()
+    profile.save(update_fields=SNAPSHOT_FIELDS + ["loyalty_synced_at"])
+
+
+def refresh_snapshot(user):
+    """
+    On-read snapshot: compute balances from the ledger, top up any
+    missed grants, and write them onto the Profile only if they changed.
+    Returns the LoyaltyState.
+    """
+    state = current_state(user)
+    grant_due(user, state)
+    profile = user.profile
+    if state.differs_from(profile):
+        write_snapshot(profile, state)
+    return state
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from products.delivery import advance_due
+
+
+class Command(BaseCommand):
+    help = "Advance orders whose next delivery stage is due. Run from cron (hourly is plenty)."
+
+    def handle(self, *args, **options):
+        moved = advance_due()
+        summary = ", ".join(f"{count} → {status}" for status, count in moved.items())
+        self.stdout.write(self.style.SUCCESS(f"Advanced deliveries: {summary}."))
@@ -0,0 +1,79 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from products.api_views import ProductListAPIView
+from products.models import Product
+from products.renderers import MessagePackRenderer
+
+SELLER = "bench-api-seller"
+MOBILE_FIELDS = "id,name,price,stock"
+
+
+class Command(BaseCommand):
+    help = (
+        "Payload size and serialization time per 1,000 products for /api/products/: "
+        "full vs ?fields= sparse, JSON vs MessagePack. Creates throwaway products "
+        "and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        n = options["products"]
+        User.objects.filter(username=SELLER).delete()
+        seller = User.objects.create(username=SELLER, email="bench@example.com")
+        Product.objects.bulk_create(
+            Product(
+                seller=seller,
+                name=f"Bench brake pad {i:05}",
+                brand="Toyota",
+                model="Vios",
+                compatible_years="2014,2015,2016,2017,2018,2019",
+                price=Decimal("1499.00") + i,
+                stock=i % 50,
+            )
+            for i in range(n)
+        )
+        try:
+            self.stdout.write(f"{n} products, median of {options['repeat']} runs, scaled per 1,000")
+            for fields in ("", MOBILE_FIELDS):
+                for renderer in (JSONRenderer(), MessagePackRenderer()):
+                    self.run(seller, n, fields, renderer, options["repeat"])
+        finally:
+            User.objects.filter(username=SELLER).delete()
+
+    def serialize(self, seller, n, fields):
+        """What ProductListAPIView does for a page, minus pagination: query + serializer."""
+        view = ProductListAPIView()
+        view.request = Request(APIRequestFactory().get("/", {"fields": fields} if fields else {}))
+        view.format_kwarg = None
+        products = view.get_queryset().filter(seller=seller)[:n]
+        return view.get_serializer(products, many=True).data
+
+    def run(self, seller, n, fields, renderer, repeat):
+        build, render, size = [], [], 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = self.serialize(seller, n, fields)
+            middle = time.perf_counter()
+            body = renderer.render(data)
+            build.append(middle - start)
+            render.append(time.perf_counter() - middle)
+            size = len(body)
+
+        per_k = 1000 / n
+        label = f"{'?fields=' + fields if fields else 'all fields'} / {renderer.format}"
+        self.stdout.write(
+            f"{label:<38} {size * per_k / 1024:8.1f} KiB   "
+            f"query+serialize {statistics.median(build) * 1000 * per_k:7.2f} ms   "
+            f"render {statistics.median(render) * 1000 * per_k:6.2f} ms"
+        )
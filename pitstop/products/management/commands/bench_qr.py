@@ -0,0 +1,67 @@
+import base64
+import statistics
+import time
+from io import BytesIO
+
+import qrcode
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from products import qr
+
+
+def inline_data_url(payload):
+    """What mock_payment used to do on every GET."""
+    img = qrcode.make(payload)
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def cached_url(payload, fmt, user_id=1):
+    """What mock_payment does now: the page only carries a URL; the image is rendered once."""
+    qr.render(payload, fmt)
+    return reverse("payment_qr", args=[qr.make_token(payload, user_id), fmt])
+
+
+class Command(BaseCommand):
+    help = "Compare per-request QR cost: inline data URI vs. the cached QR service."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--distinct", type=int, default=20,
+                            help="Distinct payloads (users/totals) cycled through.")
+        parser.add_argument("--format", choices=sorted(qr.CONTENT_TYPES), default="png")
+
+    def time_calls(self, fn, payloads):
+        timings, sizes = [], []
+        for payload in payloads:
+            start = time.perf_counter()
+            out = fn(payload)
+            timings.append((time.perf_counter() - start) * 1000)
+            sizes.append(len(out))
+        return timings, sizes
+
+    def report(self, label, timings, sizes):
+        p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:<22} mean {statistics.mean(timings):8.3f} ms   "
+            f"p95 {p95:8.3f} ms   html bytes/req {statistics.mean(sizes):8.0f}"
+        )
+
+    def handle(self, *args, **options):
+        fmt = options["format"]
+        payloads = [
+            f"Pitstop.ph | user={i % options['distinct']} | total={1000 + i % options['distinct']}.00 | voucher=NONE"
+            for i in range(options["requests"])
+        ]
+
+        before = self.time_calls(inline_data_url, payloads)
+        qr._images.clear()
+        after = self.time_calls(lambda p: cached_url(p, fmt), payloads)
+
+        self.stdout.write(f"{options['requests']} requests, {options['distinct']} distinct payloads")
+        self.report("before (inline PNG)", *before)
+        self.report(f"after (cached {fmt})", *after)
+        speedup = statistics.mean(before[0]) / max(statistics.mean(after[0]), 1e-9)
+        self.stdout.write(self.style.SUCCESS(f"≈{speedup:.0f}x faster per request"))
@@ -0,0 +1,200 @@
+import asyncio
+import resource
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+from django.utils import timezone
+
+from products import delivery, live
+from products.models import Order
+
+USERNAME_PREFIX = "loadtest-events-"
+
+
+class QueryCounter:
+    """Counts SQL statements on every connection, in every thread."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def attach(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Stream:
+    """One in-process SSE client talking straight to the ASGI app."""
+
+    def __init__(self, app, path, cookie, disconnect):
+        self.app = app
+        self.scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"cookie", cookie.encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        self.disconnect = disconnect
+        self.status = None
+        self.sent_request = False
+        self.arrivals = {}  # status -> monotonic time first seen
+        self.snapshot = asyncio.Event()
+
+    async def receive(self):
+        if not self.sent_request:
+            self.sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            now = time.monotonic()
+            for status, _ in Order.DELIVERY_STATUS_CHOICES:
+                if f'"status": "{status}"'.encode() in body:
+                    self.arrivals.setdefault(status, now)
+                    self.snapshot.set()
+
+    async def run(self):
+        await self.app(self.scope, self.receive, self.send)
+
+
+class Command(BaseCommand):
+    help = (
+        "Open thousands of idle live-tracking SSE streams against the ASGI app "
+        "in-process, then report idle DB work, memory and push fan-out latency. "
+        "Creates throwaway users/orders and removes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--idle", type=float, default=10, help="Seconds to sit idle.")
+        parser.add_argument("--poll-interval", type=float, default=None,
+                            help="Override LIVE_TRACKING_POLL_SECONDS for the run.")
+
+    def handle(self, *args, **options):
+        if options["poll_interval"]:
+            settings.LIVE_TRACKING_POLL_SECONDS = options["poll_interval"]
+
+        users, cookies = self.create_fixtures(options["users"])
+        try:
+            asyncio.run(self.run(users, cookies, options))
+        finally:
+            Session.objects.filter(session_key__in=[c.split("=", 1)[1] for c in cookies]).delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+    def create_fixtures(self, count):
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        users = User.objects.bulk_create(
+            [User(username=f"{USERNAME_PREFIX}{i}") for i in range(count)]
+        )
+        Order.objects.bulk_create(
+            [Order(user=user, total=0, final_total=0, **delivery.schedule(3)) for user in users]
+        )
+        cookies = []
+        for user in users:
+            session = SessionStore()
+            session[SESSION_KEY] = str(user.pk)
+            session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+            session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+            session.create()
+            cookies.append(f"{settings.SESSION_COOKIE_NAME}={session.session_key}")
+        return users, cookies
+
+    async def run(self, users, cookies, options):
+        app = get_asgi_application()
+        path = reverse("order_events")
+        disconnect = asyncio.Event()
+        counter = QueryCounter()
+        for connection in connections.all():
+            counter.attach(connection)
+        connection_created.connect(counter.attach)
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        streams = [
+            Stream(app, path, cookies[i % len(cookies)], disconnect)
+            for i in range(options["subscribers"])
+        ]
+        started = time.monotonic()
+        tasks = [asyncio.create_task(stream.run()) for stream in streams]
+        await asyncio.gather(*(stream.snapshot.wait() for stream in streams))
+        connect_secs = time.monotonic() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        # idle: only the shared notifier should be talking to the database
+        queries_before, polls_before = counter.count, live.notifier.polls
+        await asyncio.sleep(options["idle"])
+        idle_queries = counter.count - queries_before
+        idle_polls = live.notifier.polls - polls_before
+
+        # one bulk stage change for every user, then wait for the fan-out
+        pushed_at = time.monotonic()
+        await asyncio.to_thread(self.advance_all, [u.pk for u in users])
+        deadline = pushed_at + settings.LIVE_TRACKING_POLL_SECONDS * 3 + 5
+        while time.monotonic() < deadline:
+            if all(Order.WITH_COURIER in s.arrivals for s in streams):
+                break
+            await asyncio.sleep(0.05)
+        latencies = [
+            (s.arrivals[Order.WITH_COURIER] - pushed_at) * 1000
+            for s in streams
+            if Order.WITH_COURIER in s.arrivals
+        ]
+
+        disconnect.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        connection_created.disconnect(counter.attach)
+
+        n = len(streams)
+        statuses = sorted({s.status for s in streams}, key=str)
+        self.stdout.write(f"{n} SSE subscribers across {len(users)} users, HTTP status(es) {statuses}")
+        self.stdout.write(f"connect + snapshot: {connect_secs:.2f}s ({connect_secs / n * 1000:.2f} ms/stream)")
+        self.stdout.write(
+            f"max RSS grew {(rss_after - rss_before) / 1024:.1f} MiB "
+            f"(≈{(rss_after - rss_before) / n:.1f} KiB/stream)"
+        )
+        self.stdout.write(
+            f"idle {options['idle']:.0f}s: {idle_queries} queries total, "
+            f"{idle_polls} notifier polls (interval {settings.LIVE_TRACKING_POLL_SECONDS}s)"
+        )
+        if latencies:
+            latencies.sort()
+            self.stdout.write(
+                f"fan-out: {len(latencies)}/{n} streams got the change; latency "
+                f"p50 {statistics.median(latencies):.0f} ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95) - 1]:.0f} ms, max {latencies[-1]:.0f} ms"
+            )
+        style = self.style.SUCCESS if len(latencies) == n and live.notifier.subscriber_count() == 0 else self.style.WARNING
+        self.stdout.write(style(f"{live.notifier.subscriber_count()} subscriptions left open after disconnect"))
+
+    def advance_all(self, user_ids):
+        Order.objects.filter(user_id__in=user_ids).update(
+            delivery_status=Order.WITH_COURIER,
+            shipped_at=timezone.now(),
+            delivery_updated_at=timezone.now(),
+        )
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from products.models import ProductChange
+
+
+class Command(BaseCommand):
+    help = "Delete change-feed rows the feed no longer needs (tombstones are kept). Run daily from cron."
+
+    def handle(self, *args, **options):
+        deleted = ProductChange.prune(settings.CATALOG_CHANGES_LAG_SECONDS)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} product change rows."))
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from products import catalog
+from products.models import OrderItem, SellerStats, badge_for_revenue, line_total
+
+
+class Command(BaseCommand):
+    help = "Recompute every SellerStats row from OrderItem history."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # lock the rows first: a checkout bumping one now waits for us, and
+            # its items are either committed (and in the totals) or not yet
+            list(SellerStats.objects.select_for_update().values_list("id", flat=True))
+
+            # grouped on OrderItem.seller, so deleted products still count
+            totals = (
+                OrderItem.objects
+                .filter(seller__isnull=False)
+                .values("seller_id")
+                .annotate(
+                    revenue=Sum(line_total()),
+                    units=Sum("quantity"),
+                    orders=Count("order_id", distinct=True),
+                )
+                .order_by()
+            )
+
+            now = timezone.now()
+            rows = []
+            for row in totals.iterator(chunk_size=2000):
+                revenue = row["revenue"] or Decimal("0")
+                rows.append(SellerStats(
+                    seller_id=row["seller_id"],
+                    lifetime_revenue=revenue,
+                    units_sold=row["units"] or 0,
+                    order_count=row["orders"],
+                    badge_level=badge_for_revenue(revenue),
+                    updated_at=now,
+                ))
+
+            SellerStats.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=["seller"],
+                update_fields=["lifetime_revenue", "units_sold", "order_count", "badge_level", "updated_at"],
+            )
+            SellerStats.objects.exclude(
+                seller_id__in=OrderItem.objects.filter(seller__isnull=False).values("seller_id")
+            ).update(lifetime_revenue=0, units_sold=0, order_count=0, badge_level="none", updated_at=now)
+            catalog.changed()  # badges on the product list may have moved
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {len(rows)} sellers."))
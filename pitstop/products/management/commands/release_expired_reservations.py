@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = "Delete stock holds whose TTL has passed. Run every few minutes from cron."
+
+    def handle(self, *args, **options):
+        deleted, _ = StockReservation.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"Released {deleted} expired reservations."))
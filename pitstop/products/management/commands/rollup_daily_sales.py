@@ -0,0 +1,102 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from products.models import Order, OrderItem, Product, SellerDailySales, line_total
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfill / reconcile SellerDailySales from OrderItem history, "
+        "one window of days at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD). Defaults to the oldest order.")
+        parser.add_argument("--until", help="Last day to rebuild (YYYY-MM-DD). Defaults to today.")
+        parser.add_argument("--chunk-days", type=int, default=30, help="Days aggregated per transaction.")
+
+    def parse_day(self, value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        if options["since"]:
+            since = self.parse_day(options["since"])
+        else:
+            first = Order.objects.aggregate(first=Min("created_at"))["first"]
+            if first is None:
+                self.stdout.write("No orders to roll up.")
+                return
+            since = timezone.localdate(first)
+        until = self.parse_day(options["until"]) if options["until"] else timezone.localdate()
+        chunk = timedelta(days=max(options["chunk_days"], 1))
+
+        written = 0
+        start = since
+        while start <= until:
+            end = min(start + chunk - timedelta(days=1), until)
+            written += self.rebuild_window(start, end)
+            self.stdout.write(f"{start} → {end}: done")
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows."))
+
+    def rebuild_window(self, start, end):
+        tz = timezone.get_current_timezone()
+        window_start = timezone.make_aware(datetime.combine(start, time.min), tz)
+        window_end = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+
+        with transaction.atomic():
+            sold = OrderItem.objects.filter(
+                product__isnull=False,
+                order__created_at__gte=window_start,
+                order__created_at__lt=window_end,
+            )
+            # rows whose product was deleted (product=NULL) can't be rebuilt
+            # from history, so they're kept as checkout wrote them
+            window_rows = SellerDailySales.objects.filter(product__isnull=False, day__gte=start, day__lte=end)
+
+            # lock the products first, as checkout does: a sale of one of them
+            # has either committed (and is counted below) or waits for us.
+            # Products first sold after this point are left to checkout.
+            product_ids = list(
+                Product.objects.select_for_update()
+                .filter(Q(id__in=sold.values("product_id")) | Q(id__in=window_rows.values("product_id")))
+                .values_list("id", flat=True)
+            )
+
+            totals = (
+                sold.filter(product_id__in=product_ids)
+                .annotate(day=TruncDate("order__created_at", tzinfo=tz))
+                .values("product__seller_id", "product_id", "day")
+                .annotate(
+                    product_name=Max("product_name"),
+                    units=Sum("quantity"),
+                    revenue=Sum(line_total()),
+                    orders=Count("order_id", distinct=True),
+                )
+                .order_by()
+            )
+            rows = [
+                SellerDailySales(
+                    seller_id=row["product__seller_id"],
+                    product_id=row["product_id"],
+                    product_name=row["product_name"],
+                    day=row["day"],
+                    units=row["units"],
+                    revenue=row["revenue"],
+                    orders=row["orders"],
+                )
+                for row in totals.iterator(chunk_size=2000)
+            ]
+
+            window_rows.filter(product_id__in=product_ids).delete()
+            SellerDailySales.objects.bulk_create(rows, batch_size=1000)
+        return len(rows)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from products.loyalty import ledger_totals, state_from_totals, write_snapshot
+from products.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every Profile's loyalty balances from the ledger and compare "
+        "them with its snapshot. With --fix, write the ledger balances back "
+        "(periodic snapshot)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rewrite snapshots that don't match.")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        checked = mismatched = 0
+
+        # every profile, left-joined to its ledger sums: one with cached
+        # balances but no ledger rows at all is checked against zero
+        totals = ledger_totals("user__loyalty_entries__")
+        profiles = Profile.objects.annotate(**totals).order_by("user_id")
+        for profile in profiles.iterator(chunk_size=options["chunk_size"]):
+            checked += 1
+            state = state_from_totals(profile.user_id, {name: getattr(profile, name) for name in totals})
+            if not state.differs_from(profile):
+                continue
+            mismatched += 1
+            self.stdout.write(
+                f"user {profile.user_id}: snapshot spent={profile.total_spent} "
+                f"balance={profile.extra_voucher_balance}, ledger spent={state.total_spent} "
+                f"balance={state.extra_voucher_balance}"
+            )
+            if options["fix"]:
+                write_snapshot(profile, state)
+
+        summary = f"Checked {checked} profiles, {mismatched} snapshot(s) out of date"
+        if options["fix"] and mismatched:
+            summary += " (fixed)"
+        style = self.style.SUCCESS if not mismatched or options["fix"] else self.style.WARNING
+        self.stdout.write(style(summary + "."))
@@ -1,18 +1,18 @@
-# Generated by Django 5.2.8 on 2025-11-23 13:35
-
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('products', '0011_profile_total_spent'),
-    ]
-
-    operations = [
-        migrations.AddField(
-            model_name='order',
-            name='payment_method',
-            field=models.CharField(blank=True, max_length=20),
-        ),
-    ]
+# Generated by Django 5.2.8 on 2025-11-23 13:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_profile_total_spent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_method',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
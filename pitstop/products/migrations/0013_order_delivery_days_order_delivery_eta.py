@@ -1,23 +1,23 @@
-# Generated by Django 5.2.8 on 2025-11-23 13:56
-
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('products', '0012_order_payment_method'),
-    ]
-
-    operations = [
-        migrations.AddField(
-            model_name='order',
-            name='delivery_days',
-            field=models.PositiveIntegerField(default=0),
-        ),
-        migrations.AddField(
-            model_name='order',
-            name='delivery_eta',
-            field=models.DateField(blank=True, null=True),
-        ),
-    ]
+# Generated by Django 5.2.8 on 2025-11-23 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_order_payment_method'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivery_days',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_eta',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
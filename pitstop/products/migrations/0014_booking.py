@@ -1,33 +1,33 @@
-# Generated by Django 5.2.8 on 2025-11-23 15:53
-
-import django.db.models.deletion
-from django.conf import settings
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('products', '0013_order_delivery_days_order_delivery_eta'),
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='Booking',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('car_brand', models.CharField(blank=True, max_length=120)),
-                ('car_model', models.CharField(blank=True, max_length=120)),
-                ('car_year', models.CharField(blank=True, max_length=10)),
-                ('scheduled_date', models.DateField()),
-                ('scheduled_time', models.TimeField()),
-                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='pending', max_length=20)),
-                ('finders_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_bookings', to=settings.AUTH_USER_MODEL)),
-                ('installer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installer_bookings', to=settings.AUTH_USER_MODEL)),
-                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='products.product')),
-            ],
-        ),
-    ]
+# Generated by Django 5.2.8 on 2025-11-23 15:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_order_delivery_days_order_delivery_eta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Booking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('car_brand', models.CharField(blank=True, max_length=120)),
+                ('car_model', models.CharField(blank=True, max_length=120)),
+                ('car_year', models.CharField(blank=True, max_length=10)),
+                ('scheduled_date', models.DateField()),
+                ('scheduled_time', models.TimeField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('finders_fee', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='customer_bookings', to=settings.AUTH_USER_MODEL)),
+                ('installer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='installer_bookings', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='products.product')),
+            ],
+        ),
+    ]
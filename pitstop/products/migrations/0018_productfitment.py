@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_profile_five_percent_voucher_used_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFitment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('brand', models.CharField(blank=True, max_length=120)),
+                ('model', models.CharField(blank=True, max_length=120)),
+                ('year', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fitments', to='products.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['brand', 'model', 'year'], name='fitment_brand_model_year'), models.Index(fields=['model', 'year'], name='fitment_model_year'), models.Index(fields=['year'], name='fitment_year')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def parse_years(raw):
+    # frozen copy of products.models.parse_years (1950..next year, ranges < 40 years)
+    first_year, last_year = 1950, timezone.now().year + 1
+    years = set()
+    for chunk in (raw or "").split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        if "-" in chunk:
+            start, _, end = chunk.partition("-")
+            start, end = start.strip(), end.strip()
+            if not (start.isdigit() and end.isdigit() and int(start) <= int(end)):
+                continue
+            start, end = int(start), int(end)
+        elif chunk.isdigit():
+            start = end = int(chunk)
+        else:
+            continue
+        if first_year <= start and end <= last_year and end - start < 40:
+            years.update(range(start, end + 1))
+    return sorted(years)
+
+
+def backfill_fitments(apps, schema_editor):
+    Product = apps.get_model("products", "Product")
+    ProductFitment = apps.get_model("products", "ProductFitment")
+
+    batch = []
+    products = Product.objects.only("id", "brand", "model", "compatible_years")
+    for product in products.iterator(chunk_size=2000):
+        brand = (product.brand or "").strip().lower()
+        model = (product.model or "").strip().lower()
+        for year in parse_years(product.compatible_years) or [None]:
+            batch.append(
+                ProductFitment(product_id=product.id, brand=brand, model=model, year=year)
+            )
+        if len(batch) >= 5000:
+            ProductFitment.objects.bulk_create(batch)
+            batch = []
+
+    if batch:
+        ProductFitment.objects.bulk_create(batch)
+
+
+def clear_fitments(apps, schema_editor):
+    apps.get_model("products", "ProductFitment").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_productfitment'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_fitments, clear_fitments),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import Q
+
+
+LEGACY_FLAGS = [
+    ("five_percent_voucher_used", "voucher_5_used"),
+    ("ten_percent_voucher_used", "voucher_10_used"),
+    ("twenty_percent_voucher_used", "voucher_20_used"),
+]
+
+
+def merge_flags(apps, schema_editor):
+    # checkout used to write the legacy flags; the pricing engine reads voucher_*_used
+    Profile = apps.get_model("products", "Profile")
+    for legacy, current in LEGACY_FLAGS:
+        Profile.objects.filter(Q(**{legacy: True}), Q(**{current: False})).update(**{current: True})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0024_cart'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_flags, migrations.RunPython.noop),
+    ]
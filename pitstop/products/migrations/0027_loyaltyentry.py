@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:46
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0026_order_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='loyalty_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='LoyaltyEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('spend', 'Spend'), ('voucher_grant', 'Voucher granted'), ('voucher_redeem', 'Voucher redeemed')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('voucher_code', models.CharField(blank=True, max_length=20)),
+                ('slot', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='loyalty_entries', to='products.order')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='loyalty_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'kind'], name='loyalty_user_kind')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('slot__isnull', False)), fields=('user', 'kind', 'voucher_code', 'slot'), name='loyalty_unique_slot'), models.UniqueConstraint(condition=models.Q(('kind', 'voucher_redeem'), ('slot__isnull', True)), fields=('user', 'voucher_code'), name='loyalty_one_time_redeem')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+ONE_TIME_FLAGS = {
+    "5PCT": "voucher_5_used",
+    "10PCT": "voucher_10_used",
+    "20PCT": "voucher_20_used",
+}
+
+
+def opening_balances(apps, schema_editor):
+    # turn each pre-ledger Profile into equivalent ledger rows
+    Profile = apps.get_model("products", "Profile")
+    LoyaltyEntry = apps.get_model("products", "LoyaltyEntry")
+
+    batch = []
+    for profile in Profile.objects.iterator(chunk_size=2000):
+        user_id = profile.user_id
+        if profile.total_spent:
+            batch.append(LoyaltyEntry(user_id=user_id, kind="spend", amount=profile.total_spent))
+        for code, flag in ONE_TIME_FLAGS.items():
+            if getattr(profile, flag):
+                batch.append(LoyaltyEntry(user_id=user_id, kind="voucher_redeem", voucher_code=code))
+        for slot in range(1, profile.extra_vouchers_earned + 1):
+            batch.append(LoyaltyEntry(user_id=user_id, kind="voucher_grant", voucher_code="P250", slot=slot))
+        used = max(profile.extra_vouchers_earned - profile.extra_voucher_balance, 0)
+        for slot in range(1, used + 1):
+            batch.append(LoyaltyEntry(user_id=user_id, kind="voucher_redeem", voucher_code="P250", slot=slot))
+
+        if len(batch) >= 5000:
+            LoyaltyEntry.objects.bulk_create(batch)
+            batch = []
+
+    if batch:
+        LoyaltyEntry.objects.bulk_create(batch)
+
+
+def clear_ledger(apps, schema_editor):
+    apps.get_model("products", "LoyaltyEntry").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0027_loyaltyentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(opening_balances, clear_ledger),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0028_loyalty_opening_balances'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='delivery_status',
+            field=models.CharField(choices=[('awaiting', 'Awaiting dispatch'), ('packing', 'Seller is packing'), ('with_courier', 'Sent to courier'), ('out_for_delivery', 'Delivering to your address'), ('delivered', 'Delivered')], default='awaiting', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='out_for_delivery_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='out_for_delivery_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='shipped_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_status', 'delivery_eta'], name='order_status_eta'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['delivery_status', 'out_for_delivery_on'], name='order_status_ofd'),
+        ),
+    ]
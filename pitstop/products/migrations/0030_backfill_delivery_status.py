@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def stage_for(order, today):
+    # frozen copy of the old Order.delivery_stage() rules
+    days_since = (today - order.created_at.date()).days
+    if days_since <= 0:
+        return "packing"
+    if days_since < order.delivery_days - 1:
+        return "with_courier"
+    if days_since < order.delivery_days:
+        return "out_for_delivery"
+    return "delivered"
+
+
+def backfill(apps, schema_editor):
+    # transition timestamps stay empty for old orders; we never recorded them
+    Order = apps.get_model("products", "Order")
+    today = timezone.now().date()
+    scheduled = Order.objects.filter(delivery_days__gt=0, delivery_eta__isnull=False)
+    batch = []
+    for order in scheduled.only("id", "created_at", "delivery_days").iterator(chunk_size=1000):
+        order.delivery_status = stage_for(order, today)
+        order.out_for_delivery_on = order.created_at.date() + timedelta(days=max(order.delivery_days - 1, 1))
+        batch.append(order)
+        if len(batch) >= 1000:
+            Order.objects.bulk_update(batch, ["delivery_status", "out_for_delivery_on"])
+            batch = []
+    Order.objects.bulk_update(batch, ["delivery_status", "out_for_delivery_on"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0029_order_delivery_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:59
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0033_booking_installer_status_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstallerSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_start', models.TimeField(default=datetime.time(8, 0))),
+                ('work_end', models.TimeField(default=datetime.time(17, 0))),
+                ('work_days', models.CharField(default='012345', max_length=7)),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=60)),
+                ('capacity', models.PositiveSmallIntegerField(default=1)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='seat',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('seat__isnull', False), ('status__in', ['pending', 'accepted'])), fields=('installer', 'scheduled_date', 'scheduled_time', 'seat'), name='booking_unique_seat'),
+        ),
+        migrations.AddField(
+            model_name='installerschedule',
+            name='installer',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='installer_schedule', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0034_installer_schedule_booking_seat'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='search_name',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['account_type', 'search_name'], name='profile_type_search_name'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Lower
+
+
+def backfill(apps, schema_editor):
+    Profile = apps.get_model("products", "Profile")
+    User = apps.get_model("auth", "User")
+    username = User.objects.filter(pk=OuterRef("user_id")).values(name=Lower("username"))[:1]
+    Profile.objects.filter(search_name="").update(search_name=Subquery(username))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0035_profile_search_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
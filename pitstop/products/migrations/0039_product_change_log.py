@@ -0,0 +1,54 @@
+import django.utils.timezone
+from django.core.management.color import no_style
+from django.db import migrations, models
+
+
+def move_tombstones(apps, schema_editor):
+    """
+    Carry existing tombstones over at their old sequence numbers, and
+    make sure the log's own ids carry on above every number already
+    stamped on a product, so partners' cursors stay valid.
+    """
+    Product = apps.get_model("products", "Product")
+    ProductChange = apps.get_model("products", "ProductChange")
+    ProductTombstone = apps.get_model("products", "ProductTombstone")
+
+    ProductChange.objects.bulk_create(
+        ProductChange(id=t.change_seq, product_id=t.product_id, deleted=True, changed_at=t.deleted_at)
+        for t in ProductTombstone.objects.all()
+    )
+    latest = Product.objects.filter(change_seq__gt=0).order_by("-change_seq").first()
+    if latest and not ProductChange.objects.filter(pk__gte=latest.change_seq).exists():
+        ProductChange.objects.create(id=latest.change_seq, product_id=latest.id, changed_at=latest.updated_at)
+
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [ProductChange]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0038_product_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_id', models.PositiveBigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='productchange',
+            index=models.Index(fields=['deleted', 'id'], name='product_change_deleted'),
+        ),
+        migrations.RunPython(move_tombstones, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='ProductTombstone',
+        ),
+    ]
@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, ExpressionWrapper, F, OuterRef, Subquery, Sum
+
+
+# frozen copies of products.models.line_total / BADGE_THRESH_* / badge_for_revenue
+def line_total():
+    return ExpressionWrapper(
+        F("unit_price") * F("quantity"),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+BADGE_THRESH_VERIFIED = Decimal("10000")
+BADGE_THRESH_TOP = Decimal("100000")
+
+
+def badge_for_revenue(revenue):
+    if revenue >= BADGE_THRESH_TOP:
+        return "top"
+    if revenue >= BADGE_THRESH_VERIFIED:
+        return "verified"
+    return "none"
+
+
+def backfill(apps, schema_editor):
+    """
+    Point existing order items at their product's seller, then rebuild
+    SellerStats from that history so sellers who sold before the running
+    totals existed start with the right badge.
+    """
+    OrderItem = apps.get_model("products", "OrderItem")
+    Product = apps.get_model("products", "Product")
+    SellerStats = apps.get_model("products", "SellerStats")
+
+    seller = Product.objects.filter(pk=OuterRef("product_id")).values("seller_id")[:1]
+    OrderItem.objects.filter(seller__isnull=True, product__isnull=False).update(seller_id=Subquery(seller))
+
+    totals = (
+        OrderItem.objects
+        .filter(seller__isnull=False)
+        .values("seller_id")
+        .annotate(
+            revenue=Sum(line_total()),
+            units=Sum("quantity"),
+            orders=Count("order_id", distinct=True),
+        )
+        .order_by()
+    )
+    rows = []
+    for row in totals.iterator(chunk_size=2000):
+        revenue = row["revenue"] or Decimal("0")
+        rows.append(SellerStats(
+            seller_id=row["seller_id"],
+            lifetime_revenue=revenue,
+            units_sold=row["units"] or 0,
+            order_count=row["orders"],
+            badge_level=badge_for_revenue(revenue),
+        ))
+    SellerStats.objects.all().delete()
+    SellerStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0040_orderitem_seller'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
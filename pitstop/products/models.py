@@ -1,198 +1,843 @@
-from django.db import models
-from django.contrib.auth.models import User
-from django.conf import settings
-
-class Product(models.Model):
-    seller = models.ForeignKey(
-        User,
-        on_delete=models.CASCADE,
-        related_name="products",
-    )
-    name = models.CharField(max_length=255)
-    brand = models.CharField(max_length=120, blank=True)
-    model = models.CharField(max_length=120, blank=True)
-
-    # 🔹 NEW: years the part is compatible with
-    compatible_years = models.CharField(max_length=200, blank=True)
-
-    def year_range(self):
-        if not self.compatible_years:
-            return None
-        
-        years = sorted({int(y.strip()) for y in self.compatible_years.split(",") if y.strip().isdigit()})
-
-        if not years:
-            return None
-
-        # If only 1 year exists
-        if len(years) == 1:
-            return str(years[0])
-
-        return f"{years[0]}–{years[-1]}"
-
-    price = models.DecimalField(max_digits=10, decimal_places=2)
-    stock = models.PositiveIntegerField(default=0)
-
-    # 🔹 NEW: product image
-    image = models.ImageField(
-        upload_to="product_images/",
-        blank=True,
-        null=True,
-    )
-
-    class Meta:
-        ordering = ["name"]
-
-    def __str__(self):
-        return self.name
-
-
-class Profile(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE)
-    account_type = models.CharField(max_length=20, default="customer")
-
-    # 🧮 OLD (from quantity-based vouchers) – you can keep these, even if unused now
-    total_products_purchased = models.PositiveIntegerField(default=0)
-    five_percent_voucher_used = models.BooleanField(default=False)
-    ten_percent_voucher_used = models.BooleanField(default=False)
-    twenty_percent_voucher_used = models.BooleanField(default=False)
-
-    # 🆕 NEW – peso-based voucher logic
-    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
-
-    # one-time vouchers by spend
-    voucher_5_used = models.BooleanField(default=False)   # 5% after ₱5k spent
-    voucher_10_used = models.BooleanField(default=False)  # 10% after ₱10k spent
-    voucher_20_used = models.BooleanField(default=False)  # 20% after ₱20k spent
-
-    # repeatable ₱250 vouchers (every ₱5k after ₱20k)
-    extra_voucher_balance = models.PositiveIntegerField(default=0)
-    extra_vouchers_earned = models.PositiveIntegerField(default=0)
-
-    # saved car for filter shortcut
-    saved_car_brand = models.CharField(max_length=100, blank=True)
-    saved_car_model = models.CharField(max_length=100, blank=True)
-    saved_car_year = models.CharField(max_length=10, blank=True)
-
-    def __str__(self):
-        return f"{self.user.username} Profile"
-
-
-
-
-class Order(models.Model):
-    user = models.ForeignKey(
-        settings.AUTH_USER_MODEL,
-        on_delete=models.CASCADE,
-        related_name="orders",
-    )
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    total = models.DecimalField(max_digits=10, decimal_places=2)
-    applied_discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    final_total = models.DecimalField(max_digits=10, decimal_places=2)
-    voucher_code = models.CharField(max_length=20, blank=True)
-    payment_method = models.CharField(max_length=20, blank=True)
-
-    convenience_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-
-    # 🆕 delivery tracking
-    delivery_days = models.PositiveIntegerField(default=0)          # randomized 1–5
-    delivery_eta = models.DateField(null=True, blank=True)          # estimated delivery date
-
-    def __str__(self):
-        return f"Order #{self.id} by {self.user.username}"
-
-    # 🆕 helper: current delivery stage text
-    def delivery_stage(self):
-        from django.utils import timezone
-
-        if not self.delivery_days or not self.delivery_eta:
-            return "Awaiting dispatch"
-
-        today = timezone.now().date()
-        days_since = (today - self.created_at.date()).days
-
-        if days_since <= 0:
-            return "Seller is packing"
-        elif days_since < self.delivery_days - 1:
-            return "Sent to courier"
-        elif days_since < self.delivery_days:
-            return "Delivering to your address"
-        else:
-            return "Delivered"
-
-class OrderItem(models.Model):
-    order = models.ForeignKey(
-        Order,
-        on_delete=models.CASCADE,
-        related_name="items",
-    )
-    product = models.ForeignKey(
-        Product,
-        on_delete=models.SET_NULL,
-        null=True,
-        blank=True,
-        related_name="order_items",
-    )
-
-    product_name = models.CharField(max_length=255)
-    brand = models.CharField(max_length=120, blank=True)
-    model = models.CharField(max_length=120, blank=True)
-
-    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
-    quantity = models.PositiveIntegerField()
-
-    def __str__(self):
-        return f"{self.product_name} x{self.quantity} (Order #{self.order_id})"
-    
-class Booking(models.Model):
-    STATUS_CHOICES = [
-        ("pending", "Pending"),
-        ("accepted", "Accepted"),
-        ("rejected", "Rejected"),
-    ]
-
-    customer = models.ForeignKey(
-        User,
-        on_delete=models.CASCADE,
-        related_name="customer_bookings",
-    )
-    installer = models.ForeignKey(
-        User,
-        on_delete=models.CASCADE,
-        related_name="installer_bookings",
-    )
-    product = models.ForeignKey(
-        Product,
-        on_delete=models.SET_NULL,
-        null=True,
-        blank=True,
-        related_name="bookings",
-    )
-
-    # Car details
-    car_brand = models.CharField(max_length=120, blank=True)
-    car_model = models.CharField(max_length=120, blank=True)
-    car_year = models.CharField(max_length=10, blank=True)
-
-    # Schedule
-    scheduled_date = models.DateField()
-    scheduled_time = models.TimeField()
-
-    # Booking status + platform fee
-    status = models.CharField(
-        max_length=20,
-        choices=STATUS_CHOICES,
-        default="pending",
-    )
-    finders_fee = models.DecimalField(
-        max_digits=10,
-        decimal_places=2,
-        default=0,
-    )
-
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    def __str__(self):
-        return f"Booking #{self.id} for {self.product.name if self.product else 'Unknown part'}"
+import datetime
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, ExpressionWrapper, F, Sum, Value, When
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.utils import timezone
+
+
+# fitment years accepted from sellers; anything else is a typo, and an
+# unbounded range would fan out into one ProductFitment row per year
+FITMENT_FIRST_YEAR = 1950
+FITMENT_MAX_RANGE = 40
+
+
+def fitment_year_window():
+    """(first, last) model year a part can be listed for: 1950 to next year."""
+    return FITMENT_FIRST_YEAR, timezone.now().year + 1
+
+
+def _year_chunks(raw):
+    """(chunk, first, last) for each comma-separated year or range; first is None if it doesn't parse."""
+    for chunk in (raw or "").split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        if "-" in chunk:
+            start, _, end = chunk.partition("-")
+            start, end = start.strip(), end.strip()
+            if start.isdigit() and end.isdigit() and int(start) <= int(end):
+                yield chunk, int(start), int(end)
+            else:
+                yield chunk, None, None
+        elif chunk.isdigit():
+            yield chunk, int(chunk), int(chunk)
+        else:
+            yield chunk, None, None
+
+
+def _in_window(first, last, window):
+    return window[0] <= first and last <= window[1] and last - first < FITMENT_MAX_RANGE
+
+
+def parse_years(raw):
+    """
+    Turn a free-text years string ("2016, 2018-2020") into a sorted list of ints.
+    Years outside fitment_year_window() and ranges longer than
+    FITMENT_MAX_RANGE years are dropped (see out_of_range_years).
+    """
+    window = fitment_year_window()
+    years = set()
+    for _, first, last in _year_chunks(raw):
+        if first is not None and _in_window(first, last, window):
+            years.update(range(first, last + 1))
+    return sorted(years)
+
+
+def out_of_range_years(raw):
+    """The years/ranges in ``raw`` that parse_years drops for being out of bounds."""
+    window = fitment_year_window()
+    return [
+        chunk for chunk, first, last in _year_chunks(raw)
+        if first is not None and not _in_window(first, last, window)
+    ]
+
+
+def normalize_fitment(value):
+    return (value or "").strip().lower()
+
+
+class ProductQuerySet(models.QuerySet):
+    def for_vehicle(self, brand="", model="", year=""):
+        """Filter by car make/model/year through the indexed ProductFitment table."""
+        brand = normalize_fitment(brand)
+        model = normalize_fitment(model)
+        year = (year or "").strip()
+
+        if not (brand or model or year):
+            return self
+        if year and not year.isdigit():
+            return self.none()
+
+        fitments = ProductFitment.objects.all()
+        if brand:
+            fitments = fitments.filter(brand=brand)
+        if model:
+            fitments = fitments.filter(model=model)
+        if year:
+            fitments = fitments.filter(year=int(year))
+
+        return self.filter(id__in=fitments.values("product_id"))
+
+
+class Product(models.Model):
+    seller = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="products",
+    )
+    name = models.CharField(max_length=255)
+    brand = models.CharField(max_length=120, blank=True)
+    model = models.CharField(max_length=120, blank=True)
+
+    # 🔹 NEW: years the part is compatible with
+    compatible_years = models.CharField(max_length=200, blank=True)
+
+    def year_range(self):
+        years = parse_years(self.compatible_years)
+
+        if not years:
+            return None
+
+        # If only 1 year exists
+        if len(years) == 1:
+            return str(years[0])
+
+        return f"{years[0]}–{years[-1]}"
+
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    stock = models.PositiveIntegerField(default=0)
+
+    # 🔹 NEW: product image
+    image = models.ImageField(
+        upload_to="product_images/",
+        blank=True,
+        null=True,
+    )
+
+    # bumped by save(); bulk stock writes (checkout) set it explicitly
+    updated_at = models.DateTimeField(auto_now=True)
+    # ProductChange id of the last write; the change feed reads in (change_seq, id) order
+    change_seq = models.PositiveBigIntegerField(default=0)
+
+    objects = ProductQuerySet.as_manager()
+
+    class Meta:
+        # (name, id) is the keyset used by products.pagination
+        ordering = ["name", "id"]
+        indexes = [
+            models.Index(fields=["name", "id"], name="product_name_id"),
+            models.Index(fields=["change_seq", "id"], name="product_change_seq"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.pk is None:
+                super().save(*args, **kwargs)
+                self.change_seq = ProductChange.record([self.pk])[self.pk]
+                Product.objects.filter(pk=self.pk).update(change_seq=self.change_seq)
+            else:
+                self.change_seq = ProductChange.record([self.pk])[self.pk]
+                if kwargs.get("update_fields") is not None:
+                    kwargs["update_fields"] = {*kwargs["update_fields"], "change_seq", "updated_at"}
+                super().save(*args, **kwargs)
+            transaction.on_commit(CatalogVersion.bump)
+
+    def sync_fitments(self):
+        """Rebuild this product's fitment rows from brand/model/compatible_years."""
+        brand = normalize_fitment(self.brand)
+        model = normalize_fitment(self.model)
+        years = parse_years(self.compatible_years) or [None]
+
+        self.fitments.all().delete()
+        ProductFitment.objects.bulk_create(
+            ProductFitment(product=self, brand=brand, model=model, year=year)
+            for year in years
+        )
+
+
+class ProductFitment(models.Model):
+    """
+    One row per (product, brand, model, year) the part fits.
+    Brand/model are stored lowercased so lookups are exact index hits.
+    Products with no years get a single row with year=NULL so make/model
+    filters still find them.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="fitments",
+    )
+    brand = models.CharField(max_length=120, blank=True)
+    model = models.CharField(max_length=120, blank=True)
+    year = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["brand", "model", "year"], name="fitment_brand_model_year"),
+            models.Index(fields=["model", "year"], name="fitment_model_year"),
+            models.Index(fields=["year"], name="fitment_year"),
+        ]
+
+    def __str__(self):
+        return f"{self.brand} {self.model} {self.year or ''}".strip()
+
+
+class Profile(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    account_type = models.CharField(max_length=20, default="customer")
+
+    # 🧮 OLD (from quantity-based vouchers) – unused; products.pricing reads voucher_*_used
+    total_products_purchased = models.PositiveIntegerField(default=0)
+    five_percent_voucher_used = models.BooleanField(default=False)
+    ten_percent_voucher_used = models.BooleanField(default=False)
+    twenty_percent_voucher_used = models.BooleanField(default=False)
+
+    # 🆕 NEW – peso-based voucher logic
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    # one-time vouchers by spend
+    voucher_5_used = models.BooleanField(default=False)   # 5% after ₱5k spent
+    voucher_10_used = models.BooleanField(default=False)  # 10% after ₱10k spent
+    voucher_20_used = models.BooleanField(default=False)  # 20% after ₱20k spent
+
+    # repeatable ₱250 vouchers (every ₱5k after ₱20k)
+    extra_voucher_balance = models.PositiveIntegerField(default=0)
+    extra_vouchers_earned = models.PositiveIntegerField(default=0)
+
+    # saved car for filter shortcut
+    saved_car_brand = models.CharField(max_length=100, blank=True)
+    saved_car_model = models.CharField(max_length=100, blank=True)
+    saved_car_year = models.CharField(max_length=10, blank=True)
+
+    # spend/voucher fields above are a snapshot of LoyaltyEntry, see products.loyalty
+    loyalty_synced_at = models.DateTimeField(null=True, blank=True)
+
+    # lowercased username for the installer prefix search (range scan on the index below)
+    search_name = models.CharField(max_length=150, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["account_type", "search_name"], name="profile_type_search_name"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} Profile"
+
+    def save(self, *args, **kwargs):
+        # renames go through User, see signals.user_saved
+        self.search_name = self.user.username.lower()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "search_name"}
+        super().save(*args, **kwargs)
+
+
+class LoyaltyEntry(models.Model):
+    """
+    Append-only loyalty ledger. Checkout only ever inserts rows here;
+    Profile's spend/voucher fields are a snapshot rebuilt from it.
+
+    `slot` numbers the repeatable ₱250 vouchers (grant #n, redemption
+    of #n); the partial unique constraints make a double grant or a
+    double redemption fail at insert time instead of corrupting balances.
+    """
+    SPEND = "spend"
+    GRANT = "voucher_grant"
+    REDEEM = "voucher_redeem"
+    KIND_CHOICES = [
+        (SPEND, "Spend"),
+        (GRANT, "Voucher granted"),
+        (REDEEM, "Voucher redeemed"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="loyalty_entries",
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    voucher_code = models.CharField(max_length=20, blank=True)
+    slot = models.PositiveIntegerField(null=True, blank=True)
+    order = models.ForeignKey(
+        "Order",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="loyalty_entries",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "kind"], name="loyalty_user_kind"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "kind", "voucher_code", "slot"],
+                condition=models.Q(slot__isnull=False),
+                name="loyalty_unique_slot",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "voucher_code"],
+                condition=models.Q(kind="voucher_redeem", slot__isnull=True),
+                name="loyalty_one_time_redeem",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.voucher_code or self.amount} for {self.user_id}"
+
+
+
+
+class Order(models.Model):
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="orders",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    total = models.DecimalField(max_digits=10, decimal_places=2)
+    applied_discount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    final_total = models.DecimalField(max_digits=10, decimal_places=2)
+    voucher_code = models.CharField(max_length=20, blank=True)
+    payment_method = models.CharField(max_length=20, blank=True)
+
+    convenience_fee = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    # 🆕 delivery tracking
+    delivery_days = models.PositiveIntegerField(default=0)          # randomized 1–5
+    delivery_eta = models.DateField(null=True, blank=True)          # estimated delivery date
+
+    # stored stage, advanced in bulk by `manage.py advance_deliveries`
+    AWAITING = "awaiting"
+    PACKING = "packing"
+    WITH_COURIER = "with_courier"
+    OUT_FOR_DELIVERY = "out_for_delivery"
+    DELIVERED = "delivered"
+    DELIVERY_STATUS_CHOICES = [
+        (AWAITING, "Awaiting dispatch"),
+        (PACKING, "Seller is packing"),
+        (WITH_COURIER, "Sent to courier"),
+        (OUT_FOR_DELIVERY, "Delivering to your address"),
+        (DELIVERED, "Delivered"),
+    ]
+    delivery_status = models.CharField(
+        max_length=20,
+        choices=DELIVERY_STATUS_CHOICES,
+        default=AWAITING,
+    )
+    out_for_delivery_on = models.DateField(null=True, blank=True)   # planned, set with the ETA
+    shipped_at = models.DateTimeField(null=True, blank=True)
+    out_for_delivery_at = models.DateTimeField(null=True, blank=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    # last status change; the live tracking notifier polls on this
+    delivery_updated_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    # client-supplied key so a retried submit returns this order instead of a new one
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="order_user_created"),
+            models.Index(fields=["delivery_status", "delivery_eta"], name="order_status_eta"),
+            models.Index(fields=["delivery_status", "out_for_delivery_on"], name="order_status_ofd"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "idempotency_key"],
+                condition=models.Q(idempotency_key__isnull=False),
+                name="order_user_idempotency_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.id} by {self.user.username}"
+
+    @property
+    def stage_index(self):
+        """0-based position in the packing → delivered progress bar."""
+        order = [self.PACKING, self.WITH_COURIER, self.OUT_FOR_DELIVERY, self.DELIVERED]
+        return order.index(self.delivery_status) if self.delivery_status in order else -1
+
+
+def line_total():
+    """SQL expression for unit_price * quantity on OrderItem rows."""
+    return ExpressionWrapper(
+        F("unit_price") * F("quantity"),
+        output_field=models.DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="items",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="order_items",
+    )
+    # copied from the product at checkout, so sales still count for the
+    # seller after the product is deleted (see rebuild_seller_stats)
+    seller = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sold_items",
+    )
+
+    product_name = models.CharField(max_length=255)
+    brand = models.CharField(max_length=120, blank=True)
+    model = models.CharField(max_length=120, blank=True)
+
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.product_name} x{self.quantity} (Order #{self.order_id})"
+    
+# Store badge tiers (lifetime revenue, ₱)
+BADGE_THRESH_VERIFIED = Decimal("10000")
+BADGE_THRESH_TOP = Decimal("100000")
+
+
+def badge_for_revenue(revenue):
+    if revenue >= BADGE_THRESH_TOP:
+        return "top"
+    if revenue >= BADGE_THRESH_VERIFIED:
+        return "verified"
+    return "none"
+
+
+class CatalogVersion(models.Model):
+    """
+    Single-row counter that moves whenever anything the catalog pages show
+    changes (see products.catalog). ETags are built from it, so checking
+    whether a client's copy is current reads this row, not the products.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"catalog v{self.version}"
+
+    @classmethod
+    def current(cls):
+        return cls.objects.get_or_create(pk=1)[0]
+
+    @classmethod
+    def bump(cls):
+        """
+        Move the counter on. Registered with transaction.on_commit by
+        writers, so it runs in its own short autocommit UPDATE and never
+        holds the row for the length of someone's checkout.
+        """
+        changes = dict(version=F("version") + 1, updated_at=timezone.now())
+        if not cls.objects.filter(pk=1).update(**changes):
+            cls.objects.get_or_create(pk=1, defaults={"version": 0})
+            cls.objects.filter(pk=1).update(**changes)
+
+
+class ProductChange(models.Model):
+    """
+    Append-only log of product writes; the row id is the change sequence
+    number stamped on Product.change_seq. Handing out a number is an
+    INSERT, so concurrent writers don't queue on a shared counter row.
+    Rows with deleted=True are the change feed's tombstones.
+
+    Ids are allocated in insert order, not commit order, so the feed only
+    reads up to ``horizon()`` (see products.catalog.changes_since).
+    Plain change rows are only needed until then; `manage.py
+    prune_product_changes` deletes them, tombstones are kept.
+    """
+    product_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted", "id"], name="product_change_deleted"),
+        ]
+
+    def __str__(self):
+        return f"product {self.product_id} {'deleted' if self.deleted else 'changed'} at #{self.pk}"
+
+    @property
+    def change_seq(self):
+        return self.pk
+
+    @classmethod
+    def record(cls, product_ids, deleted=False):
+        """Log a write to each product with one INSERT; returns {product_id: change_seq}."""
+        rows = cls.objects.bulk_create(cls(product_id=product_id, deleted=deleted) for product_id in product_ids)
+        return {row.product_id: row.pk for row in rows}
+
+    @classmethod
+    def horizon(cls, lag_seconds):
+        """
+        The highest sequence number allocated more than ``lag_seconds``
+        ago. Every write numbered at or below it has had that long to
+        commit, so a reader stopping there won't step past one still in
+        flight.
+        """
+        cutoff = timezone.now() - datetime.timedelta(seconds=lag_seconds)
+        return (
+            cls.objects.filter(changed_at__lte=cutoff)
+            .order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+        ) or 0
+
+    @classmethod
+    def prune(cls, lag_seconds):
+        """
+        Delete non-tombstone rows below the horizon and return how many
+        went. Products carry their own change_seq, so those rows only
+        served to hand out numbers; the one at the horizon stays so
+        ``horizon()`` doesn't fall back while no new writes age past it.
+        """
+        horizon = cls.horizon(lag_seconds)
+        deleted, _ = cls.objects.filter(deleted=False, id__lt=horizon).delete()
+        return deleted
+
+
+class SellerStats(models.Model):
+    """
+    Running lifetime totals per seller, bumped inside the checkout
+    transaction so badge lookups never have to aggregate OrderItem.
+    `manage.py rebuild_seller_stats` recomputes it from order history.
+    """
+    BADGE_CHOICES = [
+        ("none", "No badge"),
+        ("verified", "Verified Store"),
+        ("top", "Top Store"),
+    ]
+
+    seller = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="seller_stats",
+    )
+    lifetime_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    badge_level = models.CharField(max_length=20, choices=BADGE_CHOICES, default="none")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.seller.username} stats"
+
+    @classmethod
+    def record_sale(cls, seller_id, revenue, units):
+        """Add one order's worth of sales for a seller. Call inside a transaction."""
+        # badge is compared against the pre-update revenue + this sale,
+        # so increment and re-tier happen in a single UPDATE
+        changes = dict(
+            lifetime_revenue=F("lifetime_revenue") + revenue,
+            units_sold=F("units_sold") + units,
+            order_count=F("order_count") + 1,
+            badge_level=Case(
+                When(lifetime_revenue__gte=BADGE_THRESH_TOP - revenue, then=Value("top")),
+                When(lifetime_revenue__gte=BADGE_THRESH_VERIFIED - revenue, then=Value("verified")),
+                default=Value("none"),
+            ),
+            updated_at=timezone.now(),
+        )
+        if cls.objects.filter(seller_id=seller_id).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    seller_id=seller_id,
+                    lifetime_revenue=revenue,
+                    units_sold=units,
+                    order_count=1,
+                    badge_level=badge_for_revenue(revenue),
+                )
+        except IntegrityError:
+            # another checkout created the row first
+            cls.objects.filter(seller_id=seller_id).update(**changes)
+
+
+class SellerDailySales(models.Model):
+    """
+    Per seller / product / day sales rollup, appended at checkout so the
+    seller charts read at most one row per product per day.
+    `orders` counts orders containing the product that day.
+    `manage.py rollup_daily_sales` rebuilds it from OrderItem history.
+    """
+    seller = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="daily_sales",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="daily_sales",
+    )
+    product_name = models.CharField(max_length=255)
+    day = models.DateField()
+
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["seller", "product", "day"],
+                name="daily_sales_seller_product_day",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["seller", "day"], name="daily_sales_seller_day"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_name} on {self.day}"
+
+    @classmethod
+    def record_sale(cls, product, day, revenue, units):
+        """Add one order line to the product's rollup for `day`. Call inside a transaction."""
+        changes = dict(
+            units=F("units") + units,
+            revenue=F("revenue") + revenue,
+            orders=F("orders") + 1,
+        )
+        rollup = cls.objects.filter(seller_id=product.seller_id, product=product, day=day)
+        if rollup.update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    seller_id=product.seller_id,
+                    product=product,
+                    product_name=product.name,
+                    day=day,
+                    units=units,
+                    revenue=revenue,
+                    orders=1,
+                )
+        except IntegrityError:
+            rollup.update(**changes)
+
+
+class Cart(models.Model):
+    """
+    Server-side cart. Logged-in users own one cart; anonymous visitors
+    get one whose id is kept in the session and which is merged into the
+    user's cart after login (see products.cart.get_cart).
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="cart",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        owner = self.user.username if self.user_id else "anonymous"
+        return f"Cart #{self.id} ({owner})"
+
+
+class CartLine(models.Model):
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        related_name="lines",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="cart_lines",
+    )
+    quantity = models.PositiveIntegerField(default=1)
+    # last price the customer was shown; used to flag price changes
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    added_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["added_at", "id"]
+        constraints = [
+            models.UniqueConstraint(fields=["cart", "product"], name="cartline_cart_product"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} x{self.quantity} in cart #{self.cart_id}"
+
+
+class StockReservation(models.Model):
+    """
+    A short hold on stock while a customer is on the payment page.
+    Holds are live until expires_at; place_order turns them into a real
+    stock decrement and `manage.py release_expired_reservations` deletes
+    stale ones.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stock_reservations",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reservations",
+    )
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "expires_at"], name="reservation_product_expiry"),
+            models.Index(fields=["expires_at"], name="reservation_expiry"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held for {self.user_id}"
+
+    @classmethod
+    def held_quantities(cls, product_ids, exclude_user=None):
+        """{product_id: units on live hold} for a batch of products, in one grouped query."""
+        holds = cls.objects.filter(product_id__in=product_ids, expires_at__gt=timezone.now())
+        if exclude_user is not None:
+            holds = holds.exclude(user=exclude_user)
+        return dict(
+            holds.values("product_id")
+            .annotate(held=Sum("quantity"))
+            .values_list("product_id", "held")
+            .order_by()
+        )
+
+
+class Booking(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("accepted", "Accepted"),
+        ("rejected", "Rejected"),
+    ]
+
+    customer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="customer_bookings",
+    )
+    installer = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="installer_bookings",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="bookings",
+    )
+
+    # Car details
+    car_brand = models.CharField(max_length=120, blank=True)
+    car_model = models.CharField(max_length=120, blank=True)
+    car_year = models.CharField(max_length=10, blank=True)
+
+    # Schedule
+    scheduled_date = models.DateField()
+    scheduled_time = models.TimeField()
+
+    # Booking status + platform fee
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default="pending",
+    )
+    finders_fee = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # which of the installer's parallel crews holds this slot (see products.scheduling);
+    # null on bookings made before slots existed
+    seat = models.PositiveSmallIntegerField(null=True, blank=True)
+
+    # statuses that occupy the installer's time
+    ACTIVE_STATUSES = ["pending", "accepted"]
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["installer", "status", "scheduled_date"],
+                name="booking_installer_status_date",
+            ),
+        ]
+        constraints = [
+            # a seat can hold one live booking per slot; rejecting frees it
+            models.UniqueConstraint(
+                fields=["installer", "scheduled_date", "scheduled_time", "seat"],
+                condition=models.Q(status__in=["pending", "accepted"], seat__isnull=False),
+                name="booking_unique_seat",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Booking #{self.id} for {self.product.name if self.product else 'Unknown part'}"
+
+
+class InstallerSchedule(models.Model):
+    """Working hours and slot grid for an installer; defaults apply until they save one."""
+    WEEKDAY_DIGITS = "0123456"  # Monday = 0, like date.weekday()
+
+    installer = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="installer_schedule",
+    )
+    work_start = models.TimeField(default=datetime.time(8, 0))
+    work_end = models.TimeField(default=datetime.time(17, 0))
+    work_days = models.CharField(max_length=7, default="012345")  # Mon–Sat
+    slot_minutes = models.PositiveSmallIntegerField(default=60)
+    capacity = models.PositiveSmallIntegerField(default=1)  # jobs they can take at once
+
+    def __str__(self):
+        return f"Schedule for {self.installer.username}"
+
+    @classmethod
+    def for_installer(cls, installer):
+        try:
+            return cls.objects.get(installer=installer)
+        except cls.DoesNotExist:
+            return cls(installer=installer)
+
+    def works_on(self, day):
+        return str(day.weekday()) in self.work_days
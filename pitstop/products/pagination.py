@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_cursor(obj, reverse=False, key="name"):
+    value = getattr(obj, key)
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    payload = json.dumps({"n": value, "i": obj.id, "r": reverse})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Return {"n", "i", "r"} for a cursor token; raises ValueError if it is garbage."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        position = {"n": str(data["n"]), "i": int(data["i"]), "r": bool(data.get("r", False))}
+    except (TypeError, KeyError, OverflowError, UnicodeError, json.JSONDecodeError, binascii.Error) as exc:
+        raise ValueError("Invalid cursor") from exc
+    # ids are bigints; a larger number would be a database error, not an empty page
+    if not 0 <= position["i"] < 2 ** 63:
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def _key_value(model, key, raw):
+    """A cursor's key as the field's Python value; raises ValueError if it doesn't parse."""
+    try:
+        return model._meta.get_field(key).to_python(raw)
+    except ValidationError as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+
+def paginate_keyset(queryset, cursor=None, page_size=None, key="name", descending=False):
+    """
+    Seek-based pagination over (key, id); the default matches Product.Meta.ordering.
+    Each page is a single "WHERE (key, id) > (..) ORDER BY key, id LIMIT n+1"
+    query, so page cost doesn't depend on how deep into the list we are.
+    """
+    page_size = page_size or settings.PRODUCT_PAGE_SIZE
+    position = decode_cursor(cursor) if cursor else None
+    backwards = bool(position and position["r"])
+
+    # walking backwards reads the previous page in the opposite order, then flips it
+    ascending = descending == backwards
+    after = "gt" if ascending else "lt"
+    if position:
+        value = _key_value(queryset.model, key, position["n"])
+        queryset = queryset.filter(
+            Q(**{f"{key}__{after}": value})
+            | Q(**{key: value, f"id__{after}": position["i"]})
+        )
+    order = [key, "id"] if ascending else [f"-{key}", "-id"]
+    rows = list(queryset.order_by(*order)[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1], key=key) if rows else None,
+            previous_cursor=encode_cursor(rows[0], reverse=True, key=key) if has_more else None,
+        )
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1], key=key) if has_more else None,
+        previous_cursor=encode_cursor(rows[0], reverse=True, key=key) if position and rows else None,
+    )
+
+
+class ProductKeysetPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    key = "name"
+
+    def default_page_size(self):
+        return settings.PRODUCT_PAGE_SIZE
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, ""))
+        except ValueError:
+            return self.default_page_size()
+        return max(1, min(size, settings.PRODUCT_MAX_PAGE_SIZE))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.page = paginate_keyset(
+                queryset,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request),
+                key=self.key,
+            )
+        except ValueError:
+            raise NotFound("Invalid cursor")
+        return self.page.items
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self._link(self.page.next_cursor),
+            "previous": self._link(self.page.previous_cursor),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class InstallerKeysetPagination(ProductKeysetPagination):
+    """Installer lookup: pages of Profiles in search_name order."""
+    key = "search_name"
+
+    def default_page_size(self):
+        return settings.INSTALLER_SEARCH_PAGE_SIZE
+
+
+def cursor_url(request, cursor):
+    """Current page URL (filters kept) pointing at another cursor, for templates."""
+    if cursor is None:
+        return None
+    return replace_query_param(request.get_full_path(), "cursor", cursor)
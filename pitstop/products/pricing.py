@@ -0,0 +1,141 @@
+"""
+Checkout pricing: voucher rules, convenience fee and totals in one place.
+
+price_cart() evaluates everything once and returns an immutable Quote.
+Rules read loyalty balances from anything shaped like Profile (in
+practice a products.loyalty.LoyaltyState).
+The quote is signed into the session at checkout, and the payment page
+(GET and POST) reuses it instead of recomputing.
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+
+CENT = Decimal("0.01")
+CONVENIENCE_FEE_RATE = Decimal("0.05")
+
+# repeatable ₱250 vouchers: one per ₱5k spent beyond ₱20k
+EXTRA_VOUCHER_THRESHOLD = Decimal("20000")
+EXTRA_VOUCHER_BLOCK = Decimal("5000")
+
+QUOTE_SALT = "products.pricing.quote"
+
+
+@dataclass(frozen=True)
+class VoucherRule:
+    code: str
+    label: str
+    min_spent: Decimal = Decimal("0")
+    percent: Decimal = Decimal("0")
+    amount: Decimal = Decimal("0")
+    used_flag: str = ""  # Profile boolean for one-time vouchers
+
+    def is_available(self, profile):
+        if self.used_flag:
+            spent = profile.total_spent or Decimal("0")
+            return spent >= self.min_spent and not getattr(profile, self.used_flag)
+        return profile.extra_voucher_balance > 0
+
+    def discount(self, subtotal):
+        if self.percent:
+            return (subtotal * self.percent).quantize(CENT)
+        return self.amount
+
+    def describe(self, profile):
+        if self.used_flag:
+            return self.label
+        return f"{self.label} (you have {profile.extra_voucher_balance})"
+
+
+VOUCHER_RULES = {
+    rule.code: rule
+    for rule in [
+        VoucherRule("5PCT", "5% off (one-time after ₱5,000 spent)",
+                    min_spent=Decimal("5000"), percent=Decimal("0.05"), used_flag="voucher_5_used"),
+        VoucherRule("10PCT", "10% off (one-time after ₱10,000 spent)",
+                    min_spent=Decimal("10000"), percent=Decimal("0.10"), used_flag="voucher_10_used"),
+        VoucherRule("20PCT", "20% off (one-time after ₱20,000 spent)",
+                    min_spent=Decimal("20000"), percent=Decimal("0.20"), used_flag="voucher_20_used"),
+        VoucherRule("P250", "₱250 off", amount=Decimal("250")),
+    ]
+}
+
+
+def available_vouchers(profile):
+    return [
+        {"code": rule.code, "label": rule.describe(profile)}
+        for rule in VOUCHER_RULES.values()
+        if rule.is_available(profile)
+    ]
+
+
+def cart_digest(cart):
+    """Stable hash of a checkout snapshot, so a quote can't be replayed against another cart."""
+    payload = json.dumps(cart, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class Quote:
+    user_id: int
+    cart_digest: str
+    subtotal: Decimal
+    voucher_code: str
+    discount: Decimal
+    convenience_fee: Decimal
+    final_total: Decimal
+
+    def sign(self):
+        data = {k: str(v) if isinstance(v, Decimal) else v for k, v in asdict(self).items()}
+        return signing.dumps(data, salt=QUOTE_SALT, compress=True)
+
+    @classmethod
+    def load(cls, token, max_age=None):
+        """Verify and decode a signed quote; raises signing.BadSignature (or SignatureExpired)."""
+        if max_age is None:
+            # quotes live exactly as long as the stock holds they were priced with
+            max_age = settings.STOCK_RESERVATION_MINUTES * 60
+        data = signing.loads(token, salt=QUOTE_SALT, max_age=max_age)
+        for field in ("subtotal", "discount", "convenience_fee", "final_total"):
+            data[field] = Decimal(data[field])
+        return cls(**data)
+
+
+def price_cart(profile, cart, voucher_code=""):
+    """Evaluate voucher rules, convenience fee and totals for one checkout snapshot."""
+    subtotal = sum(
+        (Decimal(str(item["price"])) * item["quantity"] for item in cart.values()),
+        Decimal("0"),
+    ).quantize(CENT)
+
+    rule = VOUCHER_RULES.get(voucher_code or "")
+    if rule is None or not rule.is_available(profile):
+        rule = None
+    discount = rule.discount(subtotal) if rule else Decimal("0")
+
+    # ✅ fee is charged on the discounted total
+    discounted_total = max(subtotal - discount, Decimal("0"))
+    convenience_fee = (discounted_total * CONVENIENCE_FEE_RATE).quantize(CENT)
+
+    return Quote(
+        user_id=profile.user_id,
+        cart_digest=cart_digest(cart),
+        subtotal=subtotal,
+        voucher_code=rule.code if rule else "",
+        discount=discount,
+        convenience_fee=convenience_fee,
+        final_total=discounted_total + convenience_fee,
+    )
+
+
+def price_carts(batch):
+    """
+    Price many carts in one call, e.g. for load tests or promo simulations.
+    `batch` is an iterable of (profile, cart, voucher_code); returns quotes in order.
+    No database access.
+    """
+    return [price_cart(profile, cart, voucher_code) for profile, cart, voucher_code in batch]
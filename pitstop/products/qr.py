@@ -0,0 +1,142 @@
+"""
+QR images for the payment page.
+
+Rendering (qrcode + PIL) is done once per payload and kept in a small
+in-process LRU, optionally shared through the Django cache
+(QR_SHARED_CACHE). The page links to a signed, immutable URL instead
+of inlining a data: URI, and prefetch() warms the image in a
+background thread while the HTML is being rendered.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import qrcode
+from qrcode.image.svg import SvgPathImage
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+TOKEN_SALT = "products.qr"
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_images = LRUCache(settings.QR_CACHE_SIZE)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qr-render")
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def image_key(payload, fmt):
+    return hashlib.sha256(f"{fmt}:{payload}".encode("utf-8")).hexdigest()
+
+
+def encode(payload, fmt="png"):
+    """Render a QR image to bytes. This is the slow part; callers should use render()."""
+    buffer = BytesIO()
+    if fmt == "svg":
+        qrcode.make(payload, image_factory=SvgPathImage).save(buffer)
+    else:
+        qrcode.make(payload).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def cached(payload, fmt="png"):
+    key = image_key(payload, fmt)
+    data = _images.get(key)
+    if data is None and settings.QR_SHARED_CACHE:
+        data = cache.get(f"qr:{key}")
+        if data is not None:
+            _images.set(key, data)
+    return data
+
+
+def render(payload, fmt="png"):
+    """QR bytes for `payload`, rendered at most once per process (or once overall with QR_SHARED_CACHE)."""
+    data = cached(payload, fmt)
+    if data is not None:
+        return data
+
+    key = image_key(payload, fmt)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+    if future is not None:
+        # a prefetch is already rendering this one
+        return future.result()
+
+    return _encode_and_store(key, payload, fmt)
+
+
+def _encode_and_store(key, payload, fmt):
+    data = encode(payload, fmt)
+    _images.set(key, data)
+    if settings.QR_SHARED_CACHE:
+        cache.set(f"qr:{key}", data, settings.QR_CACHE_TIMEOUT)
+    return data
+
+
+def prefetch(payload, fmt="png"):
+    """Start rendering in the background so the image request finds it cached."""
+    key = image_key(payload, fmt)
+    if _images.get(key) is not None:
+        return
+    with _in_flight_lock:
+        if key in _in_flight:
+            return
+        future = _executor.submit(_encode_and_store, key, payload, fmt)
+        _in_flight[key] = future
+    future.add_done_callback(lambda _: _forget(key))
+
+
+def _forget(key):
+    with _in_flight_lock:
+        _in_flight.pop(key, None)
+
+
+def make_token(payload, user_id):
+    # no timestamp: the same payload always maps to the same (cacheable) URL
+    return signing.Signer(salt=TOKEN_SALT).sign_object({"u": user_id, "p": payload})
+
+
+def read_token(token):
+    """(user id, payload) for a QR token; raises signing.BadSignature if it wasn't issued by us."""
+    data = signing.Signer(salt=TOKEN_SALT).unsign_object(token)
+    try:
+        return data["u"], data["p"]
+    except (TypeError, KeyError) as exc:
+        raise signing.BadSignature("Malformed QR token") from exc
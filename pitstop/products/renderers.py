@@ -0,0 +1,27 @@
+"""
+MessagePack for API clients that send ``Accept: application/msgpack``.
+
+Serializers already turn decimals and datetimes into strings, so the
+output has the same shape as the JSON renderer, just smaller and cheaper
+to parse.
+"""
+import msgpack
+from django.utils.encoding import force_str
+from rest_framework.renderers import BaseRenderer
+
+
+def _fallback(obj):
+    # lazy translation strings in error details, and anything else JSON would str()
+    return force_str(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_fallback)
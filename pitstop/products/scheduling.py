@@ -0,0 +1,165 @@
+"""
+Installer availability.
+
+An installer's day is a grid of ``slot_minutes`` slots between
+``work_start`` and ``work_end``, each able to take ``capacity`` jobs at
+once.  ``free_slots`` answers "when is this installer free?" for a date
+range from a single indexed query over their live bookings; ``claim``
+books a slot by taking one of its numbered seats, and the
+``booking_unique_seat`` constraint makes a double booking fail at insert
+time even when two customers submit at the same moment.  ``decide``
+is the installer's side: pending → accepted/rejected, many at once.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Booking, InstallerSchedule
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def slot_starts(schedule):
+    """Start minutes (from midnight) of every slot in a working day."""
+    first, last = _minutes(schedule.work_start), _minutes(schedule.work_end)
+    return list(range(first, last - schedule.slot_minutes + 1, schedule.slot_minutes))
+
+
+def is_slot_start(schedule, t):
+    return t.second == 0 and _minutes(t) in slot_starts(schedule)
+
+
+def booked_load(installer, start_day, end_day, schedule):
+    """
+    Counter of {(day, slot start minute): live bookings overlapping it}.
+    Bookings are treated as [start, start + slot) intervals, so older
+    bookings that don't sit on the grid still block the slots they touch.
+    """
+    starts = slot_starts(schedule)
+    length = schedule.slot_minutes
+    load = Counter()
+    bookings = Booking.objects.filter(
+        installer=installer,
+        status__in=Booking.ACTIVE_STATUSES,
+        scheduled_date__gte=start_day,
+        scheduled_date__lte=end_day,
+    ).values_list("scheduled_date", "scheduled_time")
+    for day, t in bookings:
+        begin = _minutes(t)
+        for slot in starts:
+            if slot < begin + length and begin < slot + length:
+                load[day, slot] += 1
+    return load
+
+
+def free_slots(installer, start_day, end_day, schedule=None, now=None):
+    """
+    [(day, [(time, seats_left), ...]), ...] for every working day in the
+    range; slots that are full or already started are left out.
+    """
+    schedule = schedule or InstallerSchedule.for_installer(installer)
+    now = timezone.localtime(now)
+    load = booked_load(installer, start_day, end_day, schedule)
+    starts = slot_starts(schedule)
+
+    days = []
+    day = max(start_day, now.date())
+    while day <= end_day:
+        if schedule.works_on(day):
+            slots = []
+            for slot in starts:
+                begins = (datetime.min + timedelta(minutes=slot)).time()
+                if day == now.date() and begins <= now.time():
+                    continue
+                left = schedule.capacity - load[day, slot]
+                if left > 0:
+                    slots.append((begins, left))
+            days.append((day, slots))
+        day += timedelta(days=1)
+    return days
+
+
+def check_slot(schedule, day, t, now=None):
+    """Why ``day`` at ``t`` can't be booked with this installer, or None if it can."""
+    now = timezone.localtime(now)
+    if (day, t) <= (now.date(), now.time()):
+        return "Pick a time in the future."
+    if not schedule.works_on(day):
+        return "The installer doesn't work on that day."
+    if not is_slot_start(schedule, t):
+        return (
+            f"Pick a slot start between {schedule.work_start:%H:%M} and {schedule.work_end:%H:%M} "
+            f"({schedule.slot_minutes}-minute slots)."
+        )
+    return None
+
+
+def claim(booking, schedule=None):
+    """
+    Save a new booking into a free seat of its slot.  Tries each seat in
+    turn; the unique constraint rejects taken ones, so concurrent claims
+    can't both win.  Raises SlotUnavailable when every seat is taken
+    (including by overlapping off-grid bookings).
+    """
+    schedule = schedule or InstallerSchedule.for_installer(booking.installer)
+    load = booked_load(booking.installer, booking.scheduled_date, booking.scheduled_date, schedule)
+    if load[booking.scheduled_date, _minutes(booking.scheduled_time)] >= schedule.capacity:
+        raise SlotUnavailable("That slot is already fully booked.")
+
+    for seat in range(schedule.capacity):
+        booking.seat = seat
+        try:
+            with transaction.atomic():
+                booking.save()
+            return booking
+        except IntegrityError:
+            booking.pk = None
+            continue
+    booking.seat = None
+    raise SlotUnavailable("That slot was just taken. Please pick another time.")
+
+
+# the only moves an installer can make, and only from "pending"
+DECISIONS = {"accept": "accepted", "reject": "rejected"}
+MAX_BULK_DECISIONS = 500
+
+
+def decide(installer, booking_ids, action):
+    """
+    Accept or reject many of an installer's bookings at once.  Bookings
+    that are still pending move with a single UPDATE scoped to the
+    installer; the rest are reported, not touched.  Returns one result
+    per distinct id, in request order:
+    {"id", "result": "accepted"/"rejected"/"skipped"/"not_found", "status"}.
+    """
+    new_status = DECISIONS[action]
+    ids = list(dict.fromkeys(booking_ids))
+    with transaction.atomic():
+        current = dict(
+            Booking.objects.select_for_update()
+            .filter(installer=installer, id__in=ids)
+            .values_list("id", "status")
+        )
+        movable = {i for i in ids if current.get(i) == "pending"}
+        if movable:
+            Booking.objects.filter(installer=installer, id__in=movable, status="pending").update(
+                status=new_status
+            )
+
+    results = []
+    for i in ids:
+        if i not in current:
+            results.append({"id": i, "result": "not_found", "status": None})
+        elif i in movable:
+            results.append({"id": i, "result": new_status, "status": new_status})
+        else:
+            results.append({"id": i, "result": "skipped", "status": current[i]})
+    return results
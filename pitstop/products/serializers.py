@@ -1,6 +1,8 @@
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth.models import User
 from .models import Product, Order, OrderItem, Booking, Profile
+from .scheduling import DECISIONS, MAX_BULK_DECISIONS
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -17,7 +19,41 @@ class ProfileSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class InstallerLookupSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="user_id")
+    username = serializers.CharField(source="user.username")
+
+    class Meta:
+        model = Profile
+        fields = ["id", "username"]
+
+
+def parse_fields(raw, allowed):
+    """
+    ?fields=id,name,price -> ["id", "name", "price"], or None when absent
+    (every field). Unknown names are a 400.
+    """
+    names = [n.strip() for n in (raw or "").split(",") if n.strip()]
+    if not names:
+        return None
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise ValidationError({"fields": f"Unknown: {', '.join(unknown)}. Use {', '.join(allowed)}."})
+    return list(dict.fromkeys(names))
+
+
+class SparseFieldsMixin:
+    """Drops every field not named in the ``fields`` context (see parse_fields)."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        wanted = self.context.get("fields")
+        if not wanted:
+            return fields
+        return {name: field for name, field in fields.items() if name in wanted}
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     seller = UserSerializer(read_only=True)
 
     class Meta:
@@ -25,8 +61,53 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+class ProductSummarySerializer(serializers.ModelSerializer):
+    """What orders and bookings show of a product unless ?expand= asks for more."""
+
+    class Meta:
+        model = Product
+        fields = ["id", "name", "brand", "model", "price", "seller"]
+
+
+class ExpandedProductSerializer(ProductSerializer):
+    # ?expand=product: every field, but the seller stays an id
+    seller = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+# ?expand= paths the order and booking endpoints understand
+EXPANDABLE = {"product", "product.seller"}
+
+
+def parse_expand(raw):
+    """
+    "product.seller,..." -> {"product", "product.seller"}; expanding a
+    nested path expands its parents too. Unknown paths are a 400.
+    """
+    paths = {p.strip() for p in (raw or "").split(",") if p.strip()}
+    unknown = paths - EXPANDABLE
+    if unknown:
+        raise ValidationError({"expand": f"Unknown: {', '.join(sorted(unknown))}. Use {', '.join(sorted(EXPANDABLE))}."})
+    for path in list(paths):
+        parts = path.split(".")
+        paths.update(".".join(parts[:i]) for i in range(1, len(parts)))
+    return paths
+
+
+class ExpandableProductMixin:
+    """Swaps the compact ``product`` for a fuller one per the ``expand`` context."""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expand = self.context.get("expand", ())
+        if "product.seller" in expand:
+            fields["product"] = ProductSerializer(read_only=True)
+        elif "product" in expand:
+            fields["product"] = ExpandedProductSerializer(read_only=True)
+        return fields
+
+
+class OrderItemSerializer(ExpandableProductMixin, serializers.ModelSerializer):
+    product = ProductSummarySerializer(read_only=True)
 
     class Meta:
         model = OrderItem
@@ -58,15 +139,36 @@ class OrderSerializer(serializers.ModelSerializer):
             "convenience_fee",
             "delivery_days",
             "delivery_eta",
+            "delivery_status",
+            "shipped_at",
+            "out_for_delivery_at",
+            "delivered_at",
             "items",
         ]
+        read_only_fields = [
+            "delivery_eta",
+            "delivery_status",
+            "shipped_at",
+            "out_for_delivery_at",
+            "delivered_at",
+        ]
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(ExpandableProductMixin, serializers.ModelSerializer):
     customer = UserSerializer(read_only=True)
     installer = UserSerializer(read_only=True)
-    product = ProductSerializer(read_only=True)
+    product = ProductSummarySerializer(read_only=True)
 
     class Meta:
         model = Booking
         fields = "__all__"
+
+
+class BookingDecisionSerializer(serializers.Serializer):
+    """Input for the installer's bulk accept/reject."""
+    action = serializers.ChoiceField(choices=sorted(DECISIONS))
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_DECISIONS,
+    )
@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import catalog
+from .models import Product, ProductChange, Profile, SellerStats
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    # also fires for cascades (a seller's account removed), which skip Product.delete()
+    ProductChange.record([instance.pk], deleted=True)
+    catalog.changed()
+
+
+@receiver(post_save, sender=SellerStats)
+def seller_stats_saved(sender, **kwargs):
+    # store badges show on the product list; checkout's F() updates bump the version themselves
+    catalog.changed()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    # keep the installer search key in step with username changes (admin, shell)
+    Profile.objects.filter(user=instance).exclude(search_name=instance.username.lower()).update(
+        search_name=instance.username.lower()
+    )
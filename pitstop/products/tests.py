@@ -1,3 +1,1372 @@
-from django.test import TestCase
-
-# Create your tests here.
+import asyncio
+import base64
+import contextlib
+import csv
+import io
+import json
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import msgpack
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import catalog, delivery, live, loyalty, qr
+from .checkout import InsufficientStock, place_order, reserve_cart
+from .models import (
+    Booking,
+    Cart,
+    CartLine,
+    CatalogVersion,
+    LoyaltyEntry,
+    Order,
+    OrderItem,
+    Product,
+    ProductChange,
+    Profile,
+    SellerDailySales,
+    SellerStats,
+    StockReservation,
+    out_of_range_years,
+    parse_years,
+)
+from .pagination import encode_cursor
+from .pricing import QUOTE_SALT, Quote
+
+
+def make_user(username, account_type):
+    user = User.objects.create_user(username=username, password="pass12345")
+    Profile.objects.create(user=user, account_type=account_type)
+    return user
+
+
+class SellerDashboardQueryTests(TestCase):
+    def setUp(self):
+        self.seller = make_user("seller", "seller")
+        self.customer = make_user("customer", "customer")
+        self.products = [
+            Product.objects.create(seller=self.seller, name=f"Part {i}", price=Decimal("100"), stock=50)
+            for i in range(8)
+        ]
+        self.client.force_login(self.seller)
+
+    def add_orders(self, count):
+        for i in range(count):
+            order = Order.objects.create(user=self.customer, total=Decimal("0"), final_total=Decimal("0"))
+            product = self.products[i % len(self.products)]
+            OrderItem.objects.create(
+                order=order,
+                product=product,
+                seller=self.seller,
+                product_name=product.name,
+                unit_price=product.price,
+                quantity=(i % 3) + 1,
+            )
+
+    def count_dashboard_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("seller_dashboard"))
+            # force the lazy low-stock queryset so it's counted too
+            list(response.context["low_stock"])
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_order_volume(self):
+        self.add_orders(5)
+        _, small = self.count_dashboard_queries()
+
+        self.add_orders(60)
+        response, large = self.count_dashboard_queries()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(len(response.context["top_products"]), 5)
+
+    def test_aggregates_match_order_items(self):
+        self.add_orders(10)
+        response, _ = self.count_dashboard_queries()
+
+        expected_units = sum((i % 3) + 1 for i in range(10))
+        self.assertEqual(response.context["units_30"], expected_units)
+        self.assertEqual(response.context["rev_30"], Decimal("100") * expected_units)
+        top = response.context["top_products"][0]
+        self.assertEqual(set(top), {"name", "qty", "revenue"})
+        self.assertEqual(top["revenue"], Decimal("100") * top["qty"])
+
+    def test_sales_of_deleted_products_still_count(self):
+        self.add_orders(1)
+        self.products[0].delete()
+        response, _ = self.count_dashboard_queries()
+        self.assertEqual(response.context["units_30"], 1)
+        self.assertEqual(response.context["top_products"][0]["name"], "Part 0")
+
+        body = b"".join(self.client.get(reverse("seller_export_sales", args=["csv"])).streaming_content)
+        self.assertIn(b"Part 0", body)
+
+
+class SellerStatsRebuildTests(TestCase):
+    def test_rebuild_keeps_sales_of_deleted_products(self):
+        seller, idle = make_user("seller", "seller"), make_user("idle", "seller")
+        buyer = make_user("buyer", "customer")
+        pads = [
+            Product.objects.create(seller=seller, name=f"Pad {i}", price=Decimal("6000.00"), stock=5)
+            for i in range(2)
+        ]
+        cart = {str(p.id): {"name": p.name, "price": 6000.0, "quantity": 1} for p in pads}
+        place_order(buyer, cart, total=Decimal("12000.00"), final_total=Decimal("12000.00"))
+        pads[0].delete()
+        SellerStats.objects.filter(seller=seller).update(lifetime_revenue=1, order_count=9)
+        SellerStats.objects.create(seller=idle, lifetime_revenue=50, units_sold=1, order_count=1)
+
+        call_command("rebuild_seller_stats", stdout=io.StringIO())
+
+        stats = SellerStats.objects.get(seller=seller)
+        self.assertEqual((stats.lifetime_revenue, stats.units_sold, stats.order_count), (Decimal("12000.00"), 2, 1))
+        self.assertEqual(stats.badge_level, "verified")
+        self.assertEqual(SellerStats.objects.get(seller=idle).lifetime_revenue, 0)
+
+
+class DailySalesRollupTests(TestCase):
+    def test_rollup_rebuilds_linked_rows_and_keeps_deleted_products(self):
+        seller, buyer = make_user("seller", "seller"), make_user("buyer", "customer")
+        gone, kept = (
+            Product.objects.create(seller=seller, name=name, price=Decimal("10.00"), stock=5)
+            for name in ("Gone", "Kept")
+        )
+        for _ in range(2):
+            cart = {str(p.id): {"name": p.name, "price": 10.0, "quantity": 1} for p in (gone, kept)}
+            place_order(buyer, cart, total=Decimal("20.00"), final_total=Decimal("20.00"))
+        gone.delete()
+        SellerDailySales.objects.filter(product=kept).update(units=99, orders=99)
+
+        call_command("rollup_daily_sales", stdout=io.StringIO())
+
+        rows = {
+            row.product_name: (row.product_id, row.units, row.orders)
+            for row in SellerDailySales.objects.filter(seller=seller)
+        }
+        self.assertEqual(rows, {"Gone": (None, 2, 2), "Kept": (kept.id, 2, 2)})
+
+    def test_checkout_upserts_once_per_product_and_seller(self):
+        buyer = make_user("buyer", "customer")
+        sellers = make_user("seller_a", "seller"), make_user("seller_b", "seller")
+        products = [
+            Product.objects.create(seller=sellers[i % 2], name=f"Part {i}", price=Decimal("10.00"), stock=50)
+            for i in range(3)
+        ]
+        cart = {str(p.id): {"name": p.name, "price": 10.0, "quantity": 2} for p in products}
+        place_order(buyer, cart, total=Decimal("60.00"), final_total=Decimal("60.00"))
+
+        with CaptureQueriesContext(connection) as ctx:
+            place_order(buyer, cart, total=Decimal("60.00"), final_total=Decimal("60.00"))
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("UPDATE", "INSERT"))]
+        self.assertEqual(sum('"products_sellerdailysales"' in sql for sql in writes), 3)
+        self.assertEqual(sum('"products_sellerstats"' in sql for sql in writes), 2)
+
+        self.assertEqual(
+            sorted(SellerDailySales.objects.values_list("product_name", "units", "revenue", "orders")),
+            [(f"Part {i}", 4, Decimal("40.00"), 2) for i in range(3)],
+        )
+        stats = SellerStats.objects.get(seller=sellers[0])
+        self.assertEqual((stats.lifetime_revenue, stats.units_sold, stats.order_count), (Decimal("80.00"), 8, 2))
+
+    def test_api_filters_by_product_and_rejects_bad_ids(self):
+        seller, buyer = make_user("seller", "seller"), make_user("buyer", "customer")
+        pad, mat = (
+            Product.objects.create(seller=seller, name=name, price=Decimal("10.00"), stock=5)
+            for name in ("Pad", "Mat")
+        )
+        cart = {str(pad.id): {"name": "Pad", "price": 10.0, "quantity": 2}, str(mat.id): {"name": "Mat", "price": 10.0, "quantity": 1}}
+        place_order(buyer, cart, total=Decimal("30.00"), final_total=Decimal("30.00"))
+        self.client.force_login(seller)
+        url = reverse("api-seller-daily-sales")
+
+        response = self.client.get(url, {"days": 7, "product": pad.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["series"][-1]["units"], 2)
+
+        for bad in ("abc", "-1", "1.5", "1 "):
+            with self.subTest(product=bad):
+                response = self.client.get(url, {"days": 7, "product": bad})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("product", response.json())
+
+
+class CartTests(TestCase):
+    def setUp(self):
+        seller = make_user("seller", "seller")
+        self.pad = Product.objects.create(seller=seller, name="Pad", price=Decimal("10.00"), stock=5)
+        self.disc = Product.objects.create(seller=seller, name="Disc", price=Decimal("30.00"), stock=5)
+        self.buyer = make_user("buyer", "customer")
+
+    def test_anonymous_cart_merges_into_the_users_cart_on_login(self):
+        cart = Cart.objects.create(user=self.buyer)
+        CartLine.objects.create(cart=cart, product=self.pad, quantity=1, unit_price=self.pad.price)
+
+        self.client.post(reverse("add_to_cart", args=[self.pad.id]), {"quantity": 2})
+        self.client.post(reverse("add_to_cart", args=[self.disc.id]), {"quantity": 1})
+        anon_id = self.client.session["cart_id"]
+
+        self.client.login(username="buyer", password="pass12345")
+        self.client.get(reverse("view_cart"))
+
+        quantities = dict(cart.lines.values_list("product_id", "quantity"))
+        self.assertEqual(quantities, {self.pad.id: 3, self.disc.id: 1})
+        self.assertFalse(Cart.objects.filter(id=anon_id).exists())
+        self.assertNotIn("cart_id", self.client.session)
+
+    def test_view_revalidates_price_and_stock(self):
+        self.client.force_login(self.buyer)
+        self.client.post(reverse("add_to_cart", args=[self.pad.id]), {"quantity": 4})
+        Product.objects.filter(id=self.pad.id).update(price=Decimal("12.00"), stock=2)
+
+        response = self.client.get(reverse("view_cart"))
+        self.assertContains(response, "Price of Pad changed from ₱10.00 to ₱12.00.")
+        self.assertContains(response, "Only 2 pcs available for Pad.")
+        self.assertEqual(CartLine.objects.get(product=self.pad).unit_price, Decimal("12.00"))
+
+    def test_non_numeric_product_id_is_ignored(self):
+        self.client.force_login(self.buyer)
+        self.client.post(reverse("add_to_cart", args=[self.pad.id]), {"quantity": 1})
+        for action in ("update", "remove"):
+            with self.subTest(action=action):
+                response = self.client.post(reverse("view_cart"), {"product_id": "abc", action: "1", "quantity": 2})
+                self.assertEqual(response.status_code, 302)
+        self.assertEqual(CartLine.objects.get(product=self.pad).quantity, 1)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.seller = make_user("seller", "seller")
+        self.pad = Product.objects.create(seller=self.seller, name="Pad", price=Decimal("10.00"), stock=3)
+        self.buyer = make_user("buyer", "customer")
+
+    def snapshot_for(self, product, quantity):
+        return {str(product.id): {"name": product.name, "price": float(product.price), "quantity": quantity}}
+
+    def place(self, quantities, **order_fields):
+        """place_order for the buyer straight from {product: quantity}."""
+        cart = {}
+        for product, qty in quantities.items():
+            cart.update(self.snapshot_for(product, qty))
+        total = sum((product.price * qty for product, qty in quantities.items()), Decimal("0"))
+        return place_order(self.buyer, cart, total=total, final_total=total, **order_fields)
+
+    def start_checkout(self, quantity):
+        """Add to cart and check out as the buyer; leaves a pending checkout in the session."""
+        self.client.force_login(self.buyer)
+        self.client.post(reverse("add_to_cart", args=[self.pad.id]), {"quantity": quantity})
+        response = self.client.post(reverse("view_cart"), {"checkout": "1"})
+        self.assertRedirects(response, reverse("mock_payment"))
+
+    def pay(self, key):
+        return self.client.post(reverse("mock_payment"), {"payment_method": "COD", "idempotency_key": key})
+
+    def test_resubmitted_payment_replays_the_order(self):
+        self.start_checkout(3)
+        first = self.pay("k1")
+        second = self.pay("k1")
+
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.context["order"], first.context["order"])
+        self.pad.refresh_from_db()
+        self.assertEqual(self.pad.stock, 0)
+
+    def tamper(self, change):
+        session = self.client.session
+        change(session["pending_checkout"])
+        session.save()
+
+    def assert_checkout_rejected(self):
+        response = self.pay("")
+        self.assertRedirects(response, reverse("view_cart"), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+        self.assertNotIn("pending_checkout", self.client.session)
+
+    def test_edited_cart_snapshot_is_rejected(self):
+        self.start_checkout(3)
+        self.tamper(lambda pending: pending["cart"][str(self.pad.id)].update(quantity=1))
+        self.assert_checkout_rejected()
+
+    def test_forged_quote_is_rejected(self):
+        self.start_checkout(3)
+        quote = Quote.load(self.client.session["pending_checkout"]["quote"])
+        data = {k: str(v) if isinstance(v, Decimal) else v for k, v in asdict(quote).items()}
+        data["final_total"] = "0.01"
+        # same payload format, signed without the server's key
+        forged = signing.dumps(data, key="not-the-secret-key", salt=QUOTE_SALT, compress=True)
+        self.tamper(lambda pending: pending.update(quote=forged))
+        self.assert_checkout_rejected()
+
+    def test_quote_expires_with_the_holds(self):
+        self.start_checkout(3)
+        later = time.time() + settings.STOCK_RESERVATION_MINUTES * 60 + 1
+        with mock.patch("django.core.signing.time.time", return_value=later):
+            self.assert_checkout_rejected()
+
+    def test_hold_blocks_other_buyers_until_it_expires(self):
+        rival = make_user("rival", "customer")
+        reserve_cart(self.buyer, self.snapshot_for(self.pad, 2))
+        with self.assertRaises(InsufficientStock):
+            reserve_cart(rival, self.snapshot_for(self.pad, 2))
+
+        StockReservation.objects.filter(user=self.buyer).update(expires_at=timezone.now() - timedelta(seconds=1))
+        reserve_cart(rival, self.snapshot_for(self.pad, 2))  # a lapsed hold no longer counts
+
+        out = io.StringIO()
+        call_command("release_expired_reservations", stdout=out)
+        self.assertIn("Released 1 expired reservations.", out.getvalue())
+        self.assertEqual(list(StockReservation.objects.values_list("user", flat=True)), [rival.id])
+
+    def test_placing_the_order_turns_holds_into_stock(self):
+        reserve_cart(self.buyer, self.snapshot_for(self.pad, 3))
+        self.place({self.pad: 3})  # the buyer's own hold counts towards what they may buy
+        self.assertFalse(StockReservation.objects.exists())
+        self.pad.refresh_from_db()
+        self.assertEqual(self.pad.stock, 0)
+
+    def test_one_short_line_rolls_back_the_whole_order(self):
+        disc = Product.objects.create(seller=self.seller, name="Disc", price=Decimal("30.00"), stock=1)
+        with self.assertRaises(InsufficientStock), transaction.atomic():
+            self.place({self.pad: 2, disc: 2})
+
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(OrderItem.objects.count(), 0)
+        self.assertEqual(
+            dict(Product.objects.values_list("name", "stock")), {"Pad": 3, "Disc": 1}
+        )
+        self.assertFalse(SellerStats.objects.exists())
+        self.assertFalse(SellerDailySales.objects.exists())
+
+    def test_same_key_racing_the_first_order_is_a_conflict_not_a_stock_error(self):
+        # the second request passed mock_payment's lookup before the first committed
+        self.place({self.pad: 3}, idempotency_key="k1")
+        with self.assertRaisesMessage(IntegrityError, "idempotency_key"), transaction.atomic():
+            self.place({self.pad: 3}, idempotency_key="k1")
+        self.pad.refresh_from_db()
+        self.assertEqual(self.pad.stock, 0)
+
+
+class LoyaltyTests(TestCase):
+    def setUp(self):
+        self.buyer = make_user("buyer", "customer")
+
+    def test_constraints_reject_a_second_redemption(self):
+        LoyaltyEntry.objects.create(user=self.buyer, kind=LoyaltyEntry.REDEEM, voucher_code="5PCT")
+        LoyaltyEntry.objects.create(user=self.buyer, kind=LoyaltyEntry.REDEEM, voucher_code="P250", slot=1)
+        for code, slot in (("5PCT", None), ("P250", 1)):
+            with self.subTest(code=code), self.assertRaises(IntegrityError), transaction.atomic():
+                LoyaltyEntry.objects.create(user=self.buyer, kind=LoyaltyEntry.REDEEM, voucher_code=code, slot=slot)
+
+    def test_redeem_racing_another_checkout_is_unavailable(self):
+        loyalty.record_spend(self.buyer, Decimal("25000.00"))  # 5PCT unlocked, one P250 granted
+        for code in ("5PCT", "P250"):
+            with self.subTest(code=code):
+                stale = loyalty.current_state(self.buyer)  # read before the other checkout commits
+                loyalty.redeem(self.buyer, code)
+                with mock.patch.object(loyalty, "current_state", return_value=stale):
+                    with self.assertRaises(loyalty.VoucherUnavailable):
+                        loyalty.redeem(self.buyer, code)
+        self.assertEqual(LoyaltyEntry.objects.filter(kind=LoyaltyEntry.REDEEM).count(), 2)
+
+    def test_verify_reports_a_snapshot_with_no_ledger_behind_it(self):
+        in_step = make_user("in_step", "customer")
+        loyalty.record_spend(in_step, Decimal("500.00"))
+        loyalty.refresh_snapshot(in_step)
+        Profile.objects.filter(user=self.buyer).update(total_spent=Decimal("9000.00"), extra_voucher_balance=2)
+
+        out = io.StringIO()
+        call_command("verify_loyalty", "--fix", stdout=out)
+        self.assertIn(f"user {self.buyer.id}: snapshot spent=9000.00 balance=2", out.getvalue())
+        self.assertIn("Checked 2 profiles, 1 snapshot(s) out of date (fixed).", out.getvalue())
+
+        profile = Profile.objects.get(user=self.buyer)
+        self.assertEqual((profile.total_spent, profile.extra_voucher_balance), (Decimal("0.00"), 0))
+
+
+class DeliveryStageTests(TestCase):
+    def setUp(self):
+        self.buyer = make_user("buyer", "customer")
+        self.placed = timezone.now().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=10)
+
+    def order(self, delivery_days):
+        order = Order.objects.create(
+            user=self.buyer,
+            total=Decimal("0"),
+            final_total=Decimal("0"),
+            **delivery.schedule(delivery_days, today=self.placed.date()),
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=self.placed)
+        return order
+
+    def advance(self, days):
+        now = self.placed + timedelta(days=days)
+        return now, delivery.advance_due(now=now)
+
+    def test_orders_move_one_stage_per_due_date(self):
+        order, unscheduled = self.order(3), self.order(0)
+
+        self.assertEqual(self.advance(0)[1][Order.WITH_COURIER], 0)  # packed on the day it's placed
+        expected = [(1, Order.WITH_COURIER), (2, Order.OUT_FOR_DELIVERY), (3, Order.DELIVERED)]
+        for days, status in expected:
+            now, moved = self.advance(days)
+            order.refresh_from_db()
+            self.assertEqual((order.delivery_status, moved[status]), (status, 1))
+            self.assertEqual(order.delivery_updated_at, now)
+
+        self.assertEqual(order.shipped_at, self.placed + timedelta(days=1))
+        self.assertEqual(order.out_for_delivery_at, self.placed + timedelta(days=2))
+        self.assertEqual(order.delivered_at, self.placed + timedelta(days=3))
+        self.assertEqual(sum(self.advance(4)[1].values()), 0)  # nothing left to move
+        unscheduled.refresh_from_db()
+        self.assertEqual(unscheduled.delivery_status, Order.AWAITING)
+
+    def test_missed_order_jumps_to_its_stage_and_fills_skipped_timestamps(self):
+        order = self.order(3)
+        now, moved = self.advance(5)
+        order.refresh_from_db()
+        self.assertEqual(moved[Order.DELIVERED], 1)
+        self.assertEqual(order.delivery_status, Order.DELIVERED)
+        self.assertEqual((order.shipped_at, order.out_for_delivery_at, order.delivered_at), (now, now, now))
+
+
+class LiveTrackingTests(TestCase):
+    def setUp(self):
+        self.buyer = make_user("buyer", "customer")
+        self.order = Order.objects.create(user=self.buyer, total=Decimal("0"), final_total=Decimal("0"))
+        self.delivered = Order.objects.create(
+            user=self.buyer, total=Decimal("0"), final_total=Decimal("0"), delivery_status=Order.DELIVERED
+        )
+        # a private notifier whose thread never wakes during the test;
+        # the tests run its poll by hand
+        self.notifier = live.DeliveryNotifier(interval=3600)
+        patcher = mock.patch.object(live, "notifier", self.notifier)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def move(self, status):
+        await Order.objects.filter(pk=self.order.pk).aupdate(
+            delivery_status=status, delivery_updated_at=timezone.now()
+        )
+        return await sync_to_async(self.notifier.poll_once)()
+
+    async def test_notifier_fans_out_to_the_owner_and_forgets_unsubscribed(self):
+        first, second = self.notifier.subscribe(self.buyer.id), self.notifier.subscribe(self.buyer.id)
+        stranger = self.notifier.subscribe(self.buyer.id + 1000)
+        self.assertEqual(self.notifier.subscriber_count(), 3)
+
+        self.assertEqual(await self.move(Order.PACKING), 1)
+        for sub in (first, second):
+            event = await sub.next(1)
+            self.assertEqual((event["order"], event["status"]), (self.order.id, Order.PACKING))
+        self.assertIsNone(await stranger.next(0.05))
+
+        # the lookback re-reads the same row; it isn't sent twice
+        self.assertEqual(await sync_to_async(self.notifier.poll_once)(), 0)
+
+        for sub in (first, second, stranger):
+            self.notifier.unsubscribe(sub)
+        self.assertEqual(self.notifier.subscriber_count(), 0)
+        self.assertEqual(dict(self.notifier._subscribers), {})
+        self.assertEqual(await self.move(Order.WITH_COURIER), 0)
+
+    async def test_event_stream_sends_snapshot_then_pushes_and_unsubscribes_on_disconnect(self):
+        await self.async_client.aforce_login(self.buyer)
+        response = await self.async_client.get(reverse("order_events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        chunks = asyncio.Queue()
+
+        async def read():
+            async for chunk in response.streaming_content:
+                await chunks.put(chunk.decode())
+
+        async def next_event():
+            frame = await asyncio.wait_for(chunks.get(), 5)
+            data = next(line for line in frame.splitlines() if line.startswith("data: "))
+            return json.loads(data[len("data: "):])
+
+        reader = asyncio.create_task(read())
+        try:
+            self.assertTrue((await asyncio.wait_for(chunks.get(), 5)).startswith("retry: "))
+            snapshot = await next_event()  # delivered orders are left out
+            self.assertEqual((snapshot["order"], snapshot["status"]), (self.order.id, Order.AWAITING))
+            self.assertEqual(self.notifier.subscriber_count(), 1)
+
+            self.assertEqual(await self.move(Order.PACKING), 1)
+            pushed = await next_event()
+            self.assertEqual((pushed["order"], pushed["status"]), (self.order.id, Order.PACKING))
+            self.assertEqual(pushed["label"], "Seller is packing")
+        finally:
+            reader.cancel()  # the client goes away
+            with contextlib.suppress(asyncio.CancelledError):
+                await reader
+        self.assertEqual(self.notifier.subscriber_count(), 0)
+
+    @override_settings(LIVE_TRACKING_LONGPOLL_SECONDS=0.2)
+    async def test_long_poll_times_out_with_the_unchanged_stage(self):
+        await self.async_client.aforce_login(self.buyer)
+        url = reverse("order_status_poll", args=[self.order.id])
+
+        started = time.monotonic()
+        response = await self.async_client.get(url, {"stage": Order.AWAITING})
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(response.json()["status"], Order.AWAITING)
+        self.assertEqual(response["Cache-Control"], "no-store")
+        self.assertEqual(self.notifier.subscriber_count(), 0)
+
+        # a stale ?stage= is answered straight away
+        response = await self.async_client.get(url, {"stage": Order.PACKING})
+        self.assertEqual(response.json()["status"], Order.AWAITING)
+        self.assertEqual(self.notifier.subscriber_count(), 0)
+
+        other = await sync_to_async(make_user)("other", "customer")
+        await self.async_client.aforce_login(other)
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+
+    @override_settings(LIVE_TRACKING_LONGPOLL_SECONDS=5)
+    async def test_long_poll_answers_when_the_stage_changes(self):
+        await self.async_client.aforce_login(self.buyer)
+        url = reverse("order_status_poll", args=[self.order.id])
+        request = asyncio.create_task(self.async_client.get(url, {"stage": Order.AWAITING}))
+
+        for _ in range(100):
+            if self.notifier.subscriber_count():
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.notifier.subscriber_count(), 1)
+
+        started = time.monotonic()
+        self.assertEqual(await self.move(Order.PACKING), 1)
+        response = await asyncio.wait_for(request, 5)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.json()["status"], Order.PACKING)
+        self.assertEqual(self.notifier.subscriber_count(), 0)
+
+
+class TransactionHistoryTests(TestCase):
+    def setUp(self):
+        self.customer = make_user("buyer", "customer")
+        self.client.force_login(self.customer)
+
+    def add_orders(self, count):
+        for i in range(count):
+            order = Order.objects.create(user=self.customer, total=Decimal("0"), final_total=Decimal("0"))
+            for qty in (1, 2):
+                OrderItem.objects.create(
+                    order=order,
+                    product_name=f"Part {i}",
+                    unit_price=Decimal("12.50"),
+                    quantity=qty,
+                )
+
+    def get_page(self, url=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url or reverse("transaction_history"))
+        return response, len(ctx.captured_queries)
+
+    @override_settings(ORDER_HISTORY_PAGE_SIZE=5)
+    def test_query_count_does_not_grow_with_history(self):
+        self.add_orders(3)
+        _, small = self.get_page()
+
+        self.add_orders(40)
+        response, large = self.get_page()
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.context["orders"]), 5)
+
+    @override_settings(ORDER_HISTORY_PAGE_SIZE=4)
+    def test_pages_walk_history_newest_first(self):
+        self.add_orders(10)
+        expected = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        seen, url = [], None
+        while True:
+            response, _ = self.get_page(url)
+            seen.extend(order.id for order in response.context["orders"])
+            url = response.context["next_url"]
+            if url is None:
+                break
+        self.assertEqual(seen, expected)
+
+        # and back again from the last page
+        response, _ = self.get_page(response.context["previous_url"])
+        self.assertEqual([o.id for o in response.context["orders"]], expected[4:8])
+
+    def test_line_subtotals_come_from_sql(self):
+        self.add_orders(1)
+        response, _ = self.get_page()
+        subtotals = [item.subtotal for item in response.context["orders"][0].items.all()]
+        self.assertEqual(subtotals, [Decimal("12.50"), Decimal("25.00")])
+
+    def test_forged_cursor_falls_back_to_the_first_page(self):
+        self.add_orders(2)
+        forged = base64.urlsafe_b64encode(json.dumps({"n": "yesterday", "i": 1}).encode()).decode()
+        response, _ = self.get_page(f"{reverse('transaction_history')}?cursor={forged}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["orders"]), 2)
+
+
+@override_settings(EXPORT_CHUNK_SIZE=200)
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.seller = make_user("seller", "seller")
+        self.customer = make_user("buyer", "customer")
+        self.product = Product.objects.create(seller=self.seller, name="Brake Pad", price=Decimal("250"), stock=10)
+
+    def add_items(self, count, per_order=10):
+        orders = Order.objects.bulk_create(
+            Order(user=self.customer, total=Decimal("0"), final_total=Decimal("0"))
+            for _ in range(count // per_order)
+        )
+        OrderItem.objects.bulk_create(
+            OrderItem(
+                order=order,
+                product=self.product,
+                seller=self.seller,
+                product_name=self.product.name,
+                unit_price=self.product.price,
+                quantity=2,
+            )
+            for order in orders
+            for _ in range(per_order)
+        )
+
+    def export(self, user, url):
+        self.client.force_login(user)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def stream_peak(self, response):
+        """Consume a streamed export; return (lines, peak bytes allocated while doing it)."""
+        lines = 0
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                lines += chunk.count(b"\n")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, peak
+
+    def test_peak_memory_does_not_grow_with_row_count(self):
+        url = reverse("export_orders", args=["csv"])
+        self.add_items(1_000)
+        small_lines, small_peak = self.stream_peak(self.export(self.customer, url))
+
+        self.add_items(19_000)
+        large_lines, large_peak = self.stream_peak(self.export(self.customer, url))
+
+        self.assertEqual((small_lines, large_lines), (1_001, 20_001))
+        # 20x the rows, roughly the same working set (a list() of rows would be ~20x)
+        self.assertLess(large_peak, small_peak * 2)
+
+    def test_csv_rows_and_date_filter(self):
+        self.add_items(20)
+        old = Order.objects.order_by("id").first()
+        Order.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+        rows = list(csv.reader(self.export(self.customer, reverse("export_orders", args=["csv"])).getvalue().decode().splitlines()))
+        self.assertEqual(rows[0][:2], ["order_id", "placed_at"])
+        self.assertEqual(len(rows), 21)
+        self.assertEqual(rows[1][0], str(old.pk))  # oldest first
+        self.assertEqual(rows[1][-1], "500.00")
+
+        since = (timezone.localdate() - timedelta(days=7)).isoformat()
+        url = reverse("export_orders", args=["csv"]) + f"?start={since}"
+        self.assertEqual(len(self.export(self.customer, url).getvalue().splitlines()), 11)
+
+    def test_seller_ndjson_and_bad_input(self):
+        self.add_items(10)
+        response = self.export(self.seller, reverse("seller_export_sales", args=["ndjson"]))
+        records = [json.loads(line) for line in response.getvalue().splitlines()]
+        self.assertEqual(len(records), 10)
+        self.assertEqual(records[0]["line_total"], "500.00")
+
+        self.client.force_login(self.customer)
+        self.assertEqual(self.client.get(reverse("export_orders", args=["xml"])).status_code, 404)
+        bad = reverse("export_orders", args=["csv"]) + "?start=2025-02-30"
+        self.assertEqual(self.client.get(bad).status_code, 400)
+
+
+class PaymentQrTests(TestCase):
+    def test_token_only_serves_the_user_it_was_issued_to(self):
+        owner, other = make_user("owner", "customer"), make_user("other", "customer")
+        url = reverse("payment_qr", args=[qr.make_token("Pitstop.ph | total=100.00", owner.id), "svg"])
+
+        self.client.force_login(owner)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_svg_body_and_etag_revalidation(self):
+        owner = make_user("owner", "customer")
+        self.client.force_login(owner)
+        token = qr.make_token("Pitstop.ph | total=250.00", owner.id)
+        url = reverse("payment_qr", args=[token, "svg"])
+
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", response.content)
+        self.assertIn("immutable", response["Cache-Control"])
+        etag = response["ETag"]
+
+        with mock.patch.object(qr, "render") as render:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+        render.assert_not_called()
+
+        # the tag is per format, so the PNG isn't answered with the SVG's 304
+        png = self.client.get(reverse("payment_qr", args=[token, "png"]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(png.status_code, 200)
+        self.assertEqual(png["Content-Type"], "image/png")
+
+    def test_lru_evicts_least_recently_used(self):
+        images = qr.LRUCache(2)
+        images.set("a", b"1")
+        images.set("b", b"2")
+        self.assertEqual(images.get("a"), b"1")  # "b" is now the oldest
+        images.set("c", b"3")
+        self.assertEqual(len(images), 2)
+        self.assertIsNone(images.get("b"))
+        self.assertEqual((images.get("a"), images.get("c")), (b"1", b"3"))
+
+    def test_prefetch_renders_once_and_render_waits_for_it(self):
+        qr._images.clear()
+        started, release = threading.Event(), threading.Event()
+        encode = qr.encode
+
+        def slow_encode(payload, fmt="png"):
+            started.set()
+            release.wait(5)
+            return encode(payload, fmt)
+
+        payload = "Pitstop.ph | total=99.00"
+        with mock.patch.object(qr, "encode", side_effect=slow_encode) as patched:
+            qr.prefetch(payload)
+            self.assertTrue(started.wait(5))
+            qr.prefetch(payload)  # already in flight: not submitted again
+            release.set()
+            data = qr.render(payload)
+            self.assertEqual(qr.render(payload), data)
+        self.assertEqual(patched.call_count, 1)
+        self.assertEqual(data, encode(payload))
+        qr.prefetch(payload)  # cached: nothing to do
+        self.assertNotIn(qr.image_key(payload, "png"), qr._in_flight)
+
+
+class InstallerDashboardQueryTests(TestCase):
+    def setUp(self):
+        self.installer = make_user("installer", "installer")
+        self.customer = make_user("customer", "customer")
+        self.client.force_login(self.installer)
+
+    def add_bookings(self, count):
+        statuses = ["pending", "accepted", "rejected"]
+        today = timezone.localdate()
+        Booking.objects.bulk_create(
+            Booking(
+                customer=self.customer,
+                installer=self.installer,
+                scheduled_date=today + timedelta(days=i % 20 - 5),
+                scheduled_time="10:00",
+                status=statuses[i % 3],
+                finders_fee=Decimal("200"),
+            )
+            for i in range(count)
+        )
+
+    def get_dashboard(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("installer_dashboard"))
+            list(response.context["upcoming"])
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        self.add_bookings(6)
+        _, small = self.get_dashboard()
+
+        self.add_bookings(90)
+        _, large = self.get_dashboard()
+
+        self.assertEqual(small, large)
+
+    def test_counts_and_fees(self):
+        self.add_bookings(30)
+        response, _ = self.get_dashboard()
+
+        self.assertEqual(response.context["total_bookings"], 30)
+        self.assertEqual(
+            (response.context["pending_count"], response.context["accepted_count"], response.context["rejected_count"]),
+            (10, 10, 10),
+        )
+        self.assertEqual(response.context["total_finders_fee"], Decimal("2000"))
+        upcoming = list(response.context["upcoming"])
+        self.assertTrue(all(b.status != "rejected" and b.scheduled_date >= timezone.localdate() for b in upcoming))
+        self.assertEqual(upcoming, sorted(upcoming, key=lambda b: (b.scheduled_date, b.scheduled_time)))
+
+
+class InstallerSearchTests(TestCase):
+    def setUp(self):
+        self.installer = make_user("Garage_One", "installer")
+        self.client.force_login(make_user("buyer", "customer"))
+
+    def search(self, q):
+        response = self.client.get(reverse("api-installer-search"), {"q": q})
+        self.assertEqual(response.status_code, 200)
+        return [row["username"] for row in response.json()["results"]]
+
+    def test_rename_moves_the_search_key(self):
+        self.assertEqual(self.search("garage"), ["Garage_One"])
+        self.installer.username = "Bay Nine"
+        self.installer.save()
+        self.assertEqual(self.search("garage"), [])
+        self.assertEqual(self.search("bay"), ["Bay Nine"])
+
+    def test_prefix_ending_in_the_last_code_point(self):
+        self.assertEqual(self.search("g" + chr(0x10FFFF)), [])
+
+
+class InstallerAvailabilityTests(TestCase):
+    def setUp(self):
+        self.installer = make_user("installer", "installer")
+        self.customer = make_user("customer", "customer")
+        self.client.force_login(self.customer)
+        self.day = timezone.localdate() + timedelta(days=1)
+        while self.day.weekday() != 0:  # a Monday, inside the default work week
+            self.day += timedelta(days=1)
+
+    def book(self, time):
+        return self.client.post(reverse("book_installation"), {
+            "installer": self.installer.id,
+            "car_brand": "Toyota",
+            "car_model": "Vios",
+            "car_year": "2019",
+            "scheduled_date": self.day.isoformat(),
+            "scheduled_time": time,
+        })
+
+    def free_starts(self):
+        url = reverse("api-installer-availability", args=[self.installer.id])
+        data = self.client.get(url, {"start": self.day.isoformat(), "end": self.day.isoformat()}).json()
+        return [slot["start"] for slot in data["days"][0]["slots"]]
+
+    def test_booked_slot_is_hidden_and_cannot_be_double_booked(self):
+        self.assertIn("10:00", self.free_starts())
+        self.assertEqual(self.book("10:00").status_code, 302)
+        self.assertNotIn("10:00", self.free_starts())
+
+        response = self.book("10:00")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("scheduled_time", response.context["form"].errors)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_seat_constraint_rejects_a_racing_insert(self):
+        self.book("10:00")
+        clash = Booking(
+            customer=self.customer,
+            installer=self.installer,
+            scheduled_date=self.day,
+            scheduled_time="10:00",
+            seat=0,
+        )
+        with self.assertRaises(IntegrityError):
+            clash.save()
+
+    def test_off_grid_times_are_rejected(self):
+        response = self.book("10:30")
+        self.assertIn("scheduled_time", response.context["form"].errors)
+
+
+class BookingBulkDecisionTests(TestCase):
+    def setUp(self):
+        self.installer = make_user("installer", "installer")
+        self.other = make_user("other", "installer")
+        customer = make_user("customer", "customer")
+        day = timezone.localdate() + timedelta(days=2)
+        self.bookings = [
+            Booking.objects.create(
+                customer=customer, installer=self.installer,
+                scheduled_date=day, scheduled_time=f"{8 + i}:00",
+            )
+            for i in range(5)
+        ]
+        self.foreign = Booking.objects.create(
+            customer=customer, installer=self.other, scheduled_date=day, scheduled_time="09:00",
+        )
+        Booking.objects.filter(pk=self.bookings[0].pk).update(status="rejected")
+        self.client.force_login(self.installer)
+
+    def test_api_moves_pending_bookings_in_one_update(self):
+        ids = [b.id for b in self.bookings] + [self.foreign.id]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("api-bookings-bulk-status"),
+                {"action": "accept", "ids": ids},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+
+        results = {r["id"]: r["result"] for r in response.json()["results"]}
+        self.assertEqual(results[self.bookings[0].id], "skipped")
+        self.assertEqual(results[self.foreign.id], "not_found")
+        self.assertEqual(list(results.values()).count("accepted"), 4)
+        self.assertEqual(Booking.objects.get(pk=self.foreign.pk).status, "pending")
+
+    def test_dashboard_form_and_row_buttons_share_the_bulk_path(self):
+        self.client.post(reverse("installer_bookings"), {
+            "action": "reject",
+            "booking_ids": [self.bookings[1].id, self.bookings[2].id],
+        })
+        self.client.post(reverse("installer_bookings"), {"action": f"accept:{self.bookings[3].id}"})
+        statuses = dict(Booking.objects.filter(installer=self.installer).values_list("id", "status"))
+        self.assertEqual(
+            [statuses[b.id] for b in self.bookings],
+            ["rejected", "rejected", "rejected", "accepted", "pending"],
+        )
+
+
+class OrderBookingApiQueryTests(TestCase):
+    def setUp(self):
+        self.customer = make_user("customer", "customer")
+        self.installer = make_user("installer", "installer")
+        seller = make_user("seller", "seller")
+        self.products = [
+            Product.objects.create(seller=seller, name=f"Part {i}", price=Decimal("100.00"))
+            for i in range(3)
+        ]
+        self.client.force_login(self.customer)
+
+    def add_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user=self.customer, total=300, final_total=300)
+            OrderItem.objects.bulk_create(
+                OrderItem(order=order, product=p, product_name=p.name, unit_price=p.price, quantity=1)
+                for p in self.products
+            )
+            Booking.objects.create(
+                customer=self.customer, installer=self.installer, product=self.products[0],
+                scheduled_date=timezone.localdate(), scheduled_time="09:00",
+            )
+
+    def query_counts(self, expand):
+        counts = []
+        for url in (reverse("api-orders"), reverse("api-bookings")):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, {"expand": expand} if expand else {})
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(ctx))
+        return counts
+
+    def test_query_count_does_not_grow_with_the_list(self):
+        for expand in ("", "product", "product.seller"):
+            with self.subTest(expand=expand):
+                Order.objects.all().delete()
+                Booking.objects.all().delete()
+                self.add_orders(2)
+                small = self.query_counts(expand)
+                self.add_orders(8)
+                self.assertEqual(self.query_counts(expand), small)
+
+    def test_product_is_compact_unless_expanded(self):
+        self.add_orders(1)
+        item = self.client.get(reverse("api-orders")).json()[0]["items"][0]
+        self.assertEqual(set(item["product"]), {"id", "name", "brand", "model", "price", "seller"})
+        self.assertIsInstance(item["product"]["seller"], int)
+
+        item = self.client.get(reverse("api-orders"), {"expand": "product.seller"}).json()[0]["items"][0]
+        self.assertIn("stock", item["product"])
+        self.assertEqual(item["product"]["seller"]["username"], "seller")
+
+        booking = self.client.get(reverse("api-bookings"), {"expand": "product"}).json()[0]
+        self.assertIsInstance(booking["product"]["seller"], int)
+        self.assertIn("stock", booking["product"])
+
+    def test_unknown_expansion_is_rejected(self):
+        response = self.client.get(reverse("api-orders"), {"expand": "user"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductApiSparseFieldsTests(TestCase):
+    def setUp(self):
+        self.seller = make_user("seller", "seller")
+        self.first = Product.objects.create(
+            seller=self.seller, name="Part 0", brand="Toyota", price=Decimal("10.00"), stock=0,
+        )
+        Product.objects.create(seller=self.seller, name="Part 1", brand="Toyota", price=Decimal("10.00"), stock=1)
+
+    def test_fields_narrow_the_json_and_the_select(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("api-products"), {"fields": "id,name,price,stock"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0], {"id": self.first.id, "name": "Part 0", "price": "10.00", "stock": 0})
+        sql = ctx.captured_queries[0]["sql"]
+        self.assertNotIn("brand", sql)
+        self.assertNotIn("auth_user", sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse("api-products"), {"fields": "name,password"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_msgpack_is_negotiated_from_accept(self):
+        response = self.client.get(
+            reverse("api-products"), {"fields": "name,seller"}, HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        first = msgpack.unpackb(response.content)["results"][0]
+        self.assertEqual(first, {"seller": {"id": self.seller.id, "username": "seller", "email": ""}, "name": "Part 0"})
+
+
+@override_settings(PRODUCT_PAGE_SIZE=2)
+class ProductKeysetPaginationTests(TestCase):
+    def setUp(self):
+        seller = make_user("seller", "seller")
+        for name in ("Filter", "Belt", "Belt", "Belt", "Axle", "Clutch", "Belt"):
+            Product.objects.create(seller=seller, name=name, price=Decimal("10.00"), stock=5)
+        # name order, ties broken by id
+        self.expected = list(Product.objects.order_by("name", "id").values_list("id", flat=True))
+
+    def api_page(self, url=None, **params):
+        response = self.client.get(url or reverse("api-products"), params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [row["id"] for row in data["results"]], data["next"], data["previous"]
+
+    def view_page(self, url=None, **params):
+        response = self.client.get(url or reverse("product_list"), params)
+        self.assertEqual(response.status_code, 200)
+        ids = [product.id for product in response.wsgi_request._product_page.products]
+        return ids, response.context["next_url"], response.context["previous_url"]
+
+    def walk(self, fetch):
+        """Follow next links to the end, then previous links back; returns both page lists."""
+        forward = [fetch()]
+        while forward[-1][1]:
+            forward.append(fetch(forward[-1][1]))
+        backward = [forward[-1]]
+        while backward[-1][2]:
+            backward.append(fetch(backward[-1][2]))
+        return [page[0] for page in forward], [page[0] for page in reversed(backward)]
+
+    def test_next_and_previous_round_trip(self):
+        for fetch in (self.api_page, self.view_page):
+            with self.subTest(fetch=fetch.__name__):
+                forward, backward = self.walk(fetch)
+                self.assertEqual([len(page) for page in forward], [2, 2, 2, 1])
+                self.assertEqual(sum(forward, []), self.expected)
+                self.assertEqual(backward, forward)
+
+    def test_cursor_inside_a_run_of_equal_names(self):
+        belts = list(Product.objects.filter(name="Belt").order_by("id"))
+        cursor = encode_cursor(belts[1])
+        ids, _, _ = self.api_page(cursor=cursor)
+        self.assertEqual(ids, [belts[2].id, belts[3].id])
+        ids, _, _ = self.api_page(cursor=encode_cursor(belts[2], reverse=True))
+        self.assertEqual(ids, [belts[0].id, belts[1].id])
+
+    def test_garbage_or_tampered_cursor_is_rejected(self):
+        def token(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for cursor in (
+            "nope",
+            "é",
+            token([1]),
+            token({"n": "Belt"}),
+            token({"n": "Belt", "i": "x"}),
+            token({"n": "Belt", "i": 10 ** 30}),
+            token({"n": "Belt", "i": -1}),
+            token({"n": "Belt", "i": float("inf")}),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse("api-products"), {"cursor": cursor})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(self.view_page(cursor=cursor)[0], self.expected[:2])
+
+
+class CatalogConditionalGetTests(TestCase):
+    def setUp(self):
+        self.seller = make_user("seller", "seller")
+        self.product = Product.objects.create(seller=self.seller, name="Pad", price=Decimal("10.00"), stock=5)
+
+    def revalidate(self, url):
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        return response, etag, [q["sql"] for q in ctx.captured_queries]
+
+    def test_unchanged_catalog_is_304_without_reading_products(self):
+        for url in (
+            reverse("product_list"),
+            reverse("product_detail", args=[self.product.id]),
+            reverse("api-products"),
+        ):
+            with self.subTest(url=url):
+                response, etag, queries = self.revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+                self.assertFalse([sql for sql in queries if '"products_product"' in sql])
+
+    def test_seller_edit_bumps_the_version_and_the_etag(self):
+        url = reverse("product_list")
+        etag = self.client.get(url)["ETag"]
+        before = CatalogVersion.current().version
+
+        seller_client = self.client_class()
+        seller_client.force_login(self.seller)
+        with self.captureOnCommitCallbacks(execute=True):
+            seller_client.post(reverse("seller_add_stock", args=[self.product.id]), {"add_quantity": 3})
+
+        self.assertEqual(CatalogVersion.current().version, before + 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_is_per_filter(self):
+        url = reverse("product_list")
+        self.assertNotEqual(self.client.get(url)["ETag"], self.client.get(url, {"car_brand": "Honda"})["ETag"])
+
+
+@override_settings(CATALOG_CHANGES_LAG_SECONDS=0)
+class ProductChangeFeedTests(TestCase):
+    def setUp(self):
+        self.seller = make_user("seller", "seller")
+        self.products = [
+            Product.objects.create(seller=self.seller, name=f"Part {i}", price=Decimal("10.00"), stock=5)
+            for i in range(5)
+        ]
+
+    def sync(self, cursor=None):
+        """Follow the feed to the end in batches of 2; returns (changes, cursor, queries per batch)."""
+        changes, queries = [], set()
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.client.get(reverse("api-product-changes"), params).json()
+            queries.add(len(ctx))
+            changes += [(change["id"], change["deleted"]) for change in data["changes"]]
+            cursor = data["cursor"]
+            if not data["has_more"]:
+                return changes, cursor, queries
+
+    def test_incremental_sync_returns_only_what_changed(self):
+        changes, cursor, queries = self.sync()
+        self.assertEqual(changes, [(p.id, False) for p in self.products])
+        self.assertEqual(queries, {3})  # horizon, products, tombstones
+
+        edited, deleted = self.products[3], self.products[1]
+        edited.price = Decimal("12.00")
+        edited.save()
+        self.client.force_login(self.seller)
+        self.client.post(reverse("seller_product_delete", args=[deleted.id]))
+        self.client.logout()
+
+        changes, cursor, _ = self.sync(cursor)
+        self.assertEqual(changes, [(edited.id, False), (deleted.id, True)])
+        self.assertEqual(self.sync(cursor)[0], [])
+
+    @override_settings(CATALOG_CHANGES_LAG_SECONDS=60)
+    def test_recent_writes_wait_out_the_lag_window(self):
+        # a write that started earlier may still commit below these numbers
+        self.assertEqual(self.sync()[0], [])
+        ProductChange.objects.filter(pk__lte=self.products[2].change_seq).update(
+            changed_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(self.sync()[0], [(p.id, False) for p in self.products[:3]])
+
+    @override_settings(CATALOG_CHANGES_LAG_SECONDS=60)
+    def test_prune_keeps_tombstones_and_the_feed_position(self):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        ProductChange.objects.update(changed_at=an_hour_ago)
+        _, cursor, _ = self.sync()
+        edited, deleted, last, recent = (p.id for p in self.products[:4])
+        self.products[0].save()
+        self.products[1].delete()
+        self.products[2].save()
+        ProductChange.objects.update(changed_at=an_hour_ago)
+        self.products[3].save()  # still inside the lag window
+        horizon = ProductChange.horizon(settings.CATALOG_CHANGES_LAG_SECONDS)
+
+        out = io.StringIO()
+        call_command("prune_product_changes", stdout=out)
+        self.assertIn("Pruned 6 product change rows", out.getvalue())
+
+        self.assertEqual(
+            list(ProductChange.objects.order_by("id").values_list("product_id", "deleted")),
+            [(deleted, True), (last, False), (recent, False)],
+        )
+        self.assertEqual(ProductChange.horizon(settings.CATALOG_CHANGES_LAG_SECONDS), horizon)
+        self.assertEqual(self.sync(cursor)[0], [(edited, False), (deleted, True), (last, False)])
+
+    def test_malformed_cursor_is_404(self):
+        response = self.client.get(reverse("api-product-changes"), {"cursor": "nope"})
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductFitmentTests(TestCase):
+    def setUp(self):
+        self.seller = make_user("seller", "seller")
+        self.client.force_login(self.seller)
+
+    def post_product(self, years, **extra):
+        data = {"name": "Pad", "brand": "Toyota", "model": "Vios", "compatible_years": years, "price": "10.00", "stock": 5}
+        data.update(extra)
+        return self.client.post(reverse("seller_product_create"), data)
+
+    def test_years_outside_the_window_are_a_form_error(self):
+        next_year = timezone.now().year + 1
+        for years in ("1-40000", "2018, 40000", "1900-1960", f"2020-{next_year + 1}", "1960-2010"):
+            with self.subTest(years=years):
+                response = self.post_product(years)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, "Years must be between 1950")
+        self.assertFalse(Product.objects.exists())
+
+        self.post_product(f"1960-1999, {next_year}")
+        product = Product.objects.get()
+        self.assertEqual(product.fitments.count(), 41)
+
+    def test_parse_years_drops_out_of_range_chunks(self):
+        self.assertEqual(parse_years("1-40000, 2018, 99999, 2016-2017"), [2016, 2017, 2018])
+        self.assertEqual(out_of_range_years("1-40000, 2018, 99999, abc"), ["1-40000", "99999"])
+
+
+    def test_for_vehicle_matches_exact_brand_model_and_year(self):
+        vios = Product.objects.create(seller=self.seller, name="Vios pad", brand="Toyota", model="Vios", compatible_years="2018-2019", price=10)
+        vios.sync_fitments()
+        other = Product.objects.create(seller=self.seller, name="Corolla pad", brand="Toyota Motor", model="Corolla", compatible_years="2010", price=10)
+        other.sync_fitments()
+        anyyear = Product.objects.create(seller=self.seller, name="Vios mat", brand="Toyota", model="Vios", price=10)
+        anyyear.sync_fitments()
+
+        def found(**vehicle):
+            return set(Product.objects.for_vehicle(**vehicle).values_list("name", flat=True))
+
+        self.assertEqual(found(brand=" TOYOTA ", model="vios"), {"Vios pad", "Vios mat"})
+        self.assertEqual(found(brand="Toyota", year="2018"), {"Vios pad"})
+        self.assertEqual(found(year="201"), set())
+        self.assertEqual(found(brand="toyo"), set())
+        self.assertEqual(found(model="Vio"), set())
+        self.assertEqual(found(year="20l8"), set())
+
+    def test_editing_a_product_rewrites_its_fitments(self):
+        self.post_product("2016-2017")
+        product = Product.objects.get()
+        self.client.post(
+            reverse("seller_product_update", args=[product.pk]),
+            {"name": "Pad", "brand": "Honda", "model": "City", "compatible_years": "2020", "price": "10.00", "stock": 5},
+        )
+        self.assertEqual(
+            list(product.fitments.values_list("brand", "model", "year")),
+            [("honda", "city", 2020)],
+        )
+        self.assertFalse(Product.objects.for_vehicle(brand="Toyota").exists())
+
+        self.client.post(
+            reverse("seller_product_update", args=[product.pk]),
+            {"name": "Pad", "brand": "Honda", "model": "City", "compatible_years": "", "price": "10.00", "stock": 5},
+        )
+        self.assertEqual(list(product.fitments.values_list("year", flat=True)), [None])
+
+
+class FitmentBackfillMigrationTests(TransactionTestCase):
+    migrate_from = [("products", "0018_productfitment")]
+    migrate_to = [("products", "0019_backfill_productfitment")]
+
+    def tearDown(self):
+        call_command("migrate", "products", verbosity=0)
+
+    def test_backfill_creates_fitments_for_existing_products(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        old_apps = executor.loader.project_state(self.migrate_from).apps
+        seller = old_apps.get_model("auth", "User").objects.create(username="seller")
+        OldProduct = old_apps.get_model("products", "Product")
+        ranged = OldProduct.objects.create(seller=seller, name="Pad", brand=" Toyota ", model="Vios", compatible_years="2016-2018, 1-40000", price=10, stock=1)
+        bare = OldProduct.objects.create(seller=seller, name="Mat", brand="Honda", model="", compatible_years="", price=5, stock=1)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(self.migrate_to)
+        new_apps = executor.loader.project_state(self.migrate_to).apps
+        fitments = new_apps.get_model("products", "ProductFitment").objects.order_by("year")
+
+        self.assertEqual(
+            list(fitments.filter(product_id=ranged.pk).values_list("brand", "model", "year")),
+            [("toyota", "vios", 2016), ("toyota", "vios", 2017), ("toyota", "vios", 2018)],
+        )
+        self.assertEqual(
+            list(fitments.filter(product_id=bare.pk).values_list("brand", "model", "year")),
+            [("honda", "", None)],
+        )
+
+
+class ProductListTableCacheTests(TestCase):
+    def setUp(self):
+        seller = make_user("seller", "seller")
+        self.product = Product.objects.create(seller=seller, name="Pad", brand="Toyota", price=Decimal("10.00"), stock=5)
+        self.product.sync_fitments()
+
+    def fetch(self, **params):
+        hits = catalog.tables.hits
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("product_list"), params)
+        products_read = any('"products_product"' in q["sql"] for q in ctx.captured_queries)
+        return response, catalog.tables.hits > hits, products_read
+
+    def test_repeat_filter_is_served_from_cache(self):
+        self.fetch(car_brand="Toyota")
+        response, hit, products_read = self.fetch(car_brand=" toyota ")
+        self.assertTrue(hit)
+        self.assertFalse(products_read)
+        self.assertContains(response, "Pad")
+
+    def test_product_save_invalidates(self):
+        self.fetch()
+        self.product.price = Decimal("12.50")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        response, hit, _ = self.fetch()
+        self.assertFalse(hit)
+        self.assertContains(response, "₱12.50")
+
+    def test_holds_change_the_table_but_not_the_catalog_version(self):
+        etag = self.client.get(reverse("product_list"))["ETag"]
+        version = CatalogVersion.current().version
+
+        buyer = make_user("buyer", "customer")
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_cart(buyer, {str(self.product.id): {"quantity": 5, "price": "10.00", "name": "Pad"}})
+        self.assertEqual(CatalogVersion.current().version, version)
+
+        response, hit, products_read = self.fetch()
+        self.assertFalse(hit)
+        self.assertFalse(products_read)
+        self.assertContains(response, "disabled")
+        self.assertNotEqual(response["ETag"], etag)
+
+        # the holder still sees their stock, which is the render everyone saw before
+        self.client.force_login(buyer)
+        response, hit, _ = self.fetch()
+        self.assertTrue(hit)
+        self.assertNotContains(response, "disabled")
@@ -1,850 +1,917 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import login
-from django.contrib.auth.decorators import login_required
-from django.urls import reverse
-from urllib.parse import urlencode
-from .models import Product, Profile, Order, OrderItem, Booking
-from .forms import SignUpForm, SellerProductForm, BookingForm
-from decimal import Decimal
-from io import BytesIO
-import base64
-import qrcode
-import random
-from datetime import timedelta
-from django.utils import timezone
-from collections import defaultdict
-
-def product_list(request):
-    # 🔒 redirect sellers to their area
-    if request.user.is_authenticated:
-        profile = getattr(request.user, "profile", None)
-        if profile:
-            if profile.account_type == "seller":
-                return redirect("seller_dashboard")
-            if profile.account_type == "installer":
-                return redirect("installer_dashboard")
-
-    products_qs = Product.objects.all()
-
-    # 🧷 1) Handle "Save this car" (POST) – only save, don't auto-apply
-    if request.method == "POST" and request.user.is_authenticated:
-        brand = (request.POST.get("save_car_brand") or "").strip()
-        model = (request.POST.get("save_car_model") or "").strip()
-        year = (request.POST.get("save_car_year") or "").strip()
-
-        profile = request.user.profile
-        profile.saved_car_brand = brand
-        profile.saved_car_model = model
-        profile.saved_car_year = year
-        profile.save()
-
-        params = {}
-        if brand:
-            params["car_brand"] = brand
-        if model:
-            params["car_model"] = model
-        if year:
-            params["car_year"] = year
-
-        url = reverse("product_list")
-        if params:
-            url = f"{url}?{urlencode(params)}"
-        return redirect(url)
-
-    # 🔍 2) Normal filters from GET
-    car_brand = request.GET.get("car_brand", "").strip()
-    car_model = request.GET.get("car_model", "").strip()
-    car_year = request.GET.get("car_year", "").strip()
-
-    if car_brand:
-        products_qs = products_qs.filter(brand__icontains=car_brand)
-    if car_model:
-        products_qs = products_qs.filter(model__icontains=car_model)
-    if car_year:
-        products_qs = products_qs.filter(compatible_years__icontains=car_year)
-
-    # 💾 3) Get saved car (only for display / shortcut)
-    saved_car = {"brand": "", "model": "", "year": ""}
-
-    if request.user.is_authenticated:
-        profile = request.user.profile
-        saved_car = {
-            "brand": profile.saved_car_brand or "",
-            "model": profile.saved_car_model or "",
-            "year": profile.saved_car_year or "",
-        }
-
-    # 🛡️ 4) Attach badge info per seller based on lifetime revenue
-    # convert queryset to list so we can attach attributes
-    products = list(products_qs.select_related("seller"))
-
-    seller_ids = {p.seller_id for p in products}
-    revenue_by_seller = defaultdict(Decimal)
-
-    if seller_ids:
-        # all order items belonging to these sellers
-        seller_items = (
-            OrderItem.objects
-            .filter(product__seller_id__in=seller_ids)
-            .select_related("product")
-        )
-        for item in seller_items:
-            revenue_by_seller[item.product.seller_id] += item.unit_price * item.quantity
-
-    THRESH_VERIFIED = Decimal("10000")   # ₱10,000
-    THRESH_TOP = Decimal("100000")       # ₱100,000
-
-    for p in products:
-        seller_rev = revenue_by_seller.get(p.seller_id, Decimal("0"))
-        if seller_rev >= THRESH_TOP:
-            p.badge_level = "top"
-        elif seller_rev >= THRESH_VERIFIED:
-            p.badge_level = "verified"
-        else:
-            p.badge_level = "none"
-
-    context = {
-        "products": products,
-        "car_brand": car_brand,
-        "car_model": car_model,
-        "car_year": car_year,
-        "saved_car": saved_car,
-    }
-    return render(request, "products/product_list.html", context)
-
-def product_detail(request, pk):
-    product = get_object_or_404(Product, pk=pk)
-
-    raw_years = product.compatible_years or ""
-    years_list = [y.strip() for y in raw_years.split(",") if y.strip()]
-
-    return render(
-        request,
-        "products/product_detail.html",
-        {
-            "product": product,
-            "years_list": years_list,   # 👈 pass cleaned list to template
-        },
-    )
-
-
-def add_to_cart(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
-    cart = request.session.get("cart", {})
-
-    try:
-        qty = int(request.POST.get("quantity", 1))
-    except ValueError:
-        qty = 1
-
-    qty = max(1, min(qty, product.stock))
-
-    if str(product_id) in cart:
-        cart[str(product_id)]["quantity"] += qty
-    else:
-        cart[str(product_id)] = {
-            "name": product.name,
-            "brand": product.brand,
-            "model": product.model,
-            "price": float(product.price),
-            "quantity": qty,
-        }
-
-    request.session["cart"] = cart
-    return redirect("view_cart")
-
-@login_required
-def view_cart(request):
-    cart = request.session.get("cart", {})  # {product_id: {name, price, quantity, ...}}
-    error = None
-
-    # ---------- POST ACTIONS ----------
-    if request.method == "POST":
-        # Update quantity
-        if "update" in request.POST:
-            product_id = request.POST.get("product_id")
-            try:
-                new_qty = int(request.POST.get("quantity", 1))
-            except ValueError:
-                new_qty = 1
-
-            if product_id in cart:
-                product = get_object_or_404(Product, id=product_id)
-                if new_qty < 1:
-                    new_qty = 1
-                if new_qty > product.stock:
-                    new_qty = product.stock
-                    error = f"Only {product.stock} pcs available for {product.name}."
-                cart[product_id]["quantity"] = new_qty
-                request.session["cart"] = cart
-
-            if not error:
-                return redirect("view_cart")
-
-        # Remove line item
-        elif "remove" in request.POST:
-            product_id = request.POST.get("product_id")
-            if product_id in cart:
-                del cart[product_id]
-                request.session["cart"] = cart
-            return redirect("view_cart")
-
-        # ✅ Checkout: send subtotal + voucher choice to mock_payment
-        elif "checkout" in request.POST:
-            if not cart:
-                error = "Your cart is empty."
-            else:
-                # Recompute totals using floats (safe for session)
-                total = 0.0
-                for item in cart.values():
-                    item["subtotal"] = item["price"] * item["quantity"]
-                    total += item["subtotal"]
-
-                selected_voucher_code = request.POST.get("voucher_code", "") or ""
-
-                # store a snapshot in the session for the payment step
-                request.session["pending_checkout"] = {
-                    "cart": cart,
-                    "total": float(total),          # subtotal BEFORE discount/fee
-                    "voucher_code": selected_voucher_code,
-                }
-                request.session.modified = True
-
-                return redirect("mock_payment")
-
-    # ---------- GET or POST-with-error: compute totals & available vouchers ----------
-    total = 0.0
-    for item in cart.values():
-        item["subtotal"] = item["price"] * item["quantity"]
-        total += item["subtotal"]
-
-    profile = request.user.profile
-    total_spent = profile.total_spent or Decimal("0")
-
-    available_vouchers = []
-
-    if total_spent >= Decimal("5000") and not profile.five_percent_voucher_used:
-        available_vouchers.append(
-            {"code": "5PCT", "label": "5% off (one-time after ₱5,000 spent)"}
-        )
-
-    if total_spent >= Decimal("10000") and not profile.ten_percent_voucher_used:
-        available_vouchers.append(
-            {"code": "10PCT", "label": "10% off (one-time after ₱10,000 spent)"}
-        )
-
-    if total_spent >= Decimal("20000") and not profile.twenty_percent_voucher_used:
-        available_vouchers.append(
-            {"code": "20PCT", "label": "20% off (one-time after ₱20,000 spent)"}
-        )
-
-    if profile.extra_voucher_balance > 0:
-        available_vouchers.append(
-            {
-                "code": "P250",
-                "label": f"₱250 off (you have {profile.extra_voucher_balance})",
-            }
-        )
-
-    return render(
-        request,
-        "products/cart.html",
-        {
-            "cart": cart,
-            "total": total,
-            "available_vouchers": available_vouchers,
-            "error": error,
-        },
-    )
-
-
-
-
-
-@login_required
-def mock_payment(request):
-    pending = request.session.get("pending_checkout")
-    if not pending:
-        # No pending checkout → go back to cart
-        return redirect("view_cart")
-
-    cart = pending.get("cart", {})
-    total = Decimal(str(pending.get("total", 0)))  # subtotal BEFORE discounts/fee
-    selected_voucher_code = pending.get("voucher_code", "") or ""
-    profile = request.user.profile
-
-    # ---------- helper to preview discount (no DB changes) ----------
-    def compute_discount_preview(total_spent_before, code):
-        discount = Decimal("0")
-        if (
-            code == "5PCT"
-            and total_spent_before >= Decimal("5000")
-            and not profile.five_percent_voucher_used
-        ):
-            discount = (total * Decimal("0.05")).quantize(Decimal("0.01"))
-        elif (
-            code == "10PCT"
-            and total_spent_before >= Decimal("10000")
-            and not profile.ten_percent_voucher_used
-        ):
-            discount = (total * Decimal("0.10")).quantize(Decimal("0.01"))
-        elif (
-            code == "20PCT"
-            and total_spent_before >= Decimal("20000")
-            and not profile.twenty_percent_voucher_used
-        ):
-            discount = (total * Decimal("0.20")).quantize(Decimal("0.01"))
-        elif (
-            code == "P250"
-            and profile.extra_voucher_balance > 0
-        ):
-            discount = Decimal("250")
-        return discount
-
-    total_spent_before = profile.total_spent or Decimal("0")
-
-    if request.method == "POST":
-        payment_method = request.POST.get("payment_method", "COD")
-
-        # ----- compute discount (this time WITH DB changes) -----
-        applied_discount = Decimal("0")
-
-        if (
-            selected_voucher_code == "5PCT"
-            and total_spent_before >= Decimal("5000")
-            and not profile.five_percent_voucher_used
-        ):
-            applied_discount = (total * Decimal("0.05")).quantize(Decimal("0.01"))
-            profile.five_percent_voucher_used = True
-
-        elif (
-            selected_voucher_code == "10PCT"
-            and total_spent_before >= Decimal("10000")
-            and not profile.ten_percent_voucher_used
-        ):
-            applied_discount = (total * Decimal("0.10")).quantize(Decimal("0.01"))
-            profile.ten_percent_voucher_used = True
-
-        elif (
-            selected_voucher_code == "20PCT"
-            and total_spent_before >= Decimal("20000")
-            and not profile.twenty_percent_voucher_used
-        ):
-            applied_discount = (total * Decimal("0.20")).quantize(Decimal("0.01"))
-            profile.twenty_percent_voucher_used = True
-
-        elif (
-            selected_voucher_code == "P250"
-            and profile.extra_voucher_balance > 0
-        ):
-            applied_discount = Decimal("250")
-            profile.extra_voucher_balance -= 1
-
-        else:
-            selected_voucher_code = ""
-            applied_discount = Decimal("0")
-
-        # ✅ discounted total first
-        discounted_total = max(total - applied_discount, Decimal("0"))
-
-        # ✅ 5% convenience fee based on discounted total
-        convenience_fee = (discounted_total * Decimal("0.05")).quantize(Decimal("0.01"))
-
-        # final amount customer pays
-        final_total = discounted_total + convenience_fee
-
-        # ----- create Order with payment_method + randomized delivery window -----
-        delivery_days = random.randint(1, 5)
-        delivery_eta = timezone.now().date() + timedelta(days=delivery_days)
-
-        order = Order.objects.create(
-            user=request.user,
-            total=total,
-            applied_discount=applied_discount,
-            final_total=final_total,
-            voucher_code=selected_voucher_code,
-            payment_method=payment_method,
-            convenience_fee=convenience_fee,  # ✅ stored in DB
-            delivery_days=delivery_days,
-            delivery_eta=delivery_eta,
-        )
-
-        # ----- apply stock changes + create OrderItems -----
-        for product_id, item in cart.items():
-            try:
-                product = Product.objects.get(id=product_id)
-            except Product.DoesNotExist:
-                product = None
-
-            if product is not None:
-                product.stock = max(product.stock - item["quantity"], 0)
-                product.save()
-
-            OrderItem.objects.create(
-                order=order,
-                product=product,
-                product_name=item["name"],
-                brand=item.get("brand", ""),
-                model=item.get("model", ""),
-                unit_price=item["price"],
-                quantity=item["quantity"],
-            )
-
-        # ----- update profile spend history & extra vouchers -----
-        current_spent = profile.total_spent or Decimal("0")
-        profile.total_spent = current_spent + final_total  # includes fee
-
-        threshold = Decimal("20000")
-        block_size = Decimal("5000")
-
-        if profile.total_spent > threshold:
-            total_blocks = int((profile.total_spent - threshold) // block_size)
-        else:
-            total_blocks = 0
-
-        new_blocks = total_blocks - profile.extra_vouchers_earned
-        if new_blocks > 0:
-            profile.extra_voucher_balance += new_blocks
-            profile.extra_vouchers_earned = total_blocks
-
-        profile.save()
-
-        # ----- clear cart & pending checkout -----
-        request.session["cart"] = {}
-        if "pending_checkout" in request.session:
-            del request.session["pending_checkout"]
-
-        return render(
-            request,
-            "products/checkout_success.html",
-            {
-                "total": total,
-                "applied_discount": applied_discount,
-                "convenience_fee": convenience_fee,
-                "final_total": final_total,
-                "selected_voucher_code": selected_voucher_code,
-                "order": order,
-                "payment_method": payment_method,
-            },
-        )
-
-    # ---------- GET: show preview (discount + fee estimate) ----------
-    preview_discount = compute_discount_preview(total_spent_before, selected_voucher_code)
-    preview_discounted_total = max(total - preview_discount, Decimal("0"))
-    preview_convenience_fee = (preview_discounted_total * Decimal("0.05")).quantize(Decimal("0.01"))
-    preview_final = preview_discounted_total + preview_convenience_fee
-
-    # QR can reflect the estimated final total
-    qr_payload = f"Pitstop.ph | user={request.user.id} | total={preview_final} | voucher={selected_voucher_code or 'NONE'}"
-
-    qr_img = qrcode.make(qr_payload)
-    buffer = BytesIO()
-    qr_img.save(buffer, format="PNG")
-    qr_base64 = base64.b64encode(buffer.getvalue()).decode("ascii")
-    qr_data_url = f"data:image/png;base64,{qr_base64}"
-
-    return render(
-        request,
-        "products/payment.html",
-        {
-            "total": total,
-            "discount_preview": preview_discount,
-            "convenience_fee": preview_convenience_fee,
-            "final_preview": preview_final,
-            "voucher_code": selected_voucher_code,
-            "qr_data_url": qr_data_url,
-        },
-    )
-
-
-@login_required
-def track_order(request, order_id):
-    order = get_object_or_404(Order, id=order_id, user=request.user)
-    return render(request, "products/track_order.html", {"order": order})
-
-
-@login_required
-def transaction_history(request):
-    profile = getattr(request.user, "profile", None)
-    if profile and profile.account_type == "seller":
-        return redirect("seller_product_list")
-
-    orders = (
-        Order.objects.filter(user=request.user)
-        .order_by("-created_at")
-        .prefetch_related("items")
-    )
-
-    # ⭐ Pre-compute subtotals so the template stays simple
-    for order in orders:
-        for item in order.items.all():
-            item.subtotal = item.unit_price * item.quantity
-
-    return render(
-        request,
-        "products/transaction_history.html",
-        {"orders": orders},
-    )
-
-@login_required
-def book_installation(request):
-    profile = getattr(request.user, "profile", None)
-    if not profile or profile.account_type != "customer":
-        return redirect("product_list")
-
-    if request.method == "POST":
-        form = BookingForm(request.POST)
-        if form.is_valid():
-            booking = form.save(commit=False)
-            booking.customer = request.user
-            booking.status = "pending"
-            # 🔴 fixed finder’s fee: ₱200 per booking
-            booking.finders_fee = Decimal("200")
-            booking.save()
-            return redirect("my_bookings")
-    else:
-        form = BookingForm()
-
-    return render(
-        request,
-        "installations/book_installation.html",
-        {"form": form},
-    )
-
-
-@login_required
-def my_bookings(request):
-    profile = getattr(request.user, "profile", None)
-    # primarily for customers, but we just show "my bookings" to whoever
-    bookings = (
-        Booking.objects.filter(customer=request.user)
-        .select_related("installer", "product")
-        .order_by("-created_at")
-    )
-
-    return render(
-        request,
-        "installations/my_bookings.html",
-        {"bookings": bookings},
-    )
-
-@login_required
-def installer_bookings(request):
-    profile = getattr(request.user, "profile", None)
-    if not profile or profile.account_type != "installer":
-        return redirect("product_list")
-
-    # Handle accept/reject actions
-    if request.method == "POST":
-        booking_id = request.POST.get("booking_id")
-        action = request.POST.get("action")
-        booking = get_object_or_404(
-            Booking,
-            id=booking_id,
-            installer=request.user,
-        )
-        if action == "accept":
-            booking.status = "accepted"
-        elif action == "reject":
-            booking.status = "rejected"
-        booking.save()
-        return redirect("installer_bookings")
-
-    bookings = (
-        Booking.objects.filter(installer=request.user)
-        .select_related("customer", "product")
-        .order_by("-created_at")
-    )
-
-    return render(
-        request,
-        "installations/installer_bookings.html",
-        {"bookings": bookings},
-    )
-
-def signup(request):
-    if request.method == "POST":
-        form = SignUpForm(request.POST)
-        if form.is_valid():
-            user = form.save()
-            account_type = form.cleaned_data["account_type"]
-
-            Profile.objects.create(user=user, account_type=account_type)
-            login(request, user)
-
-            # ✅ Different landing page for seller vs customer
-                        # ✅ Different landing page by role
-            if account_type == "seller":
-                return redirect("seller_dashboard")
-            elif account_type == "installer":
-                return redirect("installer_dashboard")
-            else:
-                return redirect("product_list")
-
-    else:
-        form = SignUpForm()
-    return render(request, "registration/signup.html", {"form": form})
-
-@login_required
-def installer_dashboard(request):
-    profile = getattr(request.user, "profile", None)
-    if not profile or profile.account_type != "installer":
-        return redirect("product_list")
-
-    # All bookings for this installer
-    bookings_qs = (
-        Booking.objects
-        .filter(installer=request.user)
-        .select_related("customer", "product")
-        .order_by("-created_at")
-    )
-
-    total_bookings = bookings_qs.count()
-    pending_count = bookings_qs.filter(status="pending").count()
-    accepted_count = bookings_qs.filter(status="accepted").count()
-    rejected_count = bookings_qs.filter(status="rejected").count()
-
-    # Total finder’s fee from accepted bookings
-    total_finders_fee = Decimal("0")
-    for b in bookings_qs.filter(status="accepted"):
-        total_finders_fee += b.finders_fee
-
-    # Upcoming schedule (today onwards, pending or accepted)
-    today = timezone.localdate()
-    upcoming = (
-        bookings_qs
-        .filter(status__in=["pending", "accepted"], scheduled_date__gte=today)
-        .order_by("scheduled_date", "scheduled_time")[:10]
-    )
-
-    context = {
-        "total_bookings": total_bookings,
-        "pending_count": pending_count,
-        "accepted_count": accepted_count,
-        "rejected_count": rejected_count,
-        "total_finders_fee": total_finders_fee,
-        "upcoming": upcoming,
-    }
-    return render(request, "installations/installer_dashboard.html", context)
-
-
-# SMALL HELPER FOR SELLER-ONLY VIEWS
-def _require_seller(request):
-    if not request.user.is_authenticated:
-        return redirect("login")
-    if not hasattr(request.user, "profile") or request.user.profile.account_type != "seller":
-        return redirect("product_list")
-    return None
-
-
-# 🟪 SELLER: LIST THEIR OWN PRODUCTS
-@login_required
-def seller_product_list(request):
-    redirect_resp = _require_seller(request)
-    if redirect_resp:
-        return redirect_resp
-
-    products = Product.objects.filter(seller=request.user).order_by("name")
-    return render(request, "seller/seller_product_list.html", {"products": products})
-
-
-# 🟪 SELLER: CREATE PRODUCT
-@login_required
-def seller_product_create(request):
-    redirect_resp = _require_seller(request)
-    if redirect_resp:
-        return redirect_resp
-
-    if request.method == "POST":
-        form = SellerProductForm(request.POST, request.FILES)  # 👈 include FILES
-        if form.is_valid():
-            product = form.save(commit=False)
-            product.seller = request.user
-            product.save()
-            return redirect("seller_product_list")
-    else:
-        form = SellerProductForm()
-
-    return render(
-        request,
-        "seller/seller_product_form.html",
-        {"form": form, "title": "Add Product"},
-    )
-
-
-# 🟪 SELLER: UPDATE PRODUCT
-@login_required
-def seller_product_update(request, pk):
-    redirect_resp = _require_seller(request)
-    if redirect_resp:
-        return redirect_resp
-
-    product = get_object_or_404(Product, pk=pk, seller=request.user)
-
-    if request.method == "POST":
-        form = SellerProductForm(request.POST, request.FILES, instance=product)  # 👈 include FILES
-        if form.is_valid():
-            form.save()
-            return redirect("seller_product_list")
-    else:
-        form = SellerProductForm(instance=product)
-
-    return render(
-        request,
-        "seller/seller_product_form.html",
-        {"form": form, "title": "Edit Product"},
-    )
-
-# 🟪 SELLER: DELETE PRODUCT
-@login_required
-def seller_product_delete(request, pk):
-    redirect_resp = _require_seller(request)
-    if redirect_resp:
-        return redirect_resp
-
-    product = get_object_or_404(Product, pk=pk, seller=request.user)
-
-    if request.method == "POST":
-        product.delete()
-        return redirect("seller_product_list")
-
-    return redirect("seller_product_list")
-
-# 🟪 SELLER: ADD STOCK (quick action)
-@login_required
-def seller_add_stock(request, pk):
-    redirect_resp = _require_seller(request)
-    if redirect_resp:
-        return redirect_resp
-
-    product = get_object_or_404(Product, pk=pk, seller=request.user)
-
-    if request.method == "POST":
-        try:
-            add_qty = int(request.POST.get("add_quantity", 0))
-        except ValueError:
-            add_qty = 0
-
-        if add_qty > 0:
-            product.stock = product.stock + add_qty
-            product.save()
-
-        # even if invalid value, just go back quietly
-        return redirect("seller_product_list")
-
-    # no GET page; just go back
-    return redirect("seller_product_list")
-
-from decimal import Decimal
-from datetime import timedelta
-from django.utils import timezone
-from django.contrib.auth.decorators import login_required
-
-@login_required
-def seller_dashboard(request):
-    redirect_resp = _require_seller(request)
-    if redirect_resp:
-        return redirect_resp
-
-    # all products of this seller
-    products = Product.objects.filter(seller=request.user)
-
-    # all order items that belong to this seller's products
-    order_items = (
-        OrderItem.objects
-        .filter(product__seller=request.user)
-        .select_related("order", "product")
-        .order_by("-order__created_at")
-    )
-
-    total_revenue = Decimal("0")
-    total_units = 0
-    order_ids = set()
-
-    for item in order_items:
-        total_revenue += item.unit_price * item.quantity
-        total_units += item.quantity
-        order_ids.add(item.order_id)
-
-    total_orders = len(order_ids)
-    avg_per_order = total_revenue / total_orders if total_orders > 0 else Decimal("0")
-
-    # ---- last 30 days summary ----
-    now = timezone.now()
-    start_30 = now - timedelta(days=30)
-    rev_30 = Decimal("0")
-    units_30 = 0
-
-    for item in order_items:
-        if item.order.created_at >= start_30:
-            rev_30 += item.unit_price * item.quantity
-            units_30 += item.quantity
-
-    # ---- top products (by quantity sold) ----
-    product_stats = {}
-    for item in order_items:
-        key = item.product_name
-        if key not in product_stats:
-            product_stats[key] = {"qty": 0, "revenue": Decimal("0")}
-        product_stats[key]["qty"] += item.quantity
-        product_stats[key]["revenue"] += item.unit_price * item.quantity
-
-    sorted_products = sorted(
-        product_stats.items(),
-        key=lambda kv: kv[1]["qty"],
-        reverse=True
-    )[:5]
-
-    top_products = [
-        {"name": name, "qty": data["qty"], "revenue": data["revenue"]}
-        for name, data in sorted_products
-    ]
-
-    # ---- low stock products ----
-    low_stock = products.filter(stock__lte=3).order_by("stock")
-
-    # ---- BADGE LOGIC (based on lifetime revenue) ----
-    THRESH_VERIFIED = Decimal("10000")    # ₱10,000
-    THRESH_TOP = Decimal("100000")        # ₱100,000
-
-    if total_revenue >= THRESH_TOP:
-        badge_level = "top"
-        badge_label = "🏆 Top Store"
-        next_badge_label = None
-        amount_to_next = Decimal("0")
-        progress_to_next = 100
-    elif total_revenue >= THRESH_VERIFIED:
-        badge_level = "verified"
-        badge_label = "✅ Verified Store"
-        next_badge_label = "🏆 Top Store"
-        amount_to_next = max(THRESH_TOP - total_revenue, Decimal("0"))
-        # progress within the band 10k–100k
-        band_current = max(total_revenue - THRESH_VERIFIED, Decimal("0"))
-        band_total = THRESH_TOP - THRESH_VERIFIED  # 90k
-        progress_to_next = int(min((band_current / band_total) * 100, 100))
-    else:
-        badge_level = "none"
-        badge_label = "No badge yet"
-        next_badge_label = "✅ Verified Store"
-        amount_to_next = max(THRESH_VERIFIED - total_revenue, Decimal("0"))
-        progress_to_next = int(min((total_revenue / THRESH_VERIFIED) * 100, 100))
-
-    context = {
-        "total_revenue": total_revenue,
-        "total_units": total_units,
-        "total_orders": total_orders,
-        "avg_per_order": avg_per_order,
-        "rev_30": rev_30,
-        "units_30": units_30,
-        "top_products": top_products,
-        "low_stock": low_stock,
-
-        # badge context
-        "badge_level": badge_level,
-        "badge_label": badge_label,
-        "next_badge_label": next_badge_label,
-        "amount_to_next": amount_to_next,
-        "progress_to_next": progress_to_next,
-    }
-    return render(request, "seller/dashboard.html", context)
-
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import login
+from django.contrib import messages
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import condition
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+from urllib.parse import urlencode
+from .models import (
+    Product,
+    Profile,
+    Order,
+    OrderItem,
+    Booking,
+    InstallerSchedule,
+    CartLine,
+    SellerStats,
+    StockReservation,
+    BADGE_THRESH_TOP,
+    BADGE_THRESH_VERIFIED,
+    line_total,
+)
+from .forms import SignUpForm, SellerProductForm, BookingForm, InstallerScheduleForm
+from .pagination import paginate_keyset, cursor_url
+from .cart import get_cart, add_line, revalidate, checkout_snapshot
+from . import pricing
+from . import loyalty
+from . import delivery
+from . import live
+from . import exports
+from . import scheduling
+from . import catalog
+from .pricing import Quote, cart_digest, price_cart
+from . import qr
+from .checkout import place_order, reserve_cart, release_reservations, InsufficientStock
+from decimal import Decimal
+import random
+import uuid
+import json
+import time
+from datetime import timedelta
+from django.utils import timezone
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
+
+# 🏷️ revalidation (If-None-Match) is answered from the catalog version, see products.catalog
+@condition(etag_func=catalog.product_list_etag)
+def product_list(request):
+    # 🔒 redirect sellers to their area
+    if request.user.is_authenticated:
+        profile = getattr(request.user, "profile", None)
+        if profile:
+            if profile.account_type == "seller":
+                return redirect("seller_dashboard")
+            if profile.account_type == "installer":
+                return redirect("installer_dashboard")
+
+    # 🧷 1) Handle "Save this car" (POST) – only save, don't auto-apply
+    if request.method == "POST" and request.user.is_authenticated:
+        brand = (request.POST.get("save_car_brand") or "").strip()
+        model = (request.POST.get("save_car_model") or "").strip()
+        year = (request.POST.get("save_car_year") or "").strip()
+
+        profile = request.user.profile
+        profile.saved_car_brand = brand
+        profile.saved_car_model = model
+        profile.saved_car_year = year
+        profile.save(update_fields=["saved_car_brand", "saved_car_model", "saved_car_year"])
+
+        params = {}
+        if brand:
+            params["car_brand"] = brand
+        if model:
+            params["car_model"] = model
+        if year:
+            params["car_year"] = year
+
+        url = reverse("product_list")
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        return redirect(url)
+
+    # 🔍 2) Normal filters from GET
+    car_brand = request.GET.get("car_brand", "").strip()
+    car_model = request.GET.get("car_model", "").strip()
+    car_year = request.GET.get("car_year", "").strip()
+
+    # 💾 3) Get saved car (only for display / shortcut)
+    saved_car = {"brand": "", "model": "", "year": ""}
+
+    if request.user.is_authenticated:
+        profile = request.user.profile
+        saved_car = {
+            "brand": profile.saved_car_brand or "",
+            "model": profile.saved_car_model or "",
+            "year": profile.saved_car_year or "",
+        }
+
+    # 📄 4) One keyset page of the catalog (no OFFSET, flat cost per page), indexed
+    # fitment lookup; page and rendered table are cached, see products.catalog
+    table_html, next_cursor, previous_cursor = catalog.product_table(request)
+
+    context = {
+        "product_table": mark_safe(table_html),
+        "car_brand": car_brand,
+        "car_model": car_model,
+        "car_year": car_year,
+        "saved_car": saved_car,
+        "next_url": cursor_url(request, next_cursor),
+        "previous_url": cursor_url(request, previous_cursor),
+    }
+    return render(request, "products/product_list.html", context)
+
+@condition(etag_func=catalog.product_detail_etag, last_modified_func=catalog.catalog_last_modified)
+def product_detail(request, pk):
+    product = get_object_or_404(Product, pk=pk)
+
+    raw_years = product.compatible_years or ""
+    years_list = [y.strip() for y in raw_years.split(",") if y.strip()]
+
+    return render(
+        request,
+        "products/product_detail.html",
+        {
+            "product": product,
+            "years_list": years_list,   # 👈 pass cleaned list to template
+        },
+    )
+
+
+def add_to_cart(request, product_id):
+    product = get_object_or_404(Product, id=product_id)
+    cart = get_cart(request, create=True)
+
+    try:
+        qty = int(request.POST.get("quantity", 1))
+    except ValueError:
+        qty = 1
+
+    held = StockReservation.held_quantities(
+        [product.id],
+        exclude_user=request.user if request.user.is_authenticated else None,
+    )
+    available = max(product.stock - held.get(product.id, 0), 0)
+    qty = max(1, min(qty, available))
+
+    add_line(cart, product, qty)
+    return redirect("view_cart")
+
+@login_required
+def view_cart(request):
+    cart = get_cart(request)  # DB cart (merges any pre-login anonymous cart)
+    error = None
+
+    # ---------- POST ACTIONS ----------
+    if request.method == "POST":
+        product_id = request.POST.get("product_id", "")
+        if cart and product_id.isdigit():
+            lines = cart.lines.filter(product_id=product_id)
+        else:
+            lines = CartLine.objects.none()
+
+        # Update quantity
+        if "update" in request.POST:
+            try:
+                new_qty = int(request.POST.get("quantity", 1))
+            except ValueError:
+                new_qty = 1
+
+            line = lines.select_related("product").first()
+            if line is not None:
+                held = StockReservation.held_quantities([line.product_id], exclude_user=request.user)
+                available = max(line.product.stock - held.get(line.product_id, 0), 0)
+                if new_qty < 1:
+                    new_qty = 1
+                if new_qty > available:
+                    new_qty = available
+                    error = f"Only {available} pcs available for {line.product.name}."
+                lines.update(quantity=new_qty)
+                release_reservations(request.user)
+
+            if not error:
+                return redirect("view_cart")
+
+        # Remove line item
+        elif "remove" in request.POST:
+            if lines.delete()[0]:
+                release_reservations(request.user)
+            return redirect("view_cart")
+
+    # one query for lines + products, one for live holds
+    cart_lines, notices = revalidate(cart, request.user)
+
+    # 🎁 balances from the loyalty ledger (also refreshes the Profile snapshot)
+    loyalty_state = loyalty.refresh_snapshot(request.user)
+
+    # ✅ Checkout: send subtotal + voucher choice to mock_payment
+    if request.method == "POST" and "checkout" in request.POST:
+        if not cart_lines:
+            error = "Your cart is empty."
+        elif notices:
+            # prices/stock moved since they last looked; show the cart again
+            error = " ".join(notices)
+            notices = []
+        else:
+            snapshot = checkout_snapshot(cart_lines)
+            selected_voucher_code = request.POST.get("voucher_code", "") or ""
+
+            # 🧮 price once; the payment page reuses this signed quote
+            quote = price_cart(loyalty_state, snapshot, selected_voucher_code)
+
+            # ⏳ hold the stock while they're on the payment page
+            try:
+                reserve_cart(request.user, snapshot)
+            except InsufficientStock as exc:
+                error = str(exc)
+            else:
+                # store a snapshot in the session for the payment step
+                request.session["pending_checkout"] = {
+                    "cart": snapshot,
+                    "quote": quote.sign(),
+                }
+                return redirect("mock_payment")
+
+    # ---------- GET or POST-with-error: compute totals & available vouchers ----------
+    total = sum((line.subtotal for line in cart_lines), Decimal("0"))
+
+    available_vouchers = pricing.available_vouchers(loyalty_state)
+
+    return render(
+        request,
+        "products/cart.html",
+        {
+            "lines": cart_lines,
+            "notices": notices,
+            "total": total,
+            "available_vouchers": available_vouchers,
+            "error": error,
+        },
+    )
+
+
+
+
+
+def _checkout_success(request, order):
+    return render(
+        request,
+        "products/checkout_success.html",
+        {
+            "total": order.total,
+            "applied_discount": order.applied_discount,
+            "convenience_fee": order.convenience_fee,
+            "final_total": order.final_total,
+            "selected_voucher_code": order.voucher_code,
+            "order": order,
+            "payment_method": order.payment_method,
+        },
+    )
+
+
+@login_required
+def mock_payment(request):
+    # 🔁 a retried/double-clicked submit gets the order it already created
+    idempotency_key = request.POST.get("idempotency_key", "")[:64] if request.method == "POST" else ""
+    if idempotency_key:
+        existing = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if existing is not None:
+            return _checkout_success(request, existing)
+
+    pending = request.session.get("pending_checkout")
+    if not pending:
+        # No pending checkout → go back to cart
+        return redirect("view_cart")
+
+    cart = pending.get("cart", {})
+
+    # ♻️ reuse the quote priced at checkout instead of recomputing it
+    try:
+        quote = Quote.load(pending.get("quote", ""))
+    except signing.BadSignature:
+        quote = None
+    if quote is None or quote.user_id != request.user.id or quote.cart_digest != cart_digest(cart):
+        del request.session["pending_checkout"]
+        messages.error(request, "Your checkout expired. Please review your cart and check out again.")
+        return redirect("view_cart")
+
+    if request.method == "POST":
+        payment_method = request.POST.get("payment_method", "COD")
+
+        # ----- create Order with payment_method + randomized delivery window -----
+        delivery_window = delivery.schedule(random.randint(1, 5))
+
+        try:
+            with transaction.atomic():
+                # ----- order, stock and seller stats in one commit -----
+                order = place_order(
+                    request.user,
+                    cart,
+                    total=quote.subtotal,
+                    applied_discount=quote.discount,
+                    final_total=quote.final_total,
+                    voucher_code=quote.voucher_code,
+                    payment_method=payment_method,
+                    convenience_fee=quote.convenience_fee,  # ✅ stored in DB
+                    **delivery_window,
+                    idempotency_key=idempotency_key or None,
+                )
+
+                # ----- loyalty ledger: voucher redemption + spend (inserts only) -----
+                loyalty.redeem(request.user, quote.voucher_code, order)
+                loyalty.record_spend(request.user, quote.final_total, order)  # includes fee
+        except InsufficientStock as exc:
+            # nothing was written; send them back to fix quantities
+            messages.error(request, str(exc))
+            return redirect("view_cart")
+        except loyalty.VoucherUnavailable:
+            messages.error(request, f"Voucher {quote.voucher_code} is no longer available.")
+            return redirect("view_cart")
+        except IntegrityError:
+            if not idempotency_key:
+                raise
+            # a concurrent submit with the same key committed first
+            existing = Order.objects.get(user=request.user, idempotency_key=idempotency_key)
+            return _checkout_success(request, existing)
+
+        # ----- clear cart & pending checkout -----
+        cart_obj = get_cart(request)
+        if cart_obj is not None:
+            cart_obj.lines.all().delete()
+        if "pending_checkout" in request.session:
+            del request.session["pending_checkout"]
+
+        return _checkout_success(request, order)
+
+    # ---------- GET: show the quote (discount + fee) ----------
+    preview_final = quote.final_total
+    selected_voucher_code = quote.voucher_code
+
+    # QR can reflect the estimated final total; rendered once, served from its own URL
+    qr_payload = f"Pitstop.ph | user={request.user.id} | total={preview_final} | voucher={selected_voucher_code or 'NONE'}"
+    qr_format = settings.QR_IMAGE_FORMAT
+    qr.prefetch(qr_payload, qr_format)
+    qr_url = reverse("payment_qr", args=[qr.make_token(qr_payload, request.user.id), qr_format])
+
+    return render(
+        request,
+        "products/payment.html",
+        {
+            "total": quote.subtotal,
+            "discount_preview": quote.discount,
+            "convenience_fee": quote.convenience_fee,
+            "final_preview": quote.final_total,
+            "voucher_code": quote.voucher_code,
+            "qr_url": qr_url,
+            "idempotency_key": uuid.uuid4().hex,
+        },
+    )
+
+
+@login_required
+def payment_qr(request, token, fmt):
+    if fmt not in qr.CONTENT_TYPES:
+        raise Http404("Unknown QR format")
+    try:
+        user_id, payload = qr.read_token(token)
+    except signing.BadSignature:
+        raise Http404("Unknown QR code")
+    if user_id != request.user.id:
+        raise Http404("Unknown QR code")  # the payload carries the user's total
+
+    etag = f'"{qr.image_key(payload, fmt)}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(qr.render(payload, fmt), content_type=qr.CONTENT_TYPES[fmt])
+
+    # the URL is derived from the payload, so the bytes never change
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, max-age=86400, immutable"
+    return response
+
+
+@login_required
+def track_order(request, order_id):
+    order = get_object_or_404(Order, id=order_id, user=request.user)
+    return render(request, "products/track_order.html", {"order": order})
+
+
+def _sse(event):
+    return f"id: {event['order']}-{event['status']}\nevent: stage\ndata: {json.dumps(event)}\n\n"
+
+
+@login_required
+async def order_events(request):
+    """
+    Server-Sent Events stream of delivery-stage changes for the user's
+    orders (``?order=<id>`` narrows it to one).  Sends the current stage
+    of each open order first, then whatever the shared notifier pushes;
+    idle connections cost no database work.  Needs an ASGI server
+    (e.g. ``uvicorn pitstop.asgi:application``); under runserver use
+    the long-poll endpoint below.
+    """
+    if not isinstance(request, ASGIRequest):
+        # WSGI would buffer the endless stream; 204 tells EventSource to stop
+        # retrying, and the page falls back to long-polling
+        return HttpResponse(status=204)
+
+    user = await request.auser()
+    only_order = request.GET.get("order")
+    only_order = int(only_order) if only_order and only_order.isdigit() else None
+
+    if only_order is not None:
+        open_orders = Order.objects.filter(user=user, id=only_order)
+    else:
+        open_orders = Order.objects.filter(user=user).exclude(delivery_status=Order.DELIVERED)
+
+    async def stream():
+        # subscribe before reading the snapshot so nothing slips in between
+        sub = live.notifier.subscribe(user.id)
+        try:
+            yield f"retry: {settings.LIVE_TRACKING_RETRY_MS}\n\n"
+            async for order_id, status, changed_at in open_orders.values_list(
+                "id", "delivery_status", "delivery_updated_at"
+            ):
+                yield _sse(live.order_event(order_id, status, changed_at))
+            while True:
+                event = await sub.next(settings.LIVE_TRACKING_KEEPALIVE_SECONDS)
+                if event is None:
+                    yield ": keepalive\n\n"
+                elif only_order is None or event["order"] == only_order:
+                    yield _sse(event)
+        finally:
+            live.notifier.unsubscribe(sub)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
+
+
+@login_required
+async def order_status_poll(request, order_id):
+    """
+    Long-poll fallback: answers as soon as the order's stage differs from
+    ``?stage=``, or with the unchanged stage after
+    ``LIVE_TRACKING_LONGPOLL_SECONDS``.
+    """
+    user = await request.auser()
+    known = request.GET.get("stage", "")
+    order = await Order.objects.filter(user=user, id=order_id).values(
+        "delivery_status", "delivery_updated_at"
+    ).afirst()
+    if order is None:
+        raise Http404("No such order.")
+
+    event = live.order_event(order_id, order["delivery_status"], order["delivery_updated_at"])
+    if event["status"] == known:
+        sub = live.notifier.subscribe(user.id)
+        try:
+            deadline = time.monotonic() + settings.LIVE_TRACKING_LONGPOLL_SECONDS
+            while (remaining := deadline - time.monotonic()) > 0:
+                pushed = await sub.next(remaining)
+                if pushed is not None and pushed["order"] == order_id and pushed["status"] != known:
+                    event = pushed
+                    break
+        finally:
+            live.notifier.unsubscribe(sub)
+
+    response = JsonResponse(event)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@login_required
+def transaction_history(request):
+    profile = getattr(request.user, "profile", None)
+    if profile and profile.account_type == "seller":
+        return redirect("seller_product_list")
+
+    # newest first, a page at a time; line subtotals come from SQL
+    orders = Order.objects.filter(user=request.user).prefetch_related(
+        Prefetch("items", queryset=OrderItem.objects.annotate(subtotal=line_total()).order_by("id"))
+    )
+    page_size = settings.ORDER_HISTORY_PAGE_SIZE
+    try:
+        page = paginate_keyset(
+            orders, request.GET.get("cursor"), page_size, key="created_at", descending=True
+        )
+    except ValueError:
+        page = paginate_keyset(orders, None, page_size, key="created_at", descending=True)
+
+    return render(
+        request,
+        "products/transaction_history.html",
+        {
+            "orders": page.items,
+            "next_url": cursor_url(request, page.next_cursor),
+            "previous_url": cursor_url(request, page.previous_cursor),
+        },
+    )
+
+def _export_response(request, fmt, filename, **filters):
+    if fmt not in exports.STREAMERS:
+        raise Http404("Unknown export format.")
+    try:
+        since, until = exports.parse_range(request.GET.get("start"), request.GET.get("end"))
+    except ValueError:
+        return HttpResponse("Dates must be YYYY-MM-DD, with start on or before end.", status=400)
+
+    rows = exports.line_items(since, until, **filters)
+    response = StreamingHttpResponse(exports.STREAMERS[fmt](rows), content_type=exports.CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}-{timezone.localdate():%Y%m%d}.{fmt}"'
+    )
+    return response
+
+
+@login_required
+def export_orders(request, fmt):
+    """Customer purchase history as streamed CSV/NDJSON (?start=&end= YYYY-MM-DD)."""
+    profile = getattr(request.user, "profile", None)
+    if profile and profile.account_type == "seller":
+        return redirect("seller_export_sales", fmt=fmt)
+    return _export_response(request, fmt, "pitstop-purchases", order__user=request.user)
+
+
+@login_required
+def book_installation(request):
+    profile = getattr(request.user, "profile", None)
+    if not profile or profile.account_type != "customer":
+        return redirect("product_list")
+
+    if request.method == "POST":
+        form = BookingForm(request.POST)
+        if form.is_valid():
+            booking = form.save(commit=False)
+            booking.customer = request.user
+            booking.status = "pending"
+            # 🔴 fixed finder’s fee: ₱200 per booking
+            booking.finders_fee = Decimal("200")
+            try:
+                scheduling.claim(booking, form.schedule)
+            except scheduling.SlotUnavailable as exc:
+                form.add_error("scheduled_time", str(exc))
+            else:
+                return redirect("my_bookings")
+    else:
+        form = BookingForm()
+
+    return render(
+        request,
+        "installations/book_installation.html",
+        {"form": form},
+    )
+
+
+@login_required
+def my_bookings(request):
+    profile = getattr(request.user, "profile", None)
+    # primarily for customers, but we just show "my bookings" to whoever
+    bookings = (
+        Booking.objects.filter(customer=request.user)
+        .select_related("installer", "product")
+        .order_by("-created_at")
+    )
+
+    return render(
+        request,
+        "installations/my_bookings.html",
+        {"bookings": bookings},
+    )
+
+@login_required
+def installer_bookings(request):
+    profile = getattr(request.user, "profile", None)
+    if not profile or profile.account_type != "installer":
+        return redirect("product_list")
+
+    # Handle accept/reject: one row's button ("accept:12") or the ticked rows
+    if request.method == "POST":
+        action, _, one_id = request.POST.get("action", "").partition(":")
+        raw_ids = [one_id] if one_id else request.POST.getlist("booking_ids")
+        ids = [int(i) for i in raw_ids if i.isdigit()][: scheduling.MAX_BULK_DECISIONS]
+        if action in scheduling.DECISIONS and ids:
+            results = scheduling.decide(request.user, ids, action)
+            moved = sum(r["result"] == scheduling.DECISIONS[action] for r in results)
+            skipped = len(results) - moved
+            summary = f"{scheduling.DECISIONS[action].capitalize()} {moved} booking{'s' if moved != 1 else ''}."
+            if skipped:
+                summary += f" {skipped} skipped (no longer pending or not yours)."
+            messages.info(request, summary)
+        return redirect("installer_bookings")
+
+    bookings = (
+        Booking.objects.filter(installer=request.user)
+        .select_related("customer", "product")
+        .order_by("-created_at")
+    )
+
+    return render(
+        request,
+        "installations/installer_bookings.html",
+        {"bookings": bookings},
+    )
+
+def signup(request):
+    if request.method == "POST":
+        form = SignUpForm(request.POST)
+        if form.is_valid():
+            user = form.save()
+            account_type = form.cleaned_data["account_type"]
+
+            Profile.objects.create(user=user, account_type=account_type)
+            login(request, user)
+
+            # ✅ Different landing page for seller vs customer
+                        # ✅ Different landing page by role
+            if account_type == "seller":
+                return redirect("seller_dashboard")
+            elif account_type == "installer":
+                return redirect("installer_dashboard")
+            else:
+                return redirect("product_list")
+
+    else:
+        form = SignUpForm()
+    return render(request, "registration/signup.html", {"form": form})
+
+@login_required
+def installer_dashboard(request):
+    profile = getattr(request.user, "profile", None)
+    if not profile or profile.account_type != "installer":
+        return redirect("product_list")
+
+    # All bookings for this installer
+    bookings_qs = Booking.objects.filter(installer=request.user)
+
+    # counts per status + accepted fee total in one conditional aggregate
+    accepted = Q(status="accepted")
+    totals = bookings_qs.aggregate(
+        total_bookings=Count("id"),
+        pending_count=Count("id", filter=Q(status="pending")),
+        accepted_count=Count("id", filter=accepted),
+        rejected_count=Count("id", filter=Q(status="rejected")),
+        total_finders_fee=Coalesce(
+            Sum("finders_fee", filter=accepted), Decimal("0"), output_field=DecimalField()
+        ),
+    )
+    total_bookings = totals["total_bookings"]
+    pending_count = totals["pending_count"]
+    accepted_count = totals["accepted_count"]
+    rejected_count = totals["rejected_count"]
+    total_finders_fee = totals["total_finders_fee"]
+
+    # Upcoming schedule (today onwards, pending or accepted); served by booking_installer_status_date
+    today = timezone.localdate()
+    upcoming = (
+        bookings_qs
+        .filter(status__in=["pending", "accepted"], scheduled_date__gte=today)
+        .select_related("customer", "product")
+        .order_by("scheduled_date", "scheduled_time")[:10]
+    )
+
+    context = {
+        "total_bookings": total_bookings,
+        "pending_count": pending_count,
+        "accepted_count": accepted_count,
+        "rejected_count": rejected_count,
+        "total_finders_fee": total_finders_fee,
+        "upcoming": upcoming,
+    }
+    return render(request, "installations/installer_dashboard.html", context)
+
+
+@login_required
+def installer_schedule(request):
+    profile = getattr(request.user, "profile", None)
+    if not profile or profile.account_type != "installer":
+        return redirect("product_list")
+
+    schedule = InstallerSchedule.for_installer(request.user)
+    if request.method == "POST":
+        form = InstallerScheduleForm(request.POST, instance=schedule)
+        if form.is_valid():
+            form.save()
+            messages.success(request, "Working hours saved.")
+            return redirect("installer_schedule")
+    else:
+        form = InstallerScheduleForm(instance=schedule)
+
+    today = timezone.localdate()
+    week = scheduling.free_slots(request.user, today, today + timedelta(days=6), schedule)
+    return render(
+        request,
+        "installations/installer_schedule.html",
+        {"form": form, "week": week},
+    )
+
+
+# SMALL HELPER FOR SELLER-ONLY VIEWS
+def _require_seller(request):
+    if not request.user.is_authenticated:
+        return redirect("login")
+    if not hasattr(request.user, "profile") or request.user.profile.account_type != "seller":
+        return redirect("product_list")
+    return None
+
+
+# 🟪 SELLER: LIST THEIR OWN PRODUCTS
+@login_required
+def seller_product_list(request):
+    redirect_resp = _require_seller(request)
+    if redirect_resp:
+        return redirect_resp
+
+    products = Product.objects.filter(seller=request.user).order_by("name")
+    return render(request, "seller/seller_product_list.html", {"products": products})
+
+
+# 🟪 SELLER: CREATE PRODUCT
+@login_required
+def seller_product_create(request):
+    redirect_resp = _require_seller(request)
+    if redirect_resp:
+        return redirect_resp
+
+    if request.method == "POST":
+        form = SellerProductForm(request.POST, request.FILES)  # 👈 include FILES
+        if form.is_valid():
+            product = form.save(commit=False)
+            product.seller = request.user
+            # fitments commit together with the product and its catalog version bump
+            with transaction.atomic():
+                product.save()
+                product.sync_fitments()
+            return redirect("seller_product_list")
+    else:
+        form = SellerProductForm()
+
+    return render(
+        request,
+        "seller/seller_product_form.html",
+        {"form": form, "title": "Add Product"},
+    )
+
+
+# 🟪 SELLER: UPDATE PRODUCT
+@login_required
+def seller_product_update(request, pk):
+    redirect_resp = _require_seller(request)
+    if redirect_resp:
+        return redirect_resp
+
+    product = get_object_or_404(Product, pk=pk, seller=request.user)
+
+    if request.method == "POST":
+        form = SellerProductForm(request.POST, request.FILES, instance=product)  # 👈 include FILES
+        if form.is_valid():
+            with transaction.atomic():
+                product = form.save()
+                product.sync_fitments()
+            return redirect("seller_product_list")
+    else:
+        form = SellerProductForm(instance=product)
+
+    return render(
+        request,
+        "seller/seller_product_form.html",
+        {"form": form, "title": "Edit Product"},
+    )
+
+# 🟪 SELLER: DELETE PRODUCT
+@login_required
+def seller_product_delete(request, pk):
+    redirect_resp = _require_seller(request)
+    if redirect_resp:
+        return redirect_resp
+
+    product = get_object_or_404(Product, pk=pk, seller=request.user)
+
+    if request.method == "POST":
+        product.delete()
+        return redirect("seller_product_list")
+
+    return redirect("seller_product_list")
+
+# 🟪 SELLER: ADD STOCK (quick action)
+@login_required
+def seller_add_stock(request, pk):
+    redirect_resp = _require_seller(request)
+    if redirect_resp:
+        return redirect_resp
+
+    product = get_object_or_404(Product, pk=pk, seller=request.user)
+
+    if request.method == "POST":
+        try:
+            add_qty = int(request.POST.get("add_quantity", 0))
+        except ValueError:
+            add_qty = 0
+
+        if add_qty > 0:
+            product.stock = product.stock + add_qty
+            product.save()
+
+        # even if invalid value, just go back quietly
+        return redirect("seller_product_list")
+
+    # no GET page; just go back
+    return redirect("seller_product_list")
+
+from decimal import Decimal
+from datetime import timedelta
+from django.utils import timezone
+from django.contrib.auth.decorators import login_required
+
+@login_required
+def seller_export_sales(request, fmt):
+    """Seller's sold line items as streamed CSV/NDJSON (?start=&end= YYYY-MM-DD)."""
+    redirect_resp = _require_seller(request)
+    if redirect_resp:
+        return redirect_resp
+    return _export_response(request, fmt, "pitstop-sales", seller=request.user)
+
+
+@login_required
+def seller_dashboard(request):
+    redirect_resp = _require_seller(request)
+    if redirect_resp:
+        return redirect_resp
+
+    # all products of this seller
+    products = Product.objects.filter(seller=request.user)
+
+    # all order items this seller sold (kept after a product is deleted)
+    order_items = OrderItem.objects.filter(seller=request.user)
+
+    # lifetime totals come from the incrementally maintained stats row
+    stats = SellerStats.objects.filter(seller=request.user).first()
+    total_revenue = stats.lifetime_revenue if stats else Decimal("0")
+    total_units = stats.units_sold if stats else 0
+    total_orders = stats.order_count if stats else 0
+    avg_per_order = total_revenue / total_orders if total_orders > 0 else Decimal("0")
+
+    # ---- last 30 days summary (one conditional aggregate) ----
+    now = timezone.now()
+    start_30 = now - timedelta(days=30)
+    recent = Q(order__created_at__gte=start_30)
+    last_30 = order_items.aggregate(
+        rev_30=Coalesce(Sum(line_total(), filter=recent), Decimal("0"), output_field=DecimalField()),
+        units_30=Coalesce(Sum("quantity", filter=recent), 0),
+    )
+    rev_30 = last_30["rev_30"]
+    units_30 = last_30["units_30"]
+
+    # ---- top products (by quantity sold), grouped + limited in SQL ----
+    top_products = list(
+        order_items
+        .values(name=F("product_name"))
+        .annotate(qty=Sum("quantity"), revenue=Sum(line_total()))
+        .order_by("-qty", "name")[:5]
+    )
+
+    # ---- low stock products ----
+    low_stock = products.filter(stock__lte=3).order_by("stock")
+
+    # ---- BADGE LOGIC (based on lifetime revenue) ----
+    THRESH_VERIFIED = BADGE_THRESH_VERIFIED    # ₱10,000
+    THRESH_TOP = BADGE_THRESH_TOP              # ₱100,000
+
+    if total_revenue >= THRESH_TOP:
+        badge_level = "top"
+        badge_label = "🏆 Top Store"
+        next_badge_label = None
+        amount_to_next = Decimal("0")
+        progress_to_next = 100
+    elif total_revenue >= THRESH_VERIFIED:
+        badge_level = "verified"
+        badge_label = "✅ Verified Store"
+        next_badge_label = "🏆 Top Store"
+        amount_to_next = max(THRESH_TOP - total_revenue, Decimal("0"))
+        # progress within the band 10k–100k
+        band_current = max(total_revenue - THRESH_VERIFIED, Decimal("0"))
+        band_total = THRESH_TOP - THRESH_VERIFIED  # 90k
+        progress_to_next = int(min((band_current / band_total) * 100, 100))
+    else:
+        badge_level = "none"
+        badge_label = "No badge yet"
+        next_badge_label = "✅ Verified Store"
+        amount_to_next = max(THRESH_VERIFIED - total_revenue, Decimal("0"))
+        progress_to_next = int(min((total_revenue / THRESH_VERIFIED) * 100, 100))
+
+    context = {
+        "total_revenue": total_revenue,
+        "total_units": total_units,
+        "total_orders": total_orders,
+        "avg_per_order": avg_per_order,
+        "rev_30": rev_30,
+        "units_30": units_30,
+        "top_products": top_products,
+        "low_stock": low_stock,
+
+        # badge context
+        "badge_level": badge_level,
+        "badge_label": badge_label,
+        "next_badge_label": next_badge_label,
+        "amount_to_next": amount_to_next,
+        "progress_to_next": progress_to_next,
+    }
+    return render(request, "seller/dashboard.html", context)
+